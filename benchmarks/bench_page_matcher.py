@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PageMatcher (indicizzato) contro find_page_match (lineare)
+Usa le pagine reali di compendium/dnd5e.rules.json e verifica che i risultati coincidano
+"""
+
+import json
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from translate_rules import PageMatcher, find_page_match, read_yaml_file  # noqa: E402
+
+def build_queries(chapter_pages, origin_pages):
+    """Nomi da cercare: chiavi e nomi delle pagine, varianti parziali e pagine dei YAML originali"""
+    queries = []
+    for key, value in chapter_pages.items():
+        name = value.get('name', key) if isinstance(value, dict) else key
+        queries.extend([key, name, key.upper(), key[:max(4, len(key) // 2)], f"{key} (Variant)"])
+    queries.extend(origin_pages)
+    queries.append("Pagina Inesistente Per Il Benchmark")
+    return queries
+
+def timed(func, repeat):
+    """Esegue func repeat volte e restituisce (risultato, secondi per esecuzione)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with open(REPO_ROOT / 'compendium/dnd5e.rules.json', 'r', encoding='utf-8') as f:
+        entries = json.load(f, object_pairs_hook=OrderedDict)['entries']
+
+    # Pagine originali, se la directory origin è presente
+    origin_pages = []
+    origin_dir = REPO_ROOT / 'origin/packs/_source/rules'
+    if origin_dir.exists():
+        for yml_file in sorted(origin_dir.glob('*.yml')):
+            yaml_data = read_yaml_file(yml_file)
+            if yaml_data:
+                origin_pages.extend(yaml_data['pages'].keys())
+
+    # Tutte le pagine di tutti i capitoli in un unico insieme (caso peggiore)
+    all_pages = OrderedDict()
+    for chapter_key, chapter_data in entries.items():
+        for page_key, page_value in chapter_data.get('pages', {}).items():
+            all_pages[f"{chapter_key}/{page_key}"] = page_value if isinstance(page_value, dict) else {'name': page_key}
+
+    cases = [(chapter_key, chapter_data.get('pages', {})) for chapter_key, chapter_data in entries.items()]
+    cases.append(('TUTTE LE PAGINE', all_pages))
+
+    print(f"{'Capitolo':45} {'pagine':>7} {'query':>7} {'lineare':>10} {'indicizzato':>12} {'speedup':>8}")
+    total_linear = total_indexed = 0.0
+    mismatches = 0
+    for label, pages in cases:
+        if not pages:
+            continue
+        queries = build_queries(pages, origin_pages)
+        linear, linear_time = timed(lambda: [find_page_match(q, pages) for q in queries], repeat)
+
+        def indexed_run():
+            matcher = PageMatcher(pages)
+            return [matcher.match(q) for q in queries]
+
+        indexed, indexed_time = timed(indexed_run, repeat)
+        for query, expected, got in zip(queries, linear, indexed):
+            if expected != got:
+                mismatches += 1
+                print(f"   ❌ Risultato diverso per {query!r}: {expected!r} != {got!r}")
+        total_linear += linear_time
+        total_indexed += indexed_time
+        speedup = linear_time / indexed_time if indexed_time else float('inf')
+        print(f"{label[:45]:45} {len(pages):7d} {len(queries):7d} {linear_time * 1000:8.2f}ms "
+              f"{indexed_time * 1000:10.2f}ms {speedup:7.1f}x")
+
+    print(f"\n📊 Totale: lineare {total_linear * 1000:.2f}ms, indicizzato {total_indexed * 1000:.2f}ms")
+    if mismatches:
+        print(f"❌ {mismatches} risultati diversi!")
+        sys.exit(1)
+    print("✅ Risultati identici")
+
+if __name__ == '__main__':
+    main()
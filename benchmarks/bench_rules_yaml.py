@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lettura dei YAML delle regole con la vecchia regex, il parser a righe di
+journal_yaml e (se installato) il loader C di PyYAML
+
+Usa i file reali di origin/packs/_source/rules per tutti i capitoli di FILE_TO_CHAPTER; se la
+directory manca genera capitoli sintetici nel layout dei journal Foundry (pagine con chiavi in
+ordine diverso, contenuti >-, | e tra apici). Verifica che parser a righe e libyaml coincidano.
+
+Uso: python benchmarks/bench_rules_yaml.py [ripetizioni] [pagine per capitolo sintetico]
+"""
+
+import random
+import re
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from journal_yaml import YAML_C_AVAILABLE, load_journal_yaml  # noqa: E402
+from translate_rules import FILE_TO_CHAPTER  # noqa: E402
+
+WORDS = ("the creature makes a saving throw against your spell save DC and takes damage on a failed "
+         "save or half as much on a successful one you can't use this feature again until you finish "
+         "a long rest <strong>Bonus Action</strong> <em>Reaction</em> it's").split()
+
+def read_yaml_file_regex(yml_file):
+    """Versione precedente basata su regex (solo pagine "- name:" con "content: >-"), per confronto"""
+    try:
+        with open(yml_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        pages = {}
+        
+        # Estrai nome del journal
+        journal_name_match = re.search(r'^name:\s*[\'"]?([^\'"\n]+)[\'"]?$', content, re.MULTILINE)
+        journal_name = journal_name_match.group(1).strip() if journal_name_match else None
+        
+        # Pattern semplificato: trova ogni pagina dividendo per "name:" e poi cercando "content: >-"
+        # Divide il contenuto in sezioni per pagina
+        page_sections = re.split(r'^\s*-\s+name:\s*', content, flags=re.MULTILINE)
+        
+        for section in page_sections[1:]:  # Salta la prima (intestazione)
+            # Estrai nome pagina (prima riga)
+            first_line = section.split('\n')[0].strip()
+            page_name = first_line.strip("'\"")
+            
+            # Cerca "content: >-" in questa sezione
+            content_match = re.search(r'content:\s*>\-\s*\n((?:\s+.*\n?)+?)(?=^\s+name:|^\s+_id:|^[a-zA-Z_]+:|$)', section, re.MULTILINE | re.DOTALL)
+            
+            if content_match:
+                page_text_raw = content_match.group(1)
+                
+                # Rimuovi indentazione comune
+                lines = [line for line in page_text_raw.split('\n') if line.strip()]
+                if lines:
+                    indent_levels = [len(line) - len(line.lstrip()) for line in lines]
+                    if indent_levels:
+                        min_indent = min(indent_levels)
+                        page_text = '\n'.join(line[min_indent:] if len(line) > min_indent else line for line in lines).strip()
+                    else:
+                        page_text = '\n'.join(lines).strip()
+                    
+                    if page_text and page_name:
+                        pages[page_name] = {
+                            'name': page_name,
+                            'text': page_text
+                        }
+        
+        return {
+            'name': journal_name,
+            'pages': pages
+        }
+    except Exception as e:
+        print(f"Errore lettura {yml_file}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def paragraph(rng):
+    return '<p>' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) + '</p>'
+
+def quote_single(text):
+    return "'" + text.replace("'", "''") + "'"
+
+def write_page(lines, rng, index):
+    """Una pagina nel formato dei journal Foundry, con lo stile del contenuto variabile"""
+    name = f"Section {index}: " + ' '.join(rng.choice(WORDS) for _ in range(3))
+    content = ''.join(paragraph(rng) for _ in range(rng.randint(2, 12)))
+    head = [f"    sort: {index * 100000}", f"    name: {quote_single(name)}", "    type: text",
+            f"    _id: page{index:012d}"]
+    if index % 3 == 1:
+        # Pagine che non iniziano con "- name:" (la vecchia regex non le vede)
+        head[0], head[1] = head[1], head[0]
+    lines.append("  - " + head[0].lstrip())
+    lines.extend(head[1:])
+    lines.extend(["    title:", "      show: true", "      level: 1", "    image: {}", "    text:", "      format: 1"])
+    style = index % 5
+    if style == 3:
+        lines.append("      content: |-")
+        lines.extend("        " + part for part in content.replace('</p>', '</p>\n').rstrip('\n').split('\n'))
+    elif style == 4:
+        lines.append("      content: " + quote_single(content[:200]))
+    else:
+        lines.append("      content: >-")
+        lines.extend(textwrap.wrap(content, width=80, initial_indent="        ", subsequent_indent="        ",
+                                   break_long_words=False, break_on_hyphens=False))
+    lines.extend(["    video:", "      controls: true", "      volume: 0.5", "    src: null", "    system: {}",
+                  "    ownership:", "      default: -1", "    flags: {}", f"    _key: '!journal.pages!page{index:012d}'"])
+
+def write_synthetic_chapters(target: Path, pages: int):
+    rng = random.Random(0)
+    for file_name, chapter in FILE_TO_CHAPTER.items():
+        lines = [f"name: {quote_single(chapter)}", f"_id: {file_name[:16]}", "pages:"]
+        for index in range(pages):
+            write_page(lines, rng, index)
+        lines.extend(["folder: null", "flags: {}", "_key: '!journal!x'"])
+        (target / file_name).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+def count_pages(journal):
+    return sum(1 for page in journal['pages'] if page['name'] and (page['content'] or '').strip())
+
+def run(rules_dir: Path, repeat: int):
+    files = [rules_dir / name for name in FILE_TO_CHAPTER if (rules_dir / name).exists()]
+    header = f"{'File':45} {'KB':>6} {'regex':>14} {'a righe':>14}"
+    if YAML_C_AVAILABLE:
+        header += f" {'libyaml':>14}"
+    print(header)
+    totals = {'regex': 0.0, 'lines': 0.0, 'libyaml': 0.0}
+    found = {'regex': 0, 'lines': 0}
+    mismatches = 0
+    for yml_file in files:
+        regex, regex_time = timed(lambda: read_yaml_file_regex(yml_file), repeat)
+        lines, lines_time = timed(lambda: load_journal_yaml(yml_file, use_libyaml=False), repeat)
+        totals['regex'] += regex_time
+        totals['lines'] += lines_time
+        found['regex'] += len(regex['pages']) if regex else 0
+        found['lines'] += count_pages(lines)
+        row = (f"{yml_file.name[:45]:45} {yml_file.stat().st_size / 1024:6.0f} "
+               f"{regex_time * 1000:7.2f}ms {len(regex['pages']) if regex else 0:4d}p "
+               f"{lines_time * 1000:7.2f}ms {count_pages(lines):4d}p")
+        if YAML_C_AVAILABLE:
+            c_loaded, c_time = timed(lambda: load_journal_yaml(yml_file, use_libyaml=True), repeat)
+            totals['libyaml'] += c_time
+            row += f" {c_time * 1000:7.2f}ms {count_pages(c_loaded):4d}p"
+            if c_loaded != lines:
+                mismatches += 1
+                row += "  ❌ diverso da libyaml"
+        print(row)
+    print(f"\n📊 Totale: regex {totals['regex'] * 1000:.1f}ms, a righe {totals['lines'] * 1000:.1f}ms"
+          + (f", libyaml {totals['libyaml'] * 1000:.1f}ms" if YAML_C_AVAILABLE else ''))
+    for label, key in (('regex', 'regex'), ('a righe', 'lines')):
+        if found[key]:
+            print(f"   {label}: {found[key]} pagine, {totals[key] * 1e6 / found[key]:.0f}µs per pagina trovata")
+    return mismatches
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 80
+    rules_dir = REPO_ROOT / 'origin/packs/_source/rules'
+    if rules_dir.exists():
+        mismatches = run(rules_dir, repeat)
+    else:
+        print(f"⚠️  {rules_dir.relative_to(REPO_ROOT)} non trovata: uso capitoli sintetici ({pages} pagine)\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            write_synthetic_chapters(Path(tmp), pages)
+            mismatches = run(Path(tmp), repeat)
+    if mismatches:
+        print(f"\n❌ {mismatches} file con risultati diversi tra parser a righe e libyaml")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Suite di benchmark dei percorsi critici con dati sintetici a 1x, 10x e 100x le dimensioni attuali
+
+Casi misurati (dati generati da synthetic.py):
+- normalize_page_name       tutti i nomi pagina e loro varianti
+- find_page_match           100 ricerche lineari su un capitolo di N pagine (costo per ricerca ~N)
+- PageMatcher               indice + ricerca di tutte le N pagine (deve restare lineare)
+- read_yaml_file            tutti i YAML originali delle regole
+- compendium_load           Compendium() del rules JSON sintetico
+- compendium_save           Compendium.save() con l'1% dei capitoli modificati
+- pdf_index                 TitleIndex + SectionTree sul testo tipo SRD
+- find_page_content         find_page_content_directly per tutti i titoli (con TitleIndex)
+
+Per ogni caso la crescita tra la scala minima e la massima viene espressa come esponente
+(1 = lineare, 2 = quadratico): se supera il massimo ammesso del caso il run fallisce, su
+qualsiasi macchina. I tempi sono confrontati con il file di baseline solo se registrato
+sulla stessa architettura e versione di Python (major.minor): un caso più lento di
+--tolerance volte (e di almeno --min-delta ms) è una regressione. La baseline è locale alla
+macchina (.cache/benchmarks/baseline.json, non versionata): con --baseline se ne sceglie un'altra.
+
+Uso:
+    python benchmarks/bench_suite.py                      # confronta con la baseline locale
+    python benchmarks/bench_suite.py --update-baseline    # registra la nuova baseline
+    python benchmarks/bench_suite.py --baseline ci-baseline.json
+    python benchmarks/bench_suite.py --scales 1,10 --cases pdf_index,PageMatcher
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic  # noqa: E402
+from compendium import Compendium  # noqa: E402
+from compendium_io import atomic_write_json  # noqa: E402
+from extract_translations_from_pdf import SectionTree, TitleIndex, find_page_content_directly  # noqa: E402
+from translate_rules import PageMatcher, find_page_match, normalize_page_name, read_yaml_file  # noqa: E402
+
+DEFAULT_BASELINE = REPO_ROOT / '.cache' / 'benchmarks' / 'baseline.json'
+DEFAULT_SCALES = (1, 10, 100)
+LINEAR_QUERIES = 100  # Ricerche del caso find_page_match (lineare per ricerca)
+MIN_MEASURE_TIME = 0.5  # Secondi minimi di misura per scala (ripete finché non li raggiunge)
+# Esponente massimo per i casi lineari: margine per il rumore, un quadratico misura ~2
+LINEAR = 1.3
+
+def page_queries(names: List[str]) -> List[str]:
+    """Nomi da cercare come in translate_rules: esatti, maiuscoli, parziali e inesistenti"""
+    queries = []
+    for name in names:
+        queries.extend([name, name.upper(), name[:max(4, len(name) // 2)]])
+    queries.append("Pagina Inesistente Per Il Benchmark")
+    return queries
+
+def single_chapter(scale: int) -> Dict:
+    """Un capitolo con tutte le pagine della scala (il caso peggiore per il matching)"""
+    names = synthetic.page_names(scale)
+    titles = synthetic.italian_titles(scale)
+    return {name: {'name': title} for name, title in zip(names, titles)}
+
+# Ogni caso: (prepara(scala, directory) -> funzione da misurare, esponente massimo ammesso)
+def case_normalize(scale: int, workdir: Path) -> Callable:
+    names = page_queries(synthetic.page_names(scale) + synthetic.italian_titles(scale))
+    return lambda: [normalize_page_name(name) for name in names]
+
+def case_find_page_match(scale: int, workdir: Path) -> Callable:
+    pages = single_chapter(scale)
+    queries = page_queries(list(pages))
+    step = max(1, len(queries) // LINEAR_QUERIES)
+    sample = queries[::step][:LINEAR_QUERIES]
+    return lambda: [find_page_match(query, pages) for query in sample]
+
+def case_page_matcher(scale: int, workdir: Path) -> Callable:
+    pages = single_chapter(scale)
+    queries = page_queries(list(pages))
+    def run():
+        matcher = PageMatcher(pages)
+        return [matcher.match(query) for query in queries]
+    return run
+
+def case_read_yaml(scale: int, workdir: Path) -> Callable:
+    origin = workdir / 'origin-rules'
+    synthetic.write_origin_rules(origin, scale)
+    files = sorted(origin.glob('*.yml'))
+    return lambda: [read_yaml_file(yml_file) for yml_file in files]
+
+def case_compendium_load(scale: int, workdir: Path) -> Callable:
+    rules_file = workdir / 'rules-load.json'
+    synthetic.write_rules_json(rules_file, scale)
+    return lambda: Compendium(rules_file)
+
+def case_compendium_save(scale: int, workdir: Path) -> Callable:
+    rules_file = workdir / 'rules-save.json'
+    synthetic.write_rules_json(rules_file, scale)
+    pack = Compendium(rules_file)
+    keys = list(pack.keys())[::100] or list(pack.keys())[:1]
+    def run():
+        for key in keys:
+            pack.mark_dirty(key)
+        return pack.save()
+    return run
+
+def case_pdf_index(scale: int, workdir: Path) -> Callable:
+    text = synthetic.srd_text(scale)
+    titles = synthetic.italian_titles(scale)
+    def run():
+        title_index = TitleIndex(text, titles)
+        return SectionTree(text, titles, title_index)
+    return run
+
+def case_find_page_content(scale: int, workdir: Path) -> Callable:
+    text = synthetic.srd_text(scale)
+    titles = synthetic.italian_titles(scale)
+    title_index = TitleIndex(text, titles)
+    return lambda: [find_page_content_directly(text, title, title_index) for title in titles]
+
+CASES: Dict[str, Tuple[Callable, float]] = {
+    'normalize_page_name': (case_normalize, LINEAR),
+    'find_page_match': (case_find_page_match, LINEAR),
+    'PageMatcher': (case_page_matcher, LINEAR),
+    'read_yaml_file': (case_read_yaml, LINEAR),
+    'compendium_load': (case_compendium_load, LINEAR),
+    'compendium_save': (case_compendium_save, LINEAR),
+    'pdf_index': (case_pdf_index, LINEAR),
+    'find_page_content': (case_find_page_content, LINEAR),
+}
+
+def measure(func: Callable, repeat: int) -> float:
+    """Miglior tempo (secondi) su al massimo repeat esecuzioni, fermandosi dopo MIN_MEASURE_TIME"""
+    best = math.inf
+    spent = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= MIN_MEASURE_TIME:
+            break
+    return best
+
+def growth_exponent(times: Dict[int, float]) -> float:
+    """Esponente di crescita tra la scala minima e la massima (t ~ scala^esponente)"""
+    low, high = min(times), max(times)
+    if low == high or times[low] <= 0:
+        return 0.0
+    return math.log(times[high] / times[low]) / math.log(high / low)
+
+def environment() -> Dict[str, str]:
+    """Ambiente a cui sono legati i tempi: architettura e versione major.minor di Python"""
+    return {'machine': platform.machine(), 'python': '.'.join(platform.python_version_tuple()[:2])}
+
+def same_environment(baseline: Dict, current: Dict) -> bool:
+    """True se la baseline è stata registrata nello stesso ambiente (anche con il vecchio formato)"""
+    recorded = baseline.get('environment') or {}
+    python = '.'.join(str(recorded.get('python', '')).split('.')[:2])
+    return recorded.get('machine') == current['environment']['machine'] and python == current['environment']['python']
+
+def run_suite(cases: List[str], scales: List[int], repeat: int) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in cases:
+            prepare, max_exponent = CASES[name]
+            times = {}
+            for scale in scales:
+                workdir = Path(tmp) / f"{name}-{scale}"
+                workdir.mkdir()
+                times[scale] = measure(prepare(scale, workdir), repeat)
+            exponent = growth_exponent(times)
+            results[name] = {'times_ms': {str(scale): seconds * 1000 for scale, seconds in times.items()},
+                             'exponent': exponent, 'max_exponent': max_exponent}
+            cells = '  '.join(f"{scale:>4}x {seconds * 1000:10.2f}ms" for scale, seconds in times.items())
+            flag = '❌' if len(times) > 1 and exponent > max_exponent else '  '
+            print(f"{flag} {name:22} {cells}  crescita n^{exponent:.2f} (max {max_exponent})", flush=True)
+    return {'environment': environment(), 'scales': scales, 'results': results}
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Regressioni: crescita oltre il massimo e, sulla stessa piattaforma, tempi oltre la tolleranza"""
+    problems = []
+    for name, result in current['results'].items():
+        if len(result['times_ms']) > 1 and result['exponent'] > result['max_exponent']:
+            problems.append(f"{name}: crescita n^{result['exponent']:.2f} oltre il massimo n^{result['max_exponent']}")
+    if not baseline:
+        return problems
+    if not same_environment(baseline, current):
+        print("\nℹ️  Baseline registrata su un'altra architettura o versione di Python: confronto solo la crescita")
+        return problems
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name, {}).get('times_ms', {})
+        for scale, elapsed in result['times_ms'].items():
+            before = previous.get(scale)
+            if before is None:
+                continue
+            if elapsed > before * tolerance and elapsed - before > min_delta_ms:
+                problems.append(f"{name} {scale}x: {elapsed:.2f}ms contro {before:.2f}ms della baseline "
+                                f"(+{(elapsed / before - 1) * 100:.0f}%)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei percorsi critici con dati sintetici scalati")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="scale rispetto alle dimensioni attuali (default: %(default)s)")
+    parser.add_argument('--cases', default='all', help=f"casi da eseguire ({', '.join(CASES)} o all)")
+    parser.add_argument('--repeat', type=int, default=5, help="esecuzioni massime per misura (default: 5)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help=f"file di baseline (default: {DEFAULT_BASELINE.relative_to(REPO_ROOT)})")
+    parser.add_argument('--update-baseline', action='store_true', help="salva i risultati come nuova baseline")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="rapporto massimo rispetto alla baseline (default: %(default)s)")
+    parser.add_argument('--min-delta', type=float, default=5.0,
+                        help="differenza minima in ms per segnalare una regressione (default: %(default)s)")
+    parser.add_argument('--json', type=Path, help="salva anche i risultati di questo run")
+    args = parser.parse_args()
+
+    scales = sorted(int(scale) for scale in args.scales.split(',') if scale.strip())
+    cases = list(CASES) if args.cases == 'all' else [case.strip() for case in args.cases.split(',')]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"casi sconosciuti: {', '.join(unknown)}")
+
+    print(f"🏁 Benchmark a scala {', '.join(f'{scale}x' for scale in scales)} ({platform.python_version()})\n")
+    current = run_suite(cases, scales, args.repeat)
+    if args.json:
+        atomic_write_json(args.json, current)
+
+    if args.update_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if not same_environment(baseline, current):
+                baseline = {}
+        # I casi non eseguiti in questo run restano quelli registrati in precedenza
+        merged = {'environment': current['environment'], 'scales': scales,
+                  'results': {**baseline.get('results', {}), **current['results']}}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(args.baseline, merged)
+        print(f"\n💾 Baseline aggiornata: {args.baseline}")
+        problems = compare(current, {}, args.tolerance, args.min_delta)
+    else:
+        baseline = {}
+        if args.baseline.exists():
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        else:
+            print(f"\nℹ️  Nessuna baseline in {args.baseline}: crea con --update-baseline")
+        problems = compare(current, baseline, args.tolerance, args.min_delta)
+
+    if problems:
+        print(f"\n❌ {len(problems)} regressioni:")
+        for problem in problems:
+            print(f"   {problem}")
+        sys.exit(1)
+    print("\n✅ Nessuna regressione")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test di carico di translate_missing_via_api.py contro il sito simulato (mock_quintaedizione.py)
+
+Crea in una directory temporanea un albero origin/ e dei pack del compendio sintetici, avvia il
+server locale ed esegue l'intera pipeline translate_* per ogni livello di concorrenza indicato,
+riportando throughput, latenza p50/p99, richieste per voce e correttezza dei risultati.
+Con --cache ogni scenario viene ripetuto a cache calda.
+
+Uso: python benchmarks/load_test_api.py --entries 50 --concurrency 1,4,8 --error-rate 0.05 --cache
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import translate_missing_via_api as api  # noqa: E402
+from compendium import Compendium  # noqa: E402
+from fetch_engine import REQUESTS_AVAILABLE, configure_engine, get_engine  # noqa: E402
+from mock_quintaedizione import MockSite, start_mock_server  # noqa: E402
+from origin_index import configure_origin_index  # noqa: E402
+from pattern_stats import configure_pattern_stats  # noqa: E402
+from response_cache import configure_cache, disable_cache  # noqa: E402
+from translation_memory import configure_memory  # noqa: E402
+
+# pack -> (file del compendio, forma di 'entries', etichetta, nome di esempio, funzione)
+PACKS = {
+    'spells24': ('dnd5e.spells24.json', 'list', 'Incantesimi', 'Spell', api.translate_spells24),
+    'classes24': ('dnd5e.classes24.json', 'dict', 'Classi', 'Feature', api.translate_classes24),
+    'equipment24': ('dnd5e.equipment24.json', 'dict', 'Equipaggiamento', 'Item', api.translate_equipment24),
+    'monsterfeatures': ('dnd5e.monsterfeatures.json', 'list', 'Tratti dei mostri', 'Trait', api.translate_monster_features),
+}
+
+def create_origin(root: Path, entries: int):
+    """Scrive i YAML originali sintetici: entries voci per pack"""
+    for pack, (_, _, _, noun, _) in PACKS.items():
+        pack_dir = root / 'origin/packs/_source' / pack
+        pack_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(entries):
+            entry_id = f"{pack[:6]}{i:010d}"
+            (pack_dir / f"{noun.lower()}-{i:04d}.yml").write_text(
+                f"name: Synthetic {noun} {i:04d}\ntype: {pack}\n_id: {entry_id}\n", encoding='utf-8')
+
+def reset_compendium(root: Path):
+    """Pack del compendio vuoti: tutte le voci originali risultano da tradurre"""
+    compendium_dir = root / 'compendium'
+    compendium_dir.mkdir(parents=True, exist_ok=True)
+    for file_name, shape, label, _, _ in PACKS.values():
+        data = {'label': label, 'entries': [] if shape == 'list' else {}}
+        with open(compendium_dir / file_name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+def check_results(root: Path, site: MockSite, entries: int):
+    """Confronta i nomi salvati con quelli attesi dal sito simulato: (corretti, attesi, errati)"""
+    correct = expected = wrong = 0
+    for pack, (file_name, shape, _, noun, _) in PACKS.items():
+        saved = Compendium(root / 'compendium' / file_name)
+        for i in range(entries):
+            entry_id = f"{pack[:6]}{i:010d}"
+            english_name = f"Synthetic {noun} {i:04d}"
+            italian_name = site.italian_name(api.normalize_to_slug(english_name))
+            # I pack a dizionario usano l'id come chiave solo se già presente, altrimenti il nome
+            key = english_name if shape == 'dict' else entry_id
+            got = saved.get(key, {}).get('name')
+            if italian_name is not None:
+                expected += 1
+            if got is None:
+                continue
+            if got == italian_name:
+                correct += 1
+            else:
+                wrong += 1
+    return correct, expected, wrong
+
+def run_scenario(root: Path, site: MockSite, entries: int, concurrency: int, args, cache_file=None):
+    """Esegue l'intera pipeline e restituisce le metriche dello scenario"""
+    reset_compendium(root)
+    site.reset_counters()
+    configure_engine(concurrency=concurrency, rate=args.rate, retries=args.retries)
+    if cache_file is not None:
+        configure_cache(path=cache_file)
+    else:
+        disable_cache()
+    configure_pattern_stats(path=None)
+    # Il test misura la rete: la memoria dei pack reali potrebbe rispondere con match fuzzy
+    configure_memory(enabled=False)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+        for _, _, _, _, translate in PACKS.values():
+            translate(repo_root=root)
+    elapsed = time.perf_counter() - start
+
+    metrics = get_engine().metrics
+    correct, expected, wrong = check_results(root, site, entries)
+    total_entries = entries * len(PACKS)
+    return {
+        'concurrency': concurrency,
+        'entries': total_entries,
+        'seconds': elapsed,
+        'throughput': total_entries / elapsed if elapsed else 0.0,
+        'requests': metrics.requests,
+        'requests_per_entry': metrics.requests / total_entries,
+        'p50_ms': metrics.percentile(50) * 1000,
+        'p99_ms': metrics.percentile(99) * 1000,
+        'retries': metrics.retries,
+        'correct': correct,
+        'expected': expected,
+        'wrong': wrong,
+        'server_status': dict(sorted(site.status_counts.items())),
+    }
+
+def print_result(label: str, result):
+    print(f"  {label:<16} {result['seconds']:7.2f}s  {result['throughput']:7.1f} voci/s  "
+          f"{result['requests']:5d} req ({result['requests_per_entry']:.2f}/voce)  "
+          f"p50 {result['p50_ms']:6.1f}ms  p99 {result['p99_ms']:6.1f}ms  "
+          f"retry {result['retries']:3d}  corrette {result['correct']}/{result['expected']}"
+          + (f"  ❌ errate {result['wrong']}" if result['wrong'] else ''))
+
+def main():
+    parser = argparse.ArgumentParser(description="Test di carico della traduzione via API su un sito simulato")
+    parser.add_argument('--entries', type=int, default=50, help="voci per pack (default: 50)")
+    parser.add_argument('--concurrency', default='1,4,8', help="livelli di concorrenza (default: 1,4,8)")
+    parser.add_argument('--rate', type=float, default=0, help="richieste al secondo per host (0 = nessun limite)")
+    parser.add_argument('--retries', type=int, default=api.MAX_RETRIES)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--hit-rate', type=float, default=0.8)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--cache', action='store_true', help="usa la cache delle risposte e ripeti a cache calda")
+    parser.add_argument('--json', type=Path, help="salva i risultati in questo file")
+    parser.add_argument('--verbose', action='store_true', help="mostra l'output della pipeline")
+    args = parser.parse_args()
+
+    if not REQUESTS_AVAILABLE:
+        print("❌ Libreria 'requests' non disponibile: installa con pip install requests")
+        sys.exit(1)
+
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    site = MockSite(hit_rate=args.hit_rate, latency=args.latency, jitter=args.jitter,
+                    error_rate=args.error_rate, rate_429=args.rate_429, seed=0)
+    server = start_mock_server(site)
+    api.BASE_URL = server.base_url
+
+    print(f"🧪 Test di carico: {args.entries} voci x {len(PACKS)} pack su {server.base_url}")
+    print(f"   latenza {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms), voci presenti {args.hit_rate:.0%}, "
+          f"503 {args.error_rate:.0%}, 429 {args.rate_429:.0%}\n")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        create_origin(root, args.entries)
+        configure_origin_index(origin_dir=root / 'origin/packs/_source', index_file=None)
+        for concurrency in levels:
+            cache_file = root / f"cache-{concurrency}.sqlite" if args.cache else None
+            result = run_scenario(root, site, args.entries, concurrency, args, cache_file)
+            results.append({'scenario': f"c{concurrency}", **result})
+            print_result(f"concorrenza {concurrency}", result)
+            if args.cache:
+                result = run_scenario(root, site, args.entries, concurrency, args, cache_file)
+                results.append({'scenario': f"c{concurrency}-warm", **result})
+                print_result("  cache calda", result)
+        disable_cache()
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Risultati salvati in {args.json}")
+    if any(result['wrong'] for result in results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
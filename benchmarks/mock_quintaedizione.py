@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Server locale che imita quintaedizione.online per i test di carico senza rete
+
+Risponde sugli stessi endpoint usati da translate_missing_via_api.py:
+- /{endpoint}/{slug}       pagina HTML con <h1> seguito da un corpo lungo
+- /api/{endpoint}/{slug}   JSON con il campo 'name' dopo una descrizione lunga
+- slug con '_'             sempre 404 (come il pattern 'underscore' sul sito reale)
+
+La traduzione di ogni slug è deterministica (vedi MockSite.italian_name), così il test di carico
+può verificare i risultati. Latenza, errori 503 e risposte 429 sono configurabili.
+
+Uso: python benchmarks/mock_quintaedizione.py --port 8765 --latency 0.05 --error-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+ENDPOINTS = {'incantesimi', 'mostri', 'equipaggiamenti', 'classi'}
+
+class MockSite:
+    """Contenuti e comportamento del sito simulato, con contatori thread-safe"""
+
+    def __init__(self, hit_rate: float = 0.8, latency: float = 0.02, jitter: float = 0.01,
+                 error_rate: float = 0.0, rate_429: float = 0.0, retry_after: int = 1,
+                 page_padding: int = 200_000, seed: Optional[int] = None):
+        self.hit_rate = hit_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.page_padding = page_padding
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+
+    def italian_name(self, slug: str) -> Optional[str]:
+        """Traduzione dello slug, None se il sito non ha la pagina (decisione deterministica)"""
+        if zlib.crc32(slug.encode('utf-8')) % 1000 >= self.hit_rate * 1000:
+            return None
+        return 'IT ' + slug.replace('-', ' ').title()
+
+    def html_page(self, name: str) -> bytes:
+        filler = '<p>' + 'Lorem ipsum dolor sit amet. ' * (self.page_padding // 28) + '</p>'
+        return (
+            '<!DOCTYPE html><html><head>'
+            f'<title>{name} - Quinta Edizione</title>'
+            f'<meta property="og:title" content="{name}">'
+            '</head><body><nav>Menu</nav>'
+            f'<h1 class="titolo">{name}</h1>{filler}</body></html>'
+        ).encode('utf-8')
+
+    def json_page(self, name: str) -> bytes:
+        description = 'Lorem ipsum dolor sit amet. ' * (self.page_padding // 28)
+        return json.dumps({'descrizione': description, 'name': name}, ensure_ascii=False).encode('utf-8')
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+    def count(self, status: int):
+        with self.lock:
+            self.requests += 1
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.status_counts = {}
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Gestore delle richieste: il MockSite è in self.server.site"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status: int, body: bytes = b'', content_type: str = 'text/plain', headers: Optional[Dict] = None):
+        self.server.site.count(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Il client ha chiuso appena letto il titolo
+            self.close_connection = True
+
+    def do_GET(self):
+        site: MockSite = self.server.site
+        delay = site.latency + site.jitter * site.roll()
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = site.roll()
+        if roll < site.rate_429:
+            self.send(429, headers={'Retry-After': str(site.retry_after)})
+            return
+        if roll < site.rate_429 + site.error_rate:
+            self.send(503)
+            return
+
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        is_api = len(parts) == 3 and parts[0] == 'api'
+        if is_api:
+            parts = parts[1:]
+        if len(parts) != 2 or parts[0] not in ENDPOINTS or '_' in parts[1]:
+            self.send(404)
+            return
+        name = site.italian_name(parts[1])
+        if name is None:
+            self.send(404)
+            return
+
+        etag = '"%08x"' % zlib.crc32(f"{self.path}|{name}".encode('utf-8'))
+        if self.headers.get('If-None-Match') == etag:
+            self.send(304, headers={'ETag': etag})
+            return
+        if is_api:
+            self.send(200, site.json_page(name), 'application/json; charset=utf-8', {'ETag': etag})
+        else:
+            self.send(200, site.html_page(name), 'text/html; charset=utf-8', {'ETag': etag})
+
+def start_mock_server(site: Optional[MockSite] = None, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Avvia il server in un thread in background; l'indirizzo è in server.base_url"""
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.site = site or MockSite()
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Server locale che imita quintaedizione.online")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.02, help="latenza base in secondi")
+    parser.add_argument('--jitter', type=float, default=0.01, help="latenza casuale aggiuntiva massima")
+    parser.add_argument('--hit-rate', type=float, default=0.8, help="frazione di voci presenti sul sito")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="frazione di risposte 503")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="frazione di risposte 429")
+    args = parser.parse_args()
+
+    site = MockSite(hit_rate=args.hit_rate, latency=args.latency, jitter=args.jitter,
+                    error_rate=args.error_rate, rate_429=args.rate_429)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), MockHandler)
+    server.daemon_threads = True
+    server.site = site
+    print(f"🌐 Sito simulato su http://127.0.0.1:{args.port} (Ctrl-C per terminare)")
+    print(f"   Prova: python translate_missing_via_api.py --base-url http://127.0.0.1:{args.port} --no-cache")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 Richieste servite: {site.requests} {dict(sorted(site.status_counts.items()))}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Generatori di dati sintetici per i benchmark, scalabili rispetto alle dimensioni attuali
+
+Scala 1 corrisponde al contenuto attuale del repository:
+- rules JSON: 15 capitoli e 101 pagine (~300 KB, come compendium/dnd5e.rules.json)
+- YAML originali delle regole: i 16 capitoli di FILE_TO_CHAPTER con 7 pagine ciascuno
+- testo tipo SRD: solo le sezioni delle 101 pagine delle regole (~100 KB; titolo su riga propria,
+  sottotitoli e paragrafi a colonna), non l'intero PDF: indice e ricerca crescono con le sezioni
+
+I dati dipendono solo da scala e seed, così i run sono confrontabili tra loro.
+"""
+
+import json
+import random
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_rules_yaml import write_synthetic_chapters  # noqa: E402
+
+BASE_CHAPTERS = 15
+BASE_PAGES = 101
+BASE_YAML_PAGES_PER_CHAPTER = 7
+PAGE_TEXT_CHARS = 2900  # Media di dnd5e.rules.json
+
+ITALIAN_WORDS = ("la creatura effettua un tiro salvezza contro la CD del tuo incantesimo e subisce danni se "
+                 "fallisce oppure la metà se supera non puoi usare di nuovo questo privilegio finché non "
+                 "completi un riposo lungo azione bonus reazione più già può però città perché").split()
+TITLE_WORDS = ("Combattimento Movimento Azione Incantesimo Riposo Armatura Arma Oggetto Viaggio Ambiente "
+               "Veleno Malattia Trappola Copertura Visione Luce Salto Nuoto Caduta Fame Sete Magia "
+               "Bonus Competenza Vantaggio Attacco Danno Cura Condizione Esaurimento").split()
+ENGLISH_WORDS = ("Combat Movement Action Spell Rest Armor Weapon Object Travel Environment Poison "
+                 "Disease Trap Cover Vision Light Jumping Swimming Falling Food Water Magic Bonus "
+                 "Proficiency Advantage Attack Damage Healing Condition Exhaustion").split()
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(ITALIAN_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+def page_names(scale: int, seed: int = 0) -> List[str]:
+    """Nomi inglesi unici delle pagine (BASE_PAGES * scale)"""
+    rng = random.Random(seed)
+    names = []
+    for index in range(BASE_PAGES * scale):
+        words = ' '.join(rng.choice(ENGLISH_WORDS) for _ in range(rng.randint(1, 3)))
+        names.append(f"{words} {index}")
+    return names
+
+def italian_titles(scale: int, seed: int = 0) -> List[str]:
+    """Titoli italiani unici, uno per pagina, senza numeri (come nel PDF)"""
+    rng = random.Random(seed)
+    titles = []
+    seen = set()
+    suffixes = ["", " e " + rng.choice(TITLE_WORDS), " di " + rng.choice(TITLE_WORDS)]
+    while len(titles) < BASE_PAGES * scale:
+        words = [rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 4))]
+        title = ' '.join([words[0]] + [word.lower() for word in words[1:]]) + rng.choice(suffixes)
+        if title not in seen:
+            seen.add(title)
+            titles.append(title)
+    return titles
+
+def rules_entries(scale: int, seed: int = 0) -> OrderedDict:
+    """'entries' nel formato di dnd5e.rules.json: capitoli con pagine tradotte"""
+    rng = random.Random(seed)
+    names = page_names(scale, seed)
+    titles = italian_titles(scale, seed)
+    chapters = BASE_CHAPTERS * scale
+    entries = OrderedDict()
+    for chapter in range(chapters):
+        pages = OrderedDict()
+        for index in range(chapter, len(names), chapters):
+            text = ''
+            while len(text) < PAGE_TEXT_CHARS:
+                text += f"<p>{_sentence(rng, rng.randint(12, 40))}</p>"
+            pages[names[index]] = OrderedDict([('name', titles[index]), ('text', text)])
+        entries[f"Chapter {chapter}: {rng.choice(ENGLISH_WORDS)}"] = OrderedDict(
+            [('name', f"Capitolo {chapter}: {rng.choice(TITLE_WORDS)}"), ('pages', pages)])
+    return entries
+
+def write_rules_json(path: Path, scale: int, seed: int = 0):
+    """Scrive un file rules sintetico con la stessa formattazione (indent=2) di quello reale"""
+    data = {'label': 'Regole (SRD)', 'entries': rules_entries(scale, seed)}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def write_origin_rules(target: Path, scale: int):
+    """Scrive i YAML originali delle regole (tutti i file di FILE_TO_CHAPTER)"""
+    target.mkdir(parents=True, exist_ok=True)
+    write_synthetic_chapters(target, BASE_YAML_PAGES_PER_CHAPTER * scale)
+
+def srd_text(scale: int, seed: int = 0) -> str:
+    """
+    Testo simile a quello estratto dal PDF SRD: per ogni titolo di italian_titles una riga di
+    titolo, qualche sottotitolo e paragrafi spezzati a colonna come nell'estrazione da PDF
+    """
+    rng = random.Random(seed)
+    lines = ["Indice", ""]
+    titles = italian_titles(scale, seed)
+    for title in titles[:50]:
+        lines.append(f"{title} . . . . {rng.randint(1, 360)}")
+    lines.append("")
+    for title in titles:
+        lines.extend([title, ""])
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.6:
+                lines.extend([rng.choice(TITLE_WORDS) + ' ' + rng.choice(TITLE_WORDS), ""])
+            paragraph = ' '.join(_sentence(rng, rng.randint(10, 30)) for _ in range(rng.randint(2, 6)))
+            while paragraph:
+                cut = paragraph.rfind(' ', 0, 90)
+                cut = len(paragraph) if cut == -1 or len(paragraph) <= 90 else cut
+                lines.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            lines.append("")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Modello dati comune per i file del compendio
+
+Compendium gestisce allo stesso modo i pack con 'entries' a lista (spells24, monsterfeatures,
+actors24, ...) e quelli a dizionario (classes24, equipment24, rules, ...): mantiene un indice
+chiave -> voce per ricerche e upsert in O(1) e al salvataggio riscrive il file nella sua forma
+originale, serializzando solo le voci modificate o nuove (vedi compendium_io.upsert_entries).
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from compendium_io import iter_entries, upsert_entries
+
+# Stato delle voci
+CLEAN = 0
+DIRTY = 1
+NEW = 2
+
+class Entry:
+    """Voce del compendio: chiave (id nella forma lista), dati e stato di modifica"""
+    __slots__ = ('key', 'data', 'state')
+
+    def __init__(self, key: Any, data: Dict[str, Any], state: int = CLEAN):
+        self.key = key
+        self.data = data
+        self.state = state
+
+class Compendium:
+    """File del compendio caricato in memoria con indice chiave -> voce"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header: Dict[str, Any] = {}
+        self._entries: Dict[Any, Entry] = {}
+        self.unkeyed = 0  # voci della forma lista senza 'id' (non indicizzabili)
+        for key, data in iter_entries(self.path, header=self.header):
+            if key is None:
+                self.unkeyed += 1
+                continue
+            # Con id duplicati vale la prima voce, come nella vecchia ricerca lineare
+            if key not in self._entries:
+                self._entries[key] = Entry(key, data)
+        self.shape: Optional[str] = self.header.pop('_shape', None)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, key: Any) -> Dict[str, Any]:
+        return self._entries[key].data
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._entries)
+
+    def keys(self):
+        return self._entries.keys()
+
+    def items(self) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        for key, entry in self._entries.items():
+            yield key, entry.data
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        return entry.data if entry is not None else default
+
+    def upsert(self, key: Any, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggiorna i campi della voce con questa chiave, o la crea se non esiste"""
+        entry = self._entries.get(key)
+        if entry is None:
+            data = {'id': key, **fields} if self.shape == 'list' else dict(fields)
+            entry = Entry(key, data, NEW)
+            self._entries[key] = entry
+        else:
+            if isinstance(entry.data, dict):
+                entry.data.update(fields)
+            else:
+                # Voce nella forma breve di Babele (solo il nome tradotto come stringa): diventa
+                # un dizionario, conservando il nome se fields non lo sostituisce
+                data = {'name': entry.data} if isinstance(entry.data, str) else {}
+                data.update(fields)
+                entry.data = data
+            if entry.state == CLEAN:
+                entry.state = DIRTY
+        return entry.data
+
+    def mark_dirty(self, key: Any):
+        """Segnala che i dati di una voce sono stati modificati direttamente"""
+        entry = self._entries[key]
+        if entry.state == CLEAN:
+            entry.state = DIRTY
+
+    @property
+    def modified(self) -> int:
+        """Numero di voci modificate o nuove non ancora salvate"""
+        return sum(1 for entry in self._entries.values() if entry.state != CLEAN)
+
+    def save(self) -> int:
+        """
+        Salva su disco le voci modificate o nuove, nella forma originale del file
+
+        Returns:
+            Numero di voci scritte (0 se non c'era nulla da salvare: il file non viene toccato)
+        """
+        changed = {key: entry.data for key, entry in self._entries.items() if entry.state != CLEAN}
+        if not changed:
+            return 0
+        upsert_entries(self.path, changed, replace=True)
+        for entry in self._entries.values():
+            entry.state = CLEAN
+        return len(changed)
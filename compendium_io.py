@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Lettura e scrittura a flusso dei file del compendio (compendium/*.json)
+
+- compendium_files(): i pack del compendio, esclusi i file di servizio
+- iter_entries(): scorre le voci di 'entries' (forma lista o dizionario) una alla volta,
+  senza caricare l'intero file in memoria
+- upsert_entries(): riscrive il file copiando così com'è il testo delle voci non toccate e
+  serializzando solo quelle modificate o nuove; la scrittura avviene su un file temporaneo
+  che sostituisce l'originale in modo atomico (un crash non lascia mai un pack corrotto)
+"""
+
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+COMPENDIUM_DIR = Path(__file__).parent / 'compendium'
+# Mappa delle cartelle dei compendi (file di servizio, non un pack)
+PACKS_FOLDERS_FILE = 'dnd5e._packs-folders.json'
+# Id generati da Foundry: 16 caratteri alfanumerici (le altre chiavi dei pack sono nomi inglesi)
+FOUNDRY_ID = re.compile(r'^[A-Za-z0-9]{16}$')
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\r\n'
+_DECODER = json.JSONDecoder()
+
+def compendium_files(compendium_dir: Path = COMPENDIUM_DIR, packs: Optional[Sequence[str]] = None) -> Dict[str, Path]:
+    """{pack: file} dei pack dnd5e.<pack>.json (esclusi i file di servizio come REVIEW e _packs-folders)"""
+    files = {}
+    for path in sorted(compendium_dir.glob('dnd5e.*.json')):
+        if path.name.count('.') != 2 or path.name.startswith('dnd5e._'):
+            continue
+        pack = path.name.split('.')[1]
+        if packs is None or pack in packs:
+            files[pack] = path
+    return files
+
+class JsonStreamReader:
+    """
+    Lettore JSON incrementale su una sequenza di blocchi di testo
+
+    Decodifica un valore alla volta con JSONDecoder.raw_decode, leggendo altri blocchi solo
+    quando servono. Il testo consumato può essere inoltrato a un sink (per la copia verbatim).
+    """
+
+    def __init__(self, chunks: Iterable[str], sink: Optional[Callable[[str], Any]] = None):
+        self._chunks = iter(chunks)
+        self.sink = sink
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        """Legge il blocco successivo nel buffer; False a fine flusso"""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if not chunk:
+            self.eof = True
+            return False
+        # Scarta il testo già consumato
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def _advance(self, new_pos: int, emit: bool):
+        if emit and self.sink is not None and new_pos > self.pos:
+            self.sink(self.buf[self.pos:new_pos])
+        self.pos = new_pos
+
+    def skip_ws(self, emit: bool = True) -> str:
+        """Salta gli spazi bianchi e li restituisce"""
+        skipped = []
+        while True:
+            start = self.pos
+            end = start
+            while end < len(self.buf) and self.buf[end] in _WHITESPACE:
+                end += 1
+            skipped.append(self.buf[start:end])
+            self._advance(end, emit)
+            if end < len(self.buf) or not self._more():
+                return ''.join(skipped)
+
+    def peek(self, emit: bool = True) -> str:
+        """Primo carattere significativo successivo ('' a fine flusso)"""
+        self.skip_ws(emit)
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def take(self, char: str, emit: bool = True):
+        """Consuma il carattere atteso"""
+        if self.peek(emit) != char:
+            found = self.buf[self.pos:self.pos + 20]
+            raise ValueError(f"JSON non valido: atteso {char!r}, trovato {found!r}")
+        self._advance(self.pos + 1, emit)
+
+    def read_value(self, emit: bool = True) -> Tuple[Any, str]:
+        """Decodifica il valore successivo, restituendo (valore, testo originale)"""
+        self.skip_ws(emit)
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # Un numero a fine buffer potrebbe continuare nel blocco successivo
+            if end == len(self.buf) and self._more():
+                continue
+            raw = self.buf[self.pos:end]
+            self._advance(end, emit)
+            return value, raw
+
+def iter_object_keys(reader: JsonStreamReader, emit: bool = True) -> Iterator[str]:
+    """Itera le chiavi di un oggetto: dopo ogni chiave il chiamante deve leggerne il valore"""
+    reader.take('{', emit)
+    if reader.peek(emit) == '}':
+        reader.take('}', emit)
+        return
+    while True:
+        key, _ = reader.read_value(emit)
+        reader.take(':', emit)
+        yield key
+        if reader.peek(emit) == ',':
+            reader.take(',', emit)
+            continue
+        reader.take('}', emit)
+        return
+
+def _file_chunks(f) -> Iterator[str]:
+    return iter(lambda: f.read(CHUNK_SIZE), '')
+
+def _entry_key(key, value):
+    """Chiave di una voce: la chiave del dizionario o il campo 'id' nella forma lista"""
+    if key is not None:
+        return key
+    return value.get('id') if isinstance(value, dict) else None
+
+def iter_entries(path: Path, header: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    Itera le voci di un file del compendio senza caricarlo tutto
+
+    Args:
+        path: file del compendio
+        header: se indicato, viene riempito con i campi di primo livello diversi da 'entries'
+            (anche quelli che lo seguono, letti dopo l'ultima voce) e con '_shape' ('list' o
+            'dict'), come read_header()
+
+    Returns:
+        Iteratore di coppie (chiave, voce): per la forma dizionario la chiave è quella del
+        dizionario, per la forma lista è il campo 'id' della voce (None se manca)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = JsonStreamReader(_file_chunks(f))
+        for key in iter_object_keys(reader, emit=False):
+            if key != 'entries':
+                value, _ = reader.read_value(emit=False)
+                if header is not None:
+                    header[key] = value
+                continue
+            opener = reader.peek(emit=False)
+            if header is not None:
+                header['_shape'] = 'list' if opener == '[' else 'dict'
+            if opener == '[':
+                reader.take('[', emit=False)
+                if reader.peek(emit=False) != ']':
+                    while True:
+                        value, _ = reader.read_value(emit=False)
+                        yield _entry_key(None, value), value
+                        if reader.peek(emit=False) != ',':
+                            break
+                        reader.take(',', emit=False)
+                reader.take(']', emit=False)
+            elif opener == '{':
+                for entry_key in iter_object_keys(reader, emit=False):
+                    value, _ = reader.read_value(emit=False)
+                    yield entry_key, value
+            else:
+                reader.read_value(emit=False)
+            if header is None:
+                # Senza intestazione da riempire il resto del file non serve
+                return
+
+def read_header(path: Path) -> Dict[str, Any]:
+    """
+    Legge i campi di primo livello diversi da 'entries' (label, folders, mapping, ...)
+
+    Le voci vengono scorse una alla volta e scartate. Il campo '_shape' indica la forma di
+    'entries': 'list', 'dict' o None se assente.
+    """
+    header = {'_shape': None}
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = JsonStreamReader(_file_chunks(f))
+        for key in iter_object_keys(reader, emit=False):
+            if key != 'entries':
+                header[key], _ = reader.read_value(emit=False)
+                continue
+            opener = reader.peek(emit=False)
+            header['_shape'] = 'list' if opener == '[' else 'dict'
+            # Scarta le voci senza tenerle in memoria
+            if opener == '[':
+                reader.take('[', emit=False)
+                while reader.peek(emit=False) != ']':
+                    reader.read_value(emit=False)
+                    if reader.peek(emit=False) == ',':
+                        reader.take(',', emit=False)
+                reader.take(']', emit=False)
+            else:
+                for _ in iter_object_keys(reader, emit=False):
+                    reader.read_value(emit=False)
+    return header
+
+def _indent_unit(indent: str) -> str:
+    """Unità di indentazione dedotta dall'indentazione delle voci (profondità 2)"""
+    if indent and set(indent) == {'\t'}:
+        return '\t'
+    if indent and set(indent) == {' '} and len(indent) % 2 == 0:
+        return ' ' * (len(indent) // 2)
+    return '  '
+
+def _dump(value: Any, indent: str, unit: str) -> str:
+    """Serializza un valore allineandolo all'indentazione della voce"""
+    return json.dumps(value, ensure_ascii=False, indent=unit).replace('\n', '\n' + indent)
+
+def _merge(entry: Any, patch: Dict[str, Any]) -> Any:
+    if isinstance(entry, dict):
+        merged = dict(entry)
+        merged.update(patch)
+        return merged
+    return dict(patch)
+
+def atomic_write_text(path: Path, text: str):
+    """Scrive un file di testo in modo atomico (file temporaneo + os.replace)"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+def atomic_write_json(path: Path, data: Any, indent: int = 2):
+    """Serializza data come JSON e lo scrive in modo atomico"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent))
+
+def upsert_entries(path: Path, patches: Dict[Any, Dict[str, Any]], replace: bool = False) -> Tuple[int, int]:
+    """
+    Aggiorna o aggiunge voci in un file del compendio, riscrivendo solo quelle toccate
+
+    Args:
+        path: file del compendio
+        patches: {chiave: campi} - i campi vengono uniti alla voce esistente con quella chiave
+            (chiave del dizionario o campo 'id' nella forma lista); le chiavi non presenti
+            vengono aggiunte in fondo ({'id': chiave, **campi} nella forma lista)
+        replace: se True i campi sostituiscono completamente la voce esistente
+
+    Returns:
+        (voci aggiornate, voci aggiunte)
+    """
+    path = Path(path)
+    if not patches:
+        return 0, 0
+    pending = dict(patches)
+    updated = 0
+    found_entries = False
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with open(path, 'r', encoding='utf-8') as src, os.fdopen(fd, 'w', encoding='utf-8') as out:
+            reader = JsonStreamReader(_file_chunks(src), sink=out.write)
+            for key in iter_object_keys(reader):
+                if key != 'entries':
+                    reader.read_value()
+                    continue
+                found_entries = True
+                opener = reader.peek()
+                reader.take(opener)
+                closer = ']' if opener == '[' else '}'
+                indent = None
+                count = 0
+                while True:
+                    # Gli spazi prima della chiusura si scrivono dopo le eventuali nuove voci
+                    whitespace = reader.skip_ws(emit=False)
+                    if reader.peek(emit=False) == closer:
+                        break
+                    out.write(whitespace)
+                    if count:
+                        reader.take(',')
+                        whitespace = reader.skip_ws()
+                    if '\n' in whitespace:
+                        indent = whitespace.rsplit('\n', 1)[1]
+                    if opener == '{':
+                        entry_key, _ = reader.read_value()
+                        reader.take(':')
+                        reader.skip_ws()
+                        value, raw = reader.read_value(emit=False)
+                    else:
+                        value, raw = reader.read_value(emit=False)
+                        entry_key = _entry_key(None, value)
+                    count += 1
+                    patch = pending.pop(entry_key, None) if entry_key is not None else None
+                    if patch is None:
+                        out.write(raw)
+                    else:
+                        new_value = dict(patch) if replace else _merge(value, patch)
+                        out.write(_dump(new_value, indent or '', _indent_unit(indent or '')))
+                        updated += 1
+                # Nuove voci in fondo, prima della parentesi di chiusura
+                added = len(pending)
+                if pending:
+                    if indent is None:
+                        indent = '  ' * 2
+                    unit = _indent_unit(indent)
+                    for entry_key, patch in pending.items():
+                        if count:
+                            out.write(',')
+                        out.write('\n' + indent)
+                        if opener == '{':
+                            out.write(json.dumps(entry_key, ensure_ascii=False) + ': ')
+                            out.write(_dump(dict(patch), indent, unit))
+                        else:
+                            new_value = dict(patch) if replace and 'id' in patch else {'id': entry_key, **patch}
+                            out.write(_dump(new_value, indent, unit))
+                        count += 1
+                    if '\n' not in whitespace:
+                        whitespace = '\n' + indent[:-len(unit)]
+                out.write(whitespace)
+                reader.take(closer)
+            # Copia il resto del file (parentesi finale, newline)
+            reader.skip_ws()
+        if not found_entries:
+            raise ValueError(f"{path}: campo 'entries' non trovato")
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return updated, added
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Report di copertura e qualità delle traduzioni di tutti i pack registrati in Babele (main.js)
+
+Per ogni pack:
+- voci, voci mancanti rispetto a origin/packs/_source (se presente)
+- copertura per campo (name, description, text): quota di testi ancora in inglese secondo
+  language_detect, classificando i testi di tutti i pack in una sola passata
+- nomi non tradotti (uguali alla chiave inglese)
+- problemi sospetti trovati raggruppando per hash: stesso nome italiano per voci inglesi
+  diverse ("Scudo" x3 in spells24), stessa descrizione per voci diverse
+
+I pack vengono letti in parallelo. Il report viene scritto in JSON e HTML; se esiste il report
+precedente viene confrontato (copertura per pack, problemi nuovi e risolti), così da poter usare
+lo script come controllo prima di ogni release (--fail-under, --fail-on-regression).
+
+Uso:
+    python coverage_report.py                          # .cache/reports/coverage.json e .html
+    python coverage_report.py --fail-under 90 --fail-on-regression
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from compendium_io import FOUNDRY_ID, atomic_write_json, atomic_write_text, iter_entries
+from language_detect import TEXT_FIELDS, get_detector, iter_text_fields
+from origin_index import ORIGIN_PACKS_DIR, get_origin_index
+from translation_memory import normalize_term
+from upstream_sync import COMPENDIUM_DIR, MAIN_JS, read_babele_packs
+
+REPO_ROOT = Path(__file__).parent
+REPORT_DIR = REPO_ROOT / '.cache' / 'reports'
+DEFAULT_JSON = REPORT_DIR / 'coverage.json'
+REPORT_VERSION = 1
+# Testi più corti non vengono raggruppati come descrizioni duplicate
+MIN_DUPLICATE_TEXT = 80
+# Problemi elencati per tipo nel riepilogo a terminale e nel diff
+SHOWN_ISSUES = 10
+
+def text_hash(text: str) -> str:
+    """Hash del testo normalizzato (maiuscole, punteggiatura e spazi ignorati)"""
+    return hashlib.blake2b(normalize_term(text).encode('utf-8'), digest_size=12).hexdigest()
+
+def load_pack(json_file: Path) -> List[Tuple[str, Dict]]:
+    """Voci (chiave, voce) di un file del compendio"""
+    return [(str(key), entry) for key, entry in iter_entries(json_file) if isinstance(entry, dict)]
+
+def _english_key(key: str) -> Optional[str]:
+    """La chiave è il nome inglese, tranne per gli id generati da Foundry"""
+    return None if FOUNDRY_ID.match(key) else key
+
+def _missing_from_origin(pack: str, entries: List[Tuple[str, Dict]], origin: Dict) -> int:
+    keys = {key for key, _ in entries}
+    return sum(1 for entry_id, (name, _, _) in origin.get(pack, {}).items()
+               if entry_id not in keys and name not in keys)
+
+def _name_source(path: str) -> str:
+    """Nome inglese di un campo name annidato: la chiave che lo contiene (es. la pagina delle regole)"""
+    return path.rsplit('/', 1)[0].rsplit('/', 1)[-1]
+
+def analyze_pack(pack: str, entries: List[Tuple[str, Dict]], languages: Dict[Tuple[str, str], str],
+                 origin_names: Optional[Dict[str, str]] = None) -> Tuple[Dict, List[Dict]]:
+    """Statistiche per campo e problemi di un pack, date le lingue dei suoi testi"""
+    fields: Dict[str, Counter] = defaultdict(Counter)
+    issues = []
+    names = defaultdict(list)
+    texts = defaultdict(list)
+    origin_names = origin_names or {}
+    # Nei pack con soli id Foundry (spells24, actors24) ogni id è una voce inglese distinta
+    ids_only = all(FOUNDRY_ID.match(key) for key, _ in entries)
+    for key, entry in entries:
+        english = origin_names.get(key) or _english_key(key)
+        for path, field, text in iter_text_fields(entry, key):
+            counts = fields[field]
+            counts['total'] += 1
+            if not text.strip():
+                counts['empty'] += 1
+                continue
+            language = languages.get((pack, path), '?')
+            if field == 'name' and path == f"{key}/name" and english and normalize_term(text) == normalize_term(english):
+                # Nome identico alla chiave inglese: non tradotto, qualunque sia la lingua riconosciuta
+                language = 'en'
+            counts[language] += 1
+            if language == 'en':
+                kind = 'untranslated_name' if field == 'name' else 'english_text'
+                issues.append({'type': kind, 'pack': pack, 'key': key, 'path': path, 'value': text[:120]})
+            if field == 'name':
+                if path == f"{key}/name":
+                    source = english or (key if ids_only else None)
+                else:
+                    source = _english_key(_name_source(path))
+                if source:
+                    names[text_hash(text)].append((normalize_term(source), path, text))
+            elif len(text) >= MIN_DUPLICATE_TEXT:
+                texts[text_hash(text)].append((key, path, text))
+        if not isinstance(entry.get('name'), str) or not entry['name'].strip():
+            issues.append({'type': 'empty_name', 'pack': pack, 'key': key, 'path': f"{key}/name", 'value': ''})
+
+    # Stesso nome italiano per nomi inglesi diversi (la stessa voce ripetuta con id e nome non conta)
+    for group in names.values():
+        if len({source for source, _, _ in group}) > 1:
+            paths = sorted({path for _, path, _ in group})
+            issues.append({'type': 'duplicate_name', 'pack': pack, 'key': paths[0].rsplit('/', 1)[0],
+                           'path': ', '.join(paths), 'value': group[0][2]})
+    for group in texts.values():
+        keys = sorted({key for key, _, _ in group})
+        if len(keys) > 1:
+            issues.append({'type': 'duplicate_text', 'pack': pack, 'key': keys[0],
+                           'path': ', '.join(path for _, path, _ in group), 'value': group[0][2][:120]})
+
+    field_stats = {}
+    for field, counts in sorted(fields.items()):
+        filled = counts['total'] - counts['empty']
+        field_stats[field] = {
+            'total': counts['total'], 'it': counts['it'], 'en': counts['en'], 'unknown': counts['?'],
+            'empty': counts['empty'],
+            'coverage': round(100 * (filled - counts['en']) / filled, 2) if filled else 100.0,
+        }
+    stats = {
+        'entries': len(entries),
+        'fields': field_stats,
+        'issues': dict(Counter(issue['type'] for issue in issues)),
+    }
+    return stats, issues
+
+def names_coverage(pack_stats: Dict[str, Dict]) -> float:
+    """Percentuale complessiva dei nomi non più in inglese"""
+    total = sum(stats['fields'].get('name', {}).get('total', 0) for stats in pack_stats.values())
+    english = sum(stats['fields'].get('name', {}).get('en', 0) for stats in pack_stats.values())
+    return round(100 * (total - english) / total, 2) if total else 100.0
+
+def build_report(packs: Optional[Sequence[str]] = None, compendium_dir: Path = COMPENDIUM_DIR,
+                 main_js: Path = MAIN_JS) -> Dict:
+    """Report di tutti i pack registrati (o solo di quelli indicati)"""
+    start = time.perf_counter()
+    registered = read_babele_packs(main_js)
+    selected = {pack: compendium_dir / file_name for pack, file_name in registered.items()
+                if (packs is None or pack in packs) and (compendium_dir / file_name).exists()}
+    with ThreadPoolExecutor(max_workers=min(8, len(selected) or 1)) as executor:
+        loaded = dict(zip(selected, executor.map(load_pack, selected.values())))
+    loaded_at = time.perf_counter()
+
+    # Tutti i testi di tutti i pack in una sola classificazione
+    locations = [(pack, path) for pack, entries in loaded.items()
+                 for key, entry in entries for path, _, _ in iter_text_fields(entry, key, TEXT_FIELDS)]
+    values = [text for entries in loaded.values()
+              for key, entry in entries for _, _, text in iter_text_fields(entry, key, TEXT_FIELDS)]
+    languages = dict(zip(locations, get_detector().classify(values)))
+    classified_at = time.perf_counter()
+
+    origin = get_origin_index() if ORIGIN_PACKS_DIR.exists() else {}
+    pack_stats = {}
+    issues = []
+    for pack, entries in loaded.items():
+        origin_names = {entry_id: name for entry_id, (name, _, _) in origin.get(pack, {}).items()}
+        stats, pack_issues = analyze_pack(pack, entries, languages, origin_names)
+        stats['file'] = selected[pack].name
+        stats['missing'] = _missing_from_origin(pack, entries, origin) if origin else None
+        name_stats = stats['fields'].get('name')
+        stats['coverage'] = name_stats['coverage'] if name_stats else 100.0
+        pack_stats[pack] = stats
+        issues.extend(pack_issues)
+
+    return {
+        'version': REPORT_VERSION,
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'origin': bool(origin),
+        'coverage': names_coverage(pack_stats),
+        'packs': pack_stats,
+        'issues': issues,
+        'timings_ms': {
+            'load': round((loaded_at - start) * 1000, 1),
+            'classify': round((classified_at - loaded_at) * 1000, 1),
+            'total': round((time.perf_counter() - start) * 1000, 1),
+        },
+    }
+
+def issue_id(issue: Dict) -> str:
+    return f"{issue['type']}:{issue['pack']}:{issue['path']}"
+
+def diff_reports(current: Dict, previous: Optional[Dict]) -> Optional[Dict]:
+    """Differenze rispetto al report precedente: copertura per pack, problemi nuovi e risolti"""
+    if not previous or previous.get('version') != REPORT_VERSION:
+        return None
+    coverage = {}
+    for pack, stats in current['packs'].items():
+        before = previous['packs'].get(pack, {}).get('coverage')
+        if before is not None and before != stats['coverage']:
+            coverage[pack] = {'before': before, 'after': stats['coverage'],
+                              'delta': round(stats['coverage'] - before, 2)}
+    # Solo i pack presenti in entrambi i report
+    common = set(current['packs']) & set(previous['packs'])
+    old_issues = [issue for issue in previous.get('issues', []) if issue['pack'] in common]
+    new_issues = [issue for issue in current['issues'] if issue['pack'] in common]
+    old_ids = {issue_id(issue) for issue in old_issues}
+    new_ids = {issue_id(issue) for issue in new_issues}
+    return {
+        'previous': previous.get('generated'),
+        'coverage_before': names_coverage({pack: previous['packs'][pack] for pack in common}),
+        'coverage_after': names_coverage({pack: current['packs'][pack] for pack in common}),
+        'packs': coverage,
+        'new_issues': [issue for issue in new_issues if issue_id(issue) not in old_ids],
+        'resolved_issues': [issue for issue in old_issues if issue_id(issue) not in new_ids],
+    }
+
+def _bar(percent: float) -> str:
+    color = '#2e7d32' if percent >= 95 else '#f9a825' if percent >= 80 else '#c62828'
+    return (f'<div class="bar"><div style="width:{percent:.1f}%;background:{color}"></div></div>'
+            f'<span>{percent:.1f}%</span>')
+
+def render_html(report: Dict) -> str:
+    """Pagina HTML autonoma con tabella dei pack, differenze e problemi"""
+    escape = html.escape
+    rows = []
+    for pack, stats in sorted(report['packs'].items(), key=lambda item: item[1]['coverage']):
+        fields = ' '.join(f"{field}: {data['coverage']:.1f}% ({data['en']} en)"
+                          for field, data in stats['fields'].items())
+        issues = ', '.join(f"{kind} {count}" for kind, count in sorted(stats['issues'].items()))
+        missing = '' if stats['missing'] is None else stats['missing']
+        rows.append(f"<tr><td>{escape(pack)}</td><td>{stats['entries']}</td><td>{missing}</td>"
+                    f"<td>{_bar(stats['coverage'])}</td><td>{escape(fields)}</td><td>{escape(issues)}</td></tr>")
+    diff = report.get('diff')
+    diff_html = '<p>Nessun report precedente da confrontare.</p>'
+    if diff:
+        changes = ''.join(f"<li>{escape(pack)}: {data['before']:.1f}% → {data['after']:.1f}% "
+                          f"({data['delta']:+.1f})</li>" for pack, data in diff['packs'].items())
+        diff_html = (f"<p>Rispetto al report del {escape(diff['previous'] or '?')}: copertura "
+                     f"{diff['coverage_before']}% → {diff['coverage_after']}%, "
+                     f"{len(diff['new_issues'])} problemi nuovi, {len(diff['resolved_issues'])} risolti.</p>"
+                     f"<ul>{changes}</ul>")
+    by_type = defaultdict(list)
+    for issue in report['issues']:
+        by_type[issue['type']].append(issue)
+    sections = []
+    for kind, items in sorted(by_type.items()):
+        lines = ''.join(f"<tr><td>{escape(issue['pack'])}</td><td>{escape(issue['path'])}</td>"
+                        f"<td>{escape(issue['value'])}</td></tr>" for issue in items)
+        sections.append(f"<details><summary>{escape(kind)} ({len(items)})</summary>"
+                        f"<table><tr><th>Pack</th><th>Posizione</th><th>Valore</th></tr>{lines}</table></details>")
+    return f"""<!DOCTYPE html>
+<html lang="it">
+<head>
+<meta charset="utf-8">
+<title>Copertura traduzioni - {escape(report['generated'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; vertical-align: top; }}
+.bar {{ display: inline-block; width: 120px; height: 10px; background: #eee; margin-right: 6px; }}
+.bar div {{ height: 100%; }}
+</style>
+</head>
+<body>
+<h1>Copertura delle traduzioni</h1>
+<p>Generato il {escape(report['generated'])} in {report['timings_ms']['total']:.0f} ms:
+copertura dei nomi {report['coverage']:.1f}%.</p>
+<table>
+<tr><th>Pack</th><th>Voci</th><th>Mancanti</th><th>Nomi tradotti</th><th>Campi</th><th>Problemi</th></tr>
+{''.join(rows)}
+</table>
+<h2>Differenze</h2>
+{diff_html}
+<h2>Problemi</h2>
+{''.join(sections)}
+</body>
+</html>
+"""
+
+def _load_previous(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Report precedente non leggibile ({e}): nessun confronto")
+        return None
+
+def print_summary(report: Dict):
+    print(f"{'Pack':16} {'Voci':>6} {'Nomi':>7}  Problemi")
+    for pack, stats in sorted(report['packs'].items(), key=lambda item: item[1]['coverage']):
+        flag = '✅' if stats['coverage'] >= 100 else '⚠️ '
+        issues = ', '.join(f"{kind} {count}" for kind, count in sorted(stats['issues'].items()))
+        print(f"{flag} {pack:14} {stats['entries']:6} {stats['coverage']:6.1f}%  {issues}")
+    diff = report.get('diff')
+    if diff:
+        print(f"\n🔀 Rispetto al {diff['previous']}: copertura {diff['coverage_before']}% → {diff['coverage_after']}%")
+        for pack, data in diff['packs'].items():
+            print(f"   {pack}: {data['before']:.1f}% → {data['after']:.1f}% ({data['delta']:+.1f})")
+        for label, key in (('nuovi', 'new_issues'), ('risolti', 'resolved_issues')):
+            if diff[key]:
+                print(f"   {len(diff[key])} problemi {label}:")
+                for issue in diff[key][:SHOWN_ISSUES]:
+                    print(f"      {issue['type']} {issue['pack']}: {issue['path']}")
+
+def gate_failures(report: Dict, fail_under: Optional[float] = None, fail_on_regression: bool = False) -> List[str]:
+    """Motivi per cui il report non supera le soglie richieste (lista vuota se le supera)"""
+    failures = []
+    if fail_under is not None and report['coverage'] < fail_under:
+        failures.append(f"copertura {report['coverage']:.1f}% sotto il minimo {fail_under}%")
+    diff = report['diff']
+    if fail_on_regression and diff:
+        dropped = [pack for pack, data in diff['packs'].items() if data['delta'] < 0]
+        if dropped:
+            failures.append(f"copertura scesa in {', '.join(dropped)}")
+        if diff['new_issues']:
+            failures.append(f"{len(diff['new_issues'])} nuovi problemi")
+    return failures
+
+def write_report(packs: Optional[Sequence[str]] = None, json_file: Path = DEFAULT_JSON,
+                 html_file: Optional[Path] = None, previous_file: Optional[Path] = None,
+                 fail_under: Optional[float] = None, fail_on_regression: bool = False) -> Dict:
+    """
+    Costruisce il report, lo confronta con il precedente, lo salva in JSON e HTML e ne stampa il riepilogo
+
+    Se il report non supera le soglie (vedi gate_failures) il JSON viene scritto accanto, in
+    <nome>.failed.json, senza sostituire il report di riferimento: un run fallito non diventa
+    la base del confronto successivo. I motivi sono in report['failures'].
+    """
+    previous = _load_previous(previous_file or json_file)
+    report = build_report(packs)
+    report['diff'] = diff_reports(report, previous)
+    failures = report['failures'] = gate_failures(report, fail_under, fail_on_regression)
+
+    html_file = html_file or json_file.with_suffix('.html')
+    if failures:
+        json_file = json_file.with_suffix('.failed.json')
+    json_file.parent.mkdir(parents=True, exist_ok=True)
+    html_file.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(json_file, report)
+    atomic_write_text(html_file, render_html(report))
+
+    print(f"📊 Copertura dei nomi: {report['coverage']:.1f}% su {len(report['packs'])} pack "
+          f"in {report['timings_ms']['total']:.0f}ms\n")
+    print_summary(report)
+    print(f"\n💾 Report: {json_file}, {html_file}")
+    if not report['origin']:
+        print(f"   ℹ️  {ORIGIN_PACKS_DIR.relative_to(REPO_ROOT)} assente: voci mancanti non calcolate")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Report di copertura e qualità delle traduzioni dei pack")
+    parser.add_argument('--packs', help="pack da analizzare separati da virgola (default: tutti quelli di main.js)")
+    parser.add_argument('--json', type=Path, default=DEFAULT_JSON,
+                        help=f"file JSON del report (default: {DEFAULT_JSON.relative_to(REPO_ROOT)})")
+    parser.add_argument('--html', type=Path, help="file HTML del report (default: accanto al JSON)")
+    parser.add_argument('--previous', type=Path, help="report da confrontare (default: il JSON precedente)")
+    parser.add_argument('--fail-under', type=float,
+                        help="esce con errore se la copertura dei nomi è sotto questa percentuale")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="esce con errore se la copertura di un pack scende o compaiono nuovi problemi")
+    args = parser.parse_args()
+
+    packs = [pack.strip() for pack in args.packs.split(',')] if args.packs else None
+    report = write_report(packs, args.json, args.html, args.previous,
+                          fail_under=args.fail_under, fail_on_regression=args.fail_on_regression)
+    if report['failures']:
+        print(f"\n❌ {'; '.join(report['failures'])} (report di riferimento {args.json} non aggiornato)")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
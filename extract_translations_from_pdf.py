@@ -3,10 +3,17 @@
 Script per estrarre traduzioni italiane dai PDF SRD e completare dnd5e.rules.json
 """
 
+import argparse
+import hashlib
+import os
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from collections import OrderedDict
+
+from compendium import Compendium
+from language_detect import get_detector
+from run_metrics import add_metrics_arguments, finish_run, get_metrics, instrumented, start_run
 
 try:
     import PyPDF2
@@ -21,30 +28,106 @@ except ImportError:
         PDF_AVAILABLE = False
         PDF_LIB = None
 
-def extract_text_from_pdf(pdf_path):
-    """Estrae tutto il testo da un PDF"""
+# Cache del testo estratto, indicizzata per hash del PDF
+PDF_TEXT_CACHE_DIR = Path(".cache/pdf_text")
+
+def sha256_file(path):
+    """Hash SHA-256 di un file, letto a blocchi"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _count_pages(pdf_path):
+    """Numero di pagine del PDF"""
+    if PDF_LIB == 'pdfplumber':
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def _extract_page_range(pdf_path, start, stop):
+    """Estrae il testo delle pagine [start, stop) (eseguito in un processo separato)"""
+    pages = []
+    if PDF_LIB == 'pdfplumber':
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:stop]:
+                pages.append(page.extract_text() or "")
+    else:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for index in range(start, stop):
+                pages.append(pdf_reader.pages[index].extract_text() or "")
+    return pages
+
+def _load_cached_pages(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)['pages']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def extract_pages_from_pdf(pdf_path, workers=None, use_cache=True):
+    """
+    Estrae il testo di ogni pagina del PDF
+
+    Il lavoro è diviso per intervalli di pagine su un pool di processi; il risultato (una
+    stringa per pagina) viene salvato in cache su disco, indicizzato per hash del PDF,
+    così i run successivi non rileggono il PDF.
+
+    Returns:
+        Lista dei testi delle pagine, oppure None in caso di errore
+    """
+    pdf_path = Path(pdf_path)
+    cache_file = None
+    if use_cache:
+        cache_file = PDF_TEXT_CACHE_DIR / f"{sha256_file(pdf_path)}.json"
+        pages = _load_cached_pages(cache_file)
+        if pages is not None:
+            print(f"   💾 Testo letto dalla cache ({len(pages)} pagine)")
+            return pages
+    
     if not PDF_AVAILABLE:
         print("❌ Nessuna libreria PDF disponibile!")
         print("   Installa con: pip install PyPDF2 o pip install pdfplumber")
         return None
     
     try:
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            if PDF_LIB == 'pdfplumber':
-                pdf = pdfplumber.open(file)
-                for page in pdf.pages:
-                    text += page.extract_text() + "\n"
-                pdf.close()
-            else:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+        page_count = _count_pages(pdf_path)
+        workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+        # Qualche blocco in più dei processi per bilanciare pagine più pesanti
+        chunk_size = max(1, -(-page_count // (workers * 4)))
+        ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
         
-        return text
+        pages = []
+        if workers == 1:
+            for start, stop in ranges:
+                pages.extend(_extract_page_range(pdf_path, start, stop))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_extract_page_range, pdf_path, start, stop) for start, stop in ranges]
+                for future in futures:
+                    pages.extend(future.result())
     except Exception as e:
         print(f"❌ Errore lettura PDF {pdf_path}: {e}")
         return None
+    
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'pdf': pdf_path.name, 'lib': PDF_LIB, 'pages': pages}, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    
+    return pages
+
+def extract_text_from_pdf(pdf_path, workers=None, use_cache=True):
+    """Estrae tutto il testo da un PDF (una riga vuota di separazione dopo ogni pagina)"""
+    pages = extract_pages_from_pdf(pdf_path, workers=workers, use_cache=use_cache)
+    if pages is None:
+        return None
+    return ''.join(page + "\n" for page in pages)
 
 def normalize_title_for_search(title):
     """Normalizza un titolo per la ricerca (rimuove punteggiatura, case-insensitive)"""
@@ -55,36 +138,155 @@ def normalize_title_for_search(title):
     normalized = re.sub(r'\s+', ' ', normalized).strip()
     return normalized
 
-def find_page_content_directly(text, page_title):
-    """Trova direttamente il contenuto di una pagina cercando il titolo nel testo completo"""
+def build_normalized_text(text):
+    """
+    Normalizza tutto il testo una sola volta, come normalize_title_for_search
+
+    Returns:
+        (testo normalizzato, lista offset) dove offsets[i] è la posizione nel testo originale
+        del carattere i del testo normalizzato
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Alcuni caratteri cambiano lunghezza in minuscolo (es. 'İ'): lasciali invariati
+        lowered = ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    
+    parts = []
+    offsets = []
+    last_is_space = True  # Evita spazi iniziali (come strip())
+    # Parole e spazi: la punteggiatura viene saltata, gli spazi compressi
+    for match in re.finditer(r'\w+|\s+', lowered):
+        if match.group()[0].isspace():
+            if not last_is_space:
+                parts.append(' ')
+                offsets.append(match.start())
+                last_is_space = True
+        else:
+            parts.append(match.group())
+            offsets.extend(range(match.start(), match.end()))
+            last_is_space = False
+    return ''.join(parts), offsets
+
+class MultiPatternMatcher:
+    """Automa Aho-Corasick: trova tutte le occorrenze di più pattern in un solo passaggio"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]     # nodo -> {carattere: nodo}
+        self.fail = [0]      # nodo -> nodo di fallback
+        self.output = [()]   # nodo -> pattern che terminano nel nodo
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            node = next_node
+        self.output[node] = self.output[node] + (pattern,)
+
+    def _build(self):
+        """Calcola i link di fallback (visita in ampiezza)"""
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def finditer(self, text):
+        """Itera le occorrenze come coppie (posizione iniziale, pattern)"""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for pattern in output[node]:
+                    yield position - len(pattern) + 1, pattern
+
+class TitleIndex:
+    """
+    Indice titolo -> posizioni nel testo del PDF
+
+    Costruito una volta per run: normalizza il testo una sola volta (con mappa degli offset
+    verso l'originale) e cerca tutti i titoli e alias insieme con un automa Aho-Corasick.
+    """
+
+    def __init__(self, text, titles):
+        self.text = text
+        self.normalized, self.offsets = build_normalized_text(text)
+        patterns = {normalize_title_for_search(title) for title in titles if title and len(title) >= 3}
+        patterns.discard('')
+        self.positions = {pattern: [] for pattern in patterns}
+        if patterns:
+            for position, pattern in MultiPatternMatcher(patterns).finditer(self.normalized):
+                self.positions[pattern].append(position)
+        self._text_lower = None
+
+    def find(self, title):
+        """
+        Prima occorrenza del titolo nel testo originale
+
+        Returns:
+            (inizio, fine) nel testo originale, oppure None
+        """
+        title_norm = normalize_title_for_search(title)
+        positions = self.positions.get(title_norm)
+        if positions is None:
+            # Titolo non indicizzato: ricerca diretta nel testo normalizzato
+            position = self.normalized.find(title_norm) if title_norm else -1
+            positions = [position] if position != -1 else []
+            self.positions[title_norm] = positions
+        if positions:
+            start = positions[0]
+            end = start + len(title_norm) - 1
+            return self.offsets[start], self.offsets[end] + 1
+        
+        # Se non trovato, cerca case-insensitive
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        pos = self._text_lower.find(title.lower())
+        if pos != -1:
+            return pos, pos + len(title)
+        return None
+
+def find_page_content_directly(text, page_title, title_index=None):
+    """
+    Trova direttamente il contenuto di una pagina cercando il titolo nel testo completo
+
+    Args:
+        text: testo del PDF
+        page_title: titolo da cercare
+        title_index: TitleIndex costruito su text (se None ne viene creato uno al volo)
+    """
     if not page_title or len(page_title) < 3:
         return None
     
-    # Normalizza il titolo per la ricerca
-    title_norm = normalize_title_for_search(page_title)
+    if title_index is None:
+        title_index = TitleIndex(text, [page_title])
     
     # Cerca il titolo nel testo (case-insensitive, flessibile)
-    # Prima cerca esatto
-    title_pos = -1
-    for i in range(len(text) - len(page_title)):
-        text_slice = text[i:i+len(page_title)]
-        if normalize_title_for_search(text_slice) == title_norm:
-            title_pos = i
-            break
-    
-    # Se non trovato esatto, cerca case-insensitive
-    if title_pos == -1:
-        title_lower = page_title.lower()
-        text_lower = text.lower()
-        pos = text_lower.find(title_lower)
-        if pos != -1:
-            title_pos = pos
-    
-    if title_pos == -1:
+    found = title_index.find(page_title)
+    if found is None:
         return None
     
     # Estrai contenuto dopo il titolo
-    start_pos = title_pos + len(page_title)
+    start_pos = found[1]
     
     # Trova la fine: cerca prossimo titolo di sezione (riga che inizia con maiuscola seguita da testo)
     # o fine documento
@@ -100,21 +302,140 @@ def find_page_content_directly(text, page_title):
         if next_match.start() > 100:
             end_pos = start_pos + next_match.start()
     
-    content = text[start_pos:end_pos].strip()
+    content = clean_section_text(text[start_pos:end_pos])
+    
+    if len(content) > 100:  # Almeno 100 caratteri
+        return content
+    
+    return None
+
+def clean_section_text(content):
+    """Pulisce il testo estratto di una sezione"""
+    content = content.strip()
     
-    # Pulisci il contenuto
     # Rimuovi spazi multipli ma mantieni struttura base
     content = re.sub(r'[ \t]+', ' ', content)  # Spazi multipli -> singolo spazio
     content = re.sub(r'\n\s*\n\s*\n+', '\n\n', content)  # Newline multipli -> doppio
     
     # Rimuovi caratteri di controllo strani
     content = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f]', '', content)
-    
-    if len(content) > 100:  # Almeno 100 caratteri
-        return content
-    
-    return None
+    return content
+
+# Riga che inizia con maiuscola e sembra un titolo (da 1 a 4 parole capitalizzate)
+HEADING_LINE_PATTERN = re.compile(r'^[A-ZÀÈÉÌÒÙ][a-zàèéìòù]+(?:\s+[A-ZÀÈÉÌÒÙ][a-zàèéìòù]+){0,3}$')
+MAX_HEADING_LENGTH = 80
+# Oltre questa lunghezza una sezione viene chiusa all'ultimo sottotitolo utile
+MAX_SECTION_LENGTH = 20000
+
+class Section:
+    """Sezione del testo PDF: titolo, offset nel testo e sottosezioni"""
+    __slots__ = ('title', 'level', 'start', 'body_start', 'end', 'children')
+
+    def __init__(self, title, level, start, body_start):
+        self.title = title
+        self.level = level
+        self.start = start
+        self.body_start = body_start
+        self.end = body_start
+        self.children = []
 
+class SectionTree:
+    """
+    Albero titolo -> corpo della sezione ricavato dal testo del PDF in un solo passaggio
+
+    Livello 1: righe che coincidono con un titolo noto (nomi pagina e varianti); per i titoli
+    mai presenti come riga a sé si usa la prima occorrenza trovata da TitleIndex.
+    Livello 2: altre righe che sembrano titoli, figlie della sezione di livello 1 precedente.
+    Il corpo di una sezione di livello 1 arriva fino alla successiva sezione di livello 1.
+    """
+
+    def __init__(self, text, titles, title_index=None):
+        self.text = text
+        self.roots = []
+        self.by_title = {}
+        
+        known = {normalize_title_for_search(title): title for title in titles if title and len(title) >= 3}
+        known.pop('', None)
+        
+        # Unico passaggio sulle righe del testo
+        anchors = []  # (inizio, inizio corpo, livello, titolo, titolo normalizzato)
+        found_known = set()
+        pos = 0
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped and len(stripped) <= MAX_HEADING_LENGTH:
+                norm = normalize_title_for_search(stripped)
+                if norm in known:
+                    anchors.append((pos, pos + len(line), 1, stripped, norm))
+                    found_known.add(norm)
+                elif HEADING_LINE_PATTERN.match(stripped):
+                    anchors.append((pos, pos + len(line), 2, stripped, norm))
+            pos += len(line)
+        
+        # Titoli noti non presenti come riga a sé: prima occorrenza nel testo
+        missing = [title for norm, title in known.items() if norm not in found_known]
+        if missing:
+            if title_index is None:
+                title_index = TitleIndex(text, missing)
+            for title in missing:
+                found = title_index.find(title)
+                if found:
+                    anchors.append((found[0], found[1], 1, title, normalize_title_for_search(title)))
+        
+        anchors.sort(key=lambda anchor: (anchor[0], anchor[2]))
+        
+        current_root = None
+        previous = None
+        for start, body_start, level, title, norm in anchors:
+            if previous is not None and previous.end < start:
+                previous.end = max(previous.body_start, start)
+            section = Section(title, level, start, body_start)
+            if level == 1:
+                if current_root is not None:
+                    current_root.end = max(current_root.body_start, start)
+                current_root = section
+                self.roots.append(section)
+            elif current_root is not None:
+                current_root.children.append(section)
+            self.by_title.setdefault(norm, section)
+            previous = section
+        
+        # Chiudi le ultime sezioni a fine testo
+        if previous is not None:
+            previous.end = len(text)
+        if current_root is not None:
+            current_root.end = len(text)
+        for root in self.roots:
+            self._cap(root)
+
+    @staticmethod
+    def _cap(section):
+        """Limita le sezioni troppo lunghe all'ultimo sottotitolo entro MAX_SECTION_LENGTH"""
+        limit = section.body_start + MAX_SECTION_LENGTH
+        if section.end <= limit:
+            return
+        cut = limit
+        for child in section.children:
+            if section.body_start < child.start <= limit:
+                cut = child.start
+        section.end = cut
+        section.children = [child for child in section.children if child.start < cut]
+
+    def lookup(self, title):
+        """Sezione corrispondente al titolo (dizionario, O(1)), None se assente"""
+        return self.by_title.get(normalize_title_for_search(title))
+
+    def content(self, title):
+        """Testo pulito della sezione, None se assente o troppo corto (< 100 caratteri)"""
+        if not title or len(title) < 3:
+            return None
+        section = self.lookup(title)
+        if section is None:
+            return None
+        content = clean_section_text(self.text[section.body_start:section.end])
+        return content if len(content) > 100 else None
+
+@instrumented('pdf', pack='rules')
 def extract_translations_from_pdf():
     """Estrae traduzioni italiane dal PDF e completa rules.json"""
     print("=== ESTRAZIONE TRADUZIONI DA PDF SRD ITALIANO ===\n")
@@ -128,7 +449,8 @@ def extract_translations_from_pdf():
     print(f"📄 Leggendo PDF: {pdf_it.name} ({pdf_it.stat().st_size / (1024*1024):.1f} MB)")
     print("   ⏳ Estrazione testo (può richiedere alcuni secondi)...")
     
-    pdf_text = extract_text_from_pdf(pdf_it)
+    with get_metrics().stage('pdf.extract_text'):
+        pdf_text = extract_text_from_pdf(pdf_it)
     if not pdf_text:
         return
     
@@ -162,10 +484,7 @@ def extract_translations_from_pdf():
     
     # Carica rules.json
     rules_file = Path("compendium/dnd5e.rules.json")
-    with open(rules_file, 'r', encoding='utf-8') as f:
-        data = json.load(f, object_pairs_hook=OrderedDict)
-    
-    entries = data.get('entries', {})
+    entries = Compendium(rules_file)
     
     # Mapping titoli pagine JSON -> titoli nel PDF italiano
     page_title_mapping = {
@@ -249,8 +568,31 @@ def extract_translations_from_pdf():
         'Trattenuto': ['Trattenuto'],
     }
     
+    # Indice di tutti i titoli (nomi pagina e varianti), costruito una volta sola
+    all_titles = set()
+    for _, chapter_data in entries.items():
+        for page_data in chapter_data.get('pages', {}).values():
+            if isinstance(page_data, dict) and page_data.get('name'):
+                all_titles.add(page_data['name'])
+    for variants in page_title_mapping.values():
+        all_titles.update(variants)
+    print(f"🔎 Indicizzazione di {len(all_titles)} titoli nel testo...")
+    with get_metrics().stage('pdf.index'):
+        title_index = TitleIndex(pdf_text, all_titles)
+        sections = SectionTree(pdf_text, all_titles, title_index)
+    print(f"   {len(sections.roots)} sezioni, {len(sections.by_title)} titoli indicizzati\n")
+    
     total_pages_updated = 0
     
+    # Lingua dei testi esistenti, classificati tutti insieme in una sola passata
+    detector = get_detector()
+    page_texts = {}
+    for chapter_key, chapter_data in entries.items():
+        for page_key, page_data in chapter_data.get('pages', {}).items():
+            if isinstance(page_data, dict):
+                page_texts[(chapter_key, page_key)] = page_data.get('text', '') or page_data.get('description', '')
+    page_languages = dict(zip(page_texts, detector.classify(list(page_texts.values()))))
+    
     # Processa ogni capitolo e le sue pagine
     for chapter_key, chapter_data in entries.items():
         print(f"📖 Processando: {chapter_data.get('name', chapter_key)}")
@@ -265,33 +607,30 @@ def extract_translations_from_pdf():
                 continue
             
             page_name = page_data['name']
+            get_metrics().add_entries(1)
             
             existing_text = page_data.get('text', '') or page_data.get('description', '')
             
             # Controlla se è già in italiano
-            is_already_italian = False
-            if existing_text:
-                italian_chars = ['à', 'è', 'é', 'ì', 'ò', 'ù', 'À', 'È', 'É', 'Ì', 'Ò', 'Ù']
-                is_already_italian = any(char in existing_text[:500] for char in italian_chars)
+            is_already_italian = bool(existing_text) and page_languages.get((chapter_key, page_key)) == 'it'
             
             # Se è già in italiano e ha contenuto significativo, salta
             if is_already_italian and len(existing_text) > 200:
                 continue
             
-            # Cerca direttamente il contenuto della pagina nel PDF
-            page_content = find_page_content_directly(pdf_text, page_name)
+            # Cerca il contenuto della pagina tra le sezioni del PDF
+            page_content = sections.content(page_name)
             
             # Se non trovato, prova con le varianti del mapping
             if not page_content and page_name in page_title_mapping:
                 for variant in page_title_mapping[page_name]:
-                    page_content = find_page_content_directly(pdf_text, variant)
+                    page_content = sections.content(variant)
                     if page_content:
                         break
             
             if page_content and len(page_content) > 100:
                 # Verifica se il contenuto è in italiano
-                italian_chars_in_content = ['à', 'è', 'é', 'ì', 'ò', 'ù']
-                is_content_italian = any(char in page_content[:500] for char in italian_chars_in_content)
+                is_content_italian = detector.is_italian(page_content)
                 
                 # Sostituisci se:
                 # 1. Non c'è testo esistente, OPPURE
@@ -316,25 +655,31 @@ def extract_translations_from_pdf():
                     total_pages_updated += 1
         
         if pages_updated > 0:
+            entries.mark_dirty(chapter_key)
             print(f"   ✅ Aggiornate {pages_updated} pagine")
         else:
             print(f"   ⏭️  Nessuna pagina aggiornata")
     
-    # Salva file aggiornato
-    with open(rules_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Salva file aggiornato: riscrive solo i capitoli modificati, in modo atomico
+    chapters_saved = entries.save()
     
     print(f"\n📊 RIEPILOGO:")
     print(f"  ✅ Pagine aggiornate con traduzioni italiane: {total_pages_updated}")
-    print(f"  💾 File salvato: {rules_file}")
+    if chapters_saved:
+        print(f"  💾 File salvato: {rules_file} ({chapters_saved} capitoli riscritti)")
+    else:
+        print(f"  💾 Nessuna modifica, {rules_file} non riscritto")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Completa dnd5e.rules con il testo del PDF SRD italiano")
+    add_metrics_arguments(parser, 'extract_translations_from_pdf')
+    args = parser.parse_args()
+    start_run(args)
+    
     if not PDF_AVAILABLE:
-        print("❌ ERRORE: Nessuna libreria PDF disponibile!")
-        print("\nInstalla una delle seguenti librerie:")
-        print("  pip install PyPDF2")
-        print("  oppure")
-        print("  pip install pdfplumber")
-        exit(1)
+        # Senza librerie PDF si può comunque usare il testo già in cache
+        print("⚠️  Nessuna libreria PDF disponibile: verrà usato solo il testo in cache")
+        print("   Per estrarre il testo installa: pip install PyPDF2 oppure pip install pdfplumber\n")
     
     extract_translations_from_pdf()
+    finish_run(args)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Motore di download concorrente per quintaedizione.online
+Usa una sessione HTTP condivisa (keep-alive), un pool di thread e un rate limiter
+a token bucket per host, così da parallelizzare le ricerche restando "educati" col server.
+Gli errori temporanei vengono ritentati con backoff esponenziale (rispettando Retry-After) e
+un circuit breaker per host interrompe le richieste verso un sito che non risponde.
+"""
+
+import bisect
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+# Valori predefiniti
+DEFAULT_CONCURRENCY = 8      # Richieste contemporanee massime
+DEFAULT_RATE = 4.0           # Richieste al secondo per host
+DEFAULT_BURST = 4            # Richieste consecutive ammesse senza attesa
+DEFAULT_TIMEOUT = 10         # Secondi
+DEFAULT_RETRIES = 3          # Nuovi tentativi dopo un errore temporaneo
+DEFAULT_BACKOFF = 0.5        # Attesa base (secondi) del backoff esponenziale
+DEFAULT_MAX_BACKOFF = 30.0   # Attesa massima tra due tentativi
+DEFAULT_BREAKER_THRESHOLD = 5    # Errori consecutivi che aprono il circuito
+DEFAULT_BREAKER_COOLDOWN = 60.0  # Secondi prima di riprovare un host con circuito aperto
+
+# Status HTTP temporanei che vale la pena ritentare
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Richiesta rifiutata perché il circuito dell'host è aperto"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker per host, thread-safe
+
+    Dopo threshold errori consecutivi il circuito si apre e le richieste falliscono subito;
+    trascorso cooldown una sola richiesta di prova viene lasciata passare (semi-aperto):
+    se va a buon fine il circuito si richiude, altrimenti si riapre.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_BREAKER_THRESHOLD, cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self.lock:
+            return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """True se la richiesta può partire"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> bool:
+        """Registra un errore; True se il circuito si è appena aperto"""
+        with self.lock:
+            self.failures += 1
+            if self.probing:
+                # Richiesta di prova fallita: riapri per un altro cooldown
+                self.probing = False
+                self.opened_at = time.monotonic()
+                return False
+            if self.opened_at is None and self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Secondi indicati dall'header Retry-After (numero di secondi o data HTTP)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+class TokenBucket:
+    """Rate limiter a token bucket, thread-safe"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Attende finché non è disponibile un token e lo consuma"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            # Dormi fuori dal lock per non bloccare gli altri thread
+            time.sleep(wait)
+
+# Limiti superiori (in secondi) delle classi dell'istogramma delle latenze
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class FetchMetrics:
+    """Contatori di richieste, esiti e latenze del motore, thread-safe"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.entries = 0
+        self.status_counts: Dict[int, int] = {}
+        self.latencies = []
+
+    def record_request(self, latency: float, status: Optional[int]):
+        """Registra una richiesta completata (status None = errore di rete)"""
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            if status is None:
+                self.errors += 1
+            else:
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_rejected(self):
+        """Registra una richiesta rifiutata dal circuit breaker"""
+        with self.lock:
+            self.rejected += 1
+
+    def record_entry(self):
+        """Registra una voce cercata (per il calcolo delle richieste per voce)"""
+        with self.lock:
+            self.entries += 1
+
+    def percentile(self, p: float) -> float:
+        """Percentile p (0-100) delle latenze, in secondi"""
+        with self.lock:
+            values = sorted(self.latencies)
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+        return values[index]
+
+    def histogram(self, buckets=LATENCY_BUCKETS) -> List[Dict]:
+        """Istogramma delle latenze: [{'le': limite in secondi (None = oltre l'ultimo), 'count'}]"""
+        with self.lock:
+            values = list(self.latencies)
+        counts = [0] * (len(buckets) + 1)
+        for value in values:
+            counts[bisect.bisect_left(buckets, value)] += 1
+        return [{'le': le, 'count': count} for le, count in zip(list(buckets) + [None], counts)]
+
+    def snapshot(self) -> Dict:
+        """Contatori e latenze in forma serializzabile (per i file di metriche)"""
+        with self.lock:
+            data = {
+                'requests': self.requests,
+                'entries': self.entries,
+                'errors': self.errors,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'status_counts': {str(status): count for status, count in sorted(self.status_counts.items())},
+                'latency_total_s': sum(self.latencies),
+            }
+        data['latency_ms'] = {f"p{p}": self.percentile(p) * 1000 for p in (50, 90, 95, 99)}
+        data['latency_histogram'] = self.histogram()
+        return data
+
+    def summary_lines(self):
+        """Righe di riepilogo leggibili"""
+        with self.lock:
+            requests, entries, errors = self.requests, self.entries, self.errors
+            retries, rejected = self.retries, self.rejected
+            statuses = dict(sorted(self.status_counts.items()))
+            total_latency = sum(self.latencies)
+        per_entry = requests / entries if entries else 0.0
+        mean = total_latency / requests if requests else 0.0
+        lines = [
+            f"Richieste HTTP: {requests} per {entries} voci ({per_entry:.2f} richieste/voce)",
+            f"Latenza: media {mean * 1000:.0f}ms, p50 {self.percentile(50) * 1000:.0f}ms, "
+            f"p95 {self.percentile(95) * 1000:.0f}ms, p99 {self.percentile(99) * 1000:.0f}ms",
+        ]
+        if statuses or errors:
+            parts = [f"{status}: {count}" for status, count in statuses.items()]
+            if errors:
+                parts.append(f"errori di rete: {errors}")
+            lines.append("Esiti: " + ", ".join(parts))
+        if retries or rejected:
+            lines.append(f"Nuovi tentativi: {retries}, richieste saltate a circuito aperto: {rejected}")
+        return lines
+
+class FetchEngine:
+    """Esegue richieste HTTP in parallelo con sessione keep-alive, rate limit e circuit breaker per host"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._session = None
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.metrics = FetchMetrics()
+
+    @property
+    def session(self):
+        """Sessione HTTP condivisa, creata alla prima richiesta"""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                # Un pool di connessioni grande quanto il numero di thread
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.concurrency)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def limiter_for(self, url: str) -> TokenBucket:
+        """Restituisce il rate limiter associato all'host dell'URL"""
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = TokenBucket(self.rate, self.burst)
+                self._limiters[host] = limiter
+            return limiter
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """Restituisce il circuit breaker associato all'host dell'URL"""
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+                self._breakers[host] = breaker
+            return breaker
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Attesa prima del tentativo successivo: backoff esponenziale con jitter completo"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _failed(self, url: str, breaker: CircuitBreaker):
+        if breaker.record_failure():
+            host = urllib.parse.urlsplit(url).netloc
+            print(f"   ⚠️  {host} non risponde: circuito aperto per {self.breaker_cooldown:.0f}s, "
+                  f"le richieste successive useranno solo la cache")
+
+    def get(self, url: str, **kwargs):
+        """
+        Esegue una GET rispettando il rate limit dell'host
+
+        Errori di rete e status temporanei (RETRY_STATUS_CODES) vengono ritentati fino a
+        retries volte; esauriti i tentativi viene restituita l'ultima risposta o sollevata
+        l'ultima eccezione. Con il circuito dell'host aperto solleva subito CircuitOpenError.
+        """
+        breaker = self.breaker_for(url)
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                self.metrics.record_rejected()
+                raise CircuitOpenError(urllib.parse.urlsplit(url).netloc)
+            if attempt:
+                self.metrics.record_retry()
+            try:
+                self.limiter_for(url).acquire()
+                start = time.monotonic()
+                response = self.session.get(url, **kwargs)
+            except requests.RequestException:
+                self.metrics.record_request(time.monotonic() - start, None)
+                self._failed(url, breaker)
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            except BaseException:
+                # Qualunque altro errore (anche Ctrl-C) conta come fallimento: una richiesta di
+                # prova non deve lasciare il circuito semi-aperto per sempre
+                self._failed(url, breaker)
+                raise
+            self.metrics.record_request(time.monotonic() - start, response.status_code)
+            if response.status_code not in RETRY_STATUS_CODES:
+                breaker.record_success()
+                return response
+            self._failed(url, breaker)
+            delay = self.backoff_delay(attempt)
+            if response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None:
+                    if retry_after > self.max_backoff:
+                        # Il server chiede di aspettare troppo: inutile insistere
+                        return response
+                    delay = retry_after
+            if attempt == self.retries:
+                return response
+            response.close()
+            time.sleep(delay)
+        return response
+
+    def map(self, func: Callable, items: Iterable) -> Iterator[Tuple[object, object]]:
+        """
+        Applica func a ogni elemento in parallelo
+
+        Returns:
+            Iteratore di coppie (elemento, risultato) nello stesso ordine di items
+        """
+        items = list(items)
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as executor:
+            for item, result in zip(items, executor.map(func, items)):
+                yield item, result
+
+    def close(self):
+        """Chiude la sessione HTTP"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+_engine: Optional[FetchEngine] = None
+
+def configure_engine(**kwargs) -> FetchEngine:
+    """Crea (o ricrea) il motore condiviso con i parametri indicati"""
+    global _engine
+    if _engine is not None:
+        _engine.close()
+    _engine = FetchEngine(**kwargs)
+    return _engine
+
+def get_engine() -> FetchEngine:
+    """Restituisce il motore condiviso, creandolo con i valori predefiniti se serve"""
+    global _engine
+    if _engine is None:
+        _engine = FetchEngine()
+    return _engine
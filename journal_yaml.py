@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Lettura dei journal Foundry in formato YAML (origin/packs/_source/rules/*.yml)
+
+parse_journal_yaml() scorre il file una sola volta, riga per riga, seguendo la struttura a
+indentazione di mappe e liste, ed estrae solo ciò che serve: name e _id del journal e, per
+ogni pagina, name, _id e text.content. Gli scalari vengono decodificati secondo le regole YAML
+(blocchi | e > con indicatori di chomping e indentazione, stringhe tra apici singoli o doppi,
+scalari semplici su più righe); il resto del documento viene solo saltato, comprese le
+collezioni in stile flow ({...}, [...]) che Foundry usa solo per mappe e liste vuote.
+
+Se PyYAML è installato con libyaml, load_journal_yaml() può usare in alternativa il loader C
+(CSafeLoader): costruisce però l'intero documento e sui capitoli delle regole risulta più lento
+del parser a righe (vedi benchmarks/bench_rules_yaml.py), per questo non è il default.
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import yaml
+    YAML_C_AVAILABLE = hasattr(yaml, 'CSafeLoader')
+except ImportError:
+    YAML_C_AVAILABLE = False
+
+# Chiave di una mappa: tra apici o semplice, fino al primo ": " (o ":" a fine riga)
+_KEY_PATTERN = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s'"#][^#]*?)[ \t]*:(?:[ \t]+|$)''')
+
+_ESCAPE_PATTERN = re.compile(r'\\(x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_ESCAPES = {
+    '0': '\0', 'a': '\x07', 'b': '\x08', 't': '\t', '\t': '\t', 'n': '\n', 'v': '\x0b', 'f': '\x0c',
+    'r': '\r', 'e': '\x1b', ' ': ' ', '"': '"', '/': '/', '\\': '\\', 'N': '\x85', '_': '\xa0',
+    'L': '\u2028', 'P': '\u2029',
+}
+
+# Valori da estrarre: percorsi nel journal e, per le pagine, relativi al singolo elemento di 'pages'
+_JOURNAL_FIELDS = {('name',): 'name', ('_id',): '_id'}
+_PAGE_FIELDS = {('name',): 'name', ('_id',): '_id', ('text', 'content'): 'content'}
+
+def _is_relevant(path: tuple) -> bool:
+    """True se sotto questo percorso possono esserci valori da estrarre"""
+    if len(path) <= 1:
+        return not path or path[0] == 'pages'
+    return path[0] == 'pages' and isinstance(path[1], int) and (len(path) == 2 or path[2:] == ('text',))
+
+def _skip_subtree(lines: List[str], i: int, column: int) -> int:
+    """Salta il contenuto annidato sotto una chiave alla colonna indicata, senza analizzarlo"""
+    deeper = ' ' * (column + 1)
+    j = i + 1
+    count = len(lines)
+    while j < count:
+        line = lines[j]
+        if line.startswith(deeper):
+            j += 1
+            continue
+        stripped = line.strip(' ')
+        # Righe vuote, commenti e lista non indentata allo stesso livello della chiave
+        if (not stripped or stripped[0] == '#'
+                or (len(line) - len(line.lstrip(' ')) == column and (stripped == '-' or stripped.startswith('- ')))):
+            j += 1
+            continue
+        break
+    return j
+
+def _unescape(match) -> str:
+    code = match.group(1)
+    if len(code) > 1:
+        return chr(int(code[1:], 16))
+    return _ESCAPES.get(code, code)
+
+def _unquote_key(key: str) -> str:
+    if key[:1] == '"':
+        return _ESCAPE_PATTERN.sub(_unescape, key[1:-1])
+    if key[:1] == "'":
+        return key[1:-1].replace("''", "'")
+    return key
+
+def _strip_comment(value: str) -> str:
+    """Rimuove un commento finale da uno scalare semplice"""
+    position = value.find(' #')
+    if position == -1:
+        position = value.find('\t#')
+    return (value[:position] if position != -1 else value).rstrip()
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+def _plain_value(value: str) -> Optional[str]:
+    if value in ('null', 'Null', 'NULL', '~', ''):
+        return None
+    return value
+
+def _read_plain(lines: List[str], i: int, value: str, parent_indent: int, want: bool) -> Tuple[int, Optional[str]]:
+    """Scalare semplice, eventualmente continuato sulle righe più indentate"""
+    first = _strip_comment(value)
+    parts = [first]
+    breaks = 0
+    j = i + 1
+    end = j
+    while j < len(lines):
+        line = lines[j]
+        stripped = line.strip()
+        if not stripped:
+            breaks += 1
+            j += 1
+            continue
+        if _indent_of(line) <= parent_indent or stripped.startswith('#'):
+            break
+        if want:
+            parts.append(('\n' * breaks if breaks else ' ') + _strip_comment(stripped))
+        breaks = 0
+        j += 1
+        end = j
+    if not want:
+        return end, None
+    return end, _plain_value(''.join(parts)) if end == i + 1 else ''.join(parts)
+
+def _read_quoted(lines: List[str], i: int, value: str, want: bool) -> Tuple[int, Optional[str]]:
+    """Stringa tra apici singoli o doppi, anche su più righe"""
+    quote = value[0]
+    line = value
+    pos = 1
+    segments = []
+    while True:
+        k = pos
+        while True:
+            k = line.find(quote, k)
+            if k == -1:
+                break
+            if quote == "'":
+                if line.startswith("''", k):
+                    k += 2
+                    continue
+                break
+            # Apice doppio: chiuso solo se preceduto da un numero pari di backslash
+            backslashes = 0
+            b = k - 1
+            while b >= pos and line[b] == '\\':
+                backslashes += 1
+                b -= 1
+            if backslashes % 2:
+                k += 1
+                continue
+            break
+        if k != -1:
+            segments.append(line[pos:k])
+            break
+        segments.append(line[pos:])
+        i += 1
+        if i >= len(lines):
+            break
+        line = lines[i]
+        pos = 0
+    if not want:
+        return i + 1, None
+    return i + 1, _fold_quoted(segments, quote)
+
+def _fold_quoted(segments: List[str], quote: str) -> str:
+    """Ripiega le righe di una stringa tra apici e ne decodifica gli escape"""
+    def decode(text):
+        if quote == '"':
+            return _ESCAPE_PATTERN.sub(_unescape, text)
+        return text.replace("''", "'")
+
+    last = len(segments) - 1
+    out = []
+    breaks = 0
+    escaped = False
+    for index, segment in enumerate(segments):
+        if index > 0:
+            segment = segment.lstrip(' \t')
+        escaped_break = False
+        if index < last:
+            trailing = len(segment) - len(segment.rstrip('\\'))
+            if quote == '"' and trailing % 2:
+                # Interruzione di riga con escape: le righe vengono unite senza spazio
+                segment = segment[:-1]
+                escaped_break = True
+            else:
+                segment = segment.rstrip(' \t')
+        if 0 < index < last and not segment and not escaped_break:
+            breaks += 1
+            continue
+        if index > 0:
+            out.append('\n' * breaks if breaks or escaped else ' ')
+        out.append(decode(segment))
+        breaks = 0
+        escaped = escaped_break
+    return ''.join(out)
+
+def _read_block(lines: List[str], i: int, header: str, parent_indent: int, want: bool) -> Tuple[int, Optional[str]]:
+    """Scalare a blocco (| letterale o > ripiegato) con chomping e indentazione opzionali"""
+    folded = header[0] == '>'
+    chomping = None
+    explicit = None
+    for char in _strip_comment(header)[1:]:
+        if char in '+-':
+            chomping = char
+        elif char.isdigit():
+            explicit = int(char)
+
+    # Indentazione del contenuto: esplicita o quella della prima riga non vuota
+    j = i + 1
+    if explicit is not None:
+        indent = parent_indent + explicit
+    else:
+        indent = parent_indent + 1
+        k = j
+        max_blank = 0
+        while k < len(lines) and not lines[k].strip(' '):
+            max_blank = max(max_blank, len(lines[k]))
+            k += 1
+        if k < len(lines):
+            indent = max(indent, _indent_of(lines[k]), max_blank)
+
+    texts = []
+    gaps = {}  # indice in texts -> righe vuote che precedono quella riga
+    breaks = 0
+    prefix = ' ' * indent
+    count = len(lines)
+    while j < count:
+        line = lines[j]
+        if line.startswith(prefix) and len(line) > indent:
+            # Riga di contenuto (anche di soli spazi oltre l'indentazione)
+            if want:
+                if breaks:
+                    gaps[len(texts)] = breaks
+                texts.append(line[indent:])
+            breaks = 0
+        elif line.strip(' '):
+            break
+        else:
+            breaks += 1
+        j += 1
+    end = j
+    if not want:
+        return end, None
+
+    if not texts:
+        body = ''
+    elif not gaps and not (folded and any(text[:1] in (' ', '\t') for text in texts)):
+        # Caso comune: nessuna riga vuota né più indentata
+        body = (' ' if folded else '\n').join(texts)
+    else:
+        chunks = []
+        for index, text in enumerate(texts):
+            chunks.append('\n' * gaps.get(index, 0))
+            chunks.append(text)
+            if index + 1 < len(texts):
+                next_text = texts[index + 1]
+                if folded and text[:1] not in (' ', '\t') and next_text[:1] not in (' ', '\t'):
+                    if index + 1 not in gaps:
+                        chunks.append(' ')
+                else:
+                    chunks.append('\n')
+        body = ''.join(chunks)
+    if texts and chomping != '-':
+        body += '\n'
+    if chomping == '+':
+        body += '\n' * breaks
+    return end, body
+
+def parse_journal_yaml(text: str) -> Dict[str, Any]:
+    """
+    Estrae name, _id e le pagine da un journal Foundry in YAML
+
+    Returns:
+        {'name': ..., '_id': ..., 'pages': [{'name': ..., '_id': ..., 'content': ...}, ...]}
+        (le pagine nell'ordine del file; i campi assenti valgono None)
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+
+    journal: Dict[str, Any] = {'name': None, '_id': None, 'pages': []}
+    pages: Dict[int, Dict[str, Any]] = {}
+    # Pila dei contenitori aperti: (indentazione, percorso, è un elemento di lista)
+    stack: List[Tuple[int, tuple, bool]] = [(-1, (), False)]
+    counters: Dict[tuple, int] = {}
+
+    i = 0
+    count = len(lines)
+    while i < count:
+        line = lines[i]
+        rest = line.strip()
+        if not rest or rest[0] == '#':
+            i += 1
+            continue
+        column = len(line) - len(line.lstrip(' '))
+        if column == 0 and rest[0] in '-.' and rest[:3] in ('---', '...') and line[3:4] in ('', ' '):
+            # Marcatori di inizio e fine documento
+            i += 1
+            continue
+        dash_column = None
+
+        # Elementi di lista ("- chiave: valore" apre un elemento e prosegue sulla stessa riga)
+        while rest[0] == '-' and (len(rest) == 1 or rest[1] == ' '):
+            while stack[-1][0] > column or (stack[-1][0] == column and stack[-1][2]):
+                stack.pop()
+            parent = stack[-1][1]
+            index = counters.get(parent, 0)
+            counters[parent] = index + 1
+            stack.append((column, parent + (index,), True))
+            dash_column = column
+            after = rest[1:].lstrip(' ')
+            column += len(rest) - len(after)
+            rest = after
+            if not rest:
+                break
+        if not rest or rest[0] == '#':
+            i += 1
+            continue
+
+        match = _KEY_PATTERN.match(rest)
+        if not match:
+            # Scalare come elemento di lista: saltalo con le sue eventuali continuazioni
+            owner = dash_column if dash_column is not None else column - 1
+            if rest[0] in '\'"':
+                i, _ = _read_quoted(lines, i, rest, False)
+            else:
+                i, _ = _read_plain(lines, i, rest, owner, False)
+            continue
+
+        while stack[-1][0] >= column:
+            stack.pop()
+        key = _unquote_key(match.group(1))
+        path = stack[-1][1] + (key,)
+        value = rest[match.end():]
+
+        # Ancore e tag non interessano: scartali
+        while value and value[0] in '&!':
+            parts = value.split(None, 1)
+            value = parts[1] if len(parts) > 1 else ''
+
+        target = None
+        depth = len(path)
+        if depth == 1:
+            if path in _JOURNAL_FIELDS:
+                target = (journal, _JOURNAL_FIELDS[path])
+        elif depth >= 3 and path[0] == 'pages' and isinstance(path[1], int) and path[2:] in _PAGE_FIELDS:
+            page = pages.get(path[1])
+            if page is None:
+                page = pages[path[1]] = {'name': None, '_id': None, 'content': None}
+            target = (page, _PAGE_FIELDS[path[2:]])
+
+        if not value or value[0] == '#':
+            # Contenitore annidato (mappa o lista) nelle righe successive: analizzalo solo
+            # se può contenere valori da estrarre (pagine e text), altrimenti saltalo in blocco
+            if _is_relevant(path):
+                stack.append((column, path, False))
+                i += 1
+            else:
+                i = _skip_subtree(lines, i, column)
+            continue
+        if target is None and value[0] not in '|>\'"':
+            following = lines[i + 1] if i + 1 < count else None
+            if following is None or (not following.startswith(' ' * (column + 1)) and following.strip()):
+                # Scalare semplice su una sola riga che non interessa
+                i += 1
+                continue
+        if value[0] in '|>':
+            i, scalar = _read_block(lines, i, value, column, target is not None)
+        elif value[0] in '\'"':
+            i, scalar = _read_quoted(lines, i, value, target is not None)
+        else:
+            i, scalar = _read_plain(lines, i, value, column, target is not None)
+        if target is not None:
+            target[0][target[1]] = scalar
+
+    journal['pages'] = [pages[index] for index in sorted(pages)]
+    return journal
+
+def _journal_from_data(data: Any) -> Dict[str, Any]:
+    """Converte il documento caricato da PyYAML nella forma di parse_journal_yaml"""
+    def text(value):
+        return None if value is None else str(value)
+
+    if not isinstance(data, dict):
+        return {'name': None, '_id': None, 'pages': []}
+    pages = []
+    for page in data.get('pages') or []:
+        if not isinstance(page, dict):
+            continue
+        page_text = page.get('text')
+        content = page_text.get('content') if isinstance(page_text, dict) else None
+        pages.append({'name': text(page.get('name')), '_id': text(page.get('_id')), 'content': text(content)})
+    return {'name': text(data.get('name')), '_id': text(data.get('_id')), 'pages': pages}
+
+def load_journal_yaml(path: Path, use_libyaml: bool = False) -> Dict[str, Any]:
+    """
+    Legge un journal YAML da file
+
+    Args:
+        path: file .yml
+        use_libyaml: usa il loader C di PyYAML (se disponibile) invece del parser a righe
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if use_libyaml and YAML_C_AVAILABLE:
+        return _journal_from_data(yaml.load(text, Loader=yaml.CSafeLoader))
+    return parse_journal_yaml(text)
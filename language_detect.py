@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Riconoscimento della lingua (italiano/inglese) dei testi del compendio
+
+Sostituisce il controllo delle vocali accentate, che sbaglia sui testi italiani senza accenti
+("Palla di Fuoco", paragrafi brevi) e sui testi inglesi con accenti tipografici ("café",
+"déjà vu"). Ogni testo viene ripulito dall'HTML, ridotto alle lettere e scomposto in
+trigrammi di caratteri; il punteggio è il log-rapporto di verosimiglianza medio per
+trigramma tra i profili italiano e inglese (naive Bayes), costruiti una volta dai testi di
+esempio qui sotto:
+
+    punteggio > +MARGIN  -> 'it'
+    punteggio < -MARGIN  -> 'en'
+    altrimenti, o testo troppo corto -> '?'
+
+Con NumPy tutti i testi vengono classificati insieme in un'unica passata vettoriale
+(codifica in un solo buffer, pesi dei trigrammi indicizzati e sommati con bincount); senza
+NumPy lo stesso calcolo avviene testo per testo, con gli stessi risultati.
+
+Uso negli script:
+    detector = get_detector()
+    labels = detector.classify(texts)      # ['it', 'en', '?', ...]
+    if detector.is_italian(text): ...
+
+Uso da riga di comando: python language_detect.py [--list] [--packs spells,items]
+"""
+
+import argparse
+import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from compendium_io import FOUNDRY_ID, compendium_files, iter_entries
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+REPO_ROOT = Path(__file__).parent
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+
+# Campi di testo classificati da scan_compendium (a qualsiasi profondità delle voci)
+TEXT_FIELDS = ('name', 'description', 'text')
+# Log-rapporto medio minimo per decidere la lingua
+MARGIN = 0.15
+# Trigrammi minimi per decidere (sotto: '?')
+MIN_TRIGRAMS = 5
+# Caratteri di testo pulito considerati per voce: bastano per la lingua e limitano il costo
+MAX_SAMPLE_CHARS = 1000
+# Smoothing additivo dei conteggi dei profili
+SMOOTHING = 0.5
+
+# Alfabeto ridotto: 0 separatore, 1-26 lettere a-z, 27-31 vocali accentate
+_ALPHABET = 32
+_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+_ACCENTS = {'à': 27, 'á': 27, 'â': 27, 'è': 28, 'é': 28, 'ê': 28, 'ì': 29, 'í': 29, 'î': 29,
+            'ò': 30, 'ó': 30, 'ô': 30, 'ù': 31, 'ú': 31, 'û': 31}
+_SYMBOLS = {' ': 0, **{letter: index + 1 for index, letter in enumerate(_LETTERS)}, **_ACCENTS}
+_TRANSLATE = str.maketrans({char: chr(code) for char, code in _SYMBOLS.items()})
+_HTML_TAG = re.compile(r'<[^>]*>|&[a-zA-Z#0-9]+;|@\w+\[[^\]]*\](?:\{[^}]*\})?')
+_NOT_LETTER = re.compile(f"[^{_LETTERS}{''.join(_ACCENTS)}]+")
+
+# Testi di esempio dei profili: regole, nomi di incantesimi, mostri e oggetti
+PROFILE_TEXTS = {
+    'it': """
+        La creatura deve effettuare un tiro salvezza su Destrezza. Se fallisce subisce danni da fuoco
+        pari a 8d6, oppure la metà dei danni se lo supera. Quando lanci questo incantesimo usando
+        uno slot di livello superiore, i danni aumentano di 1d6 per ogni livello dello slot oltre il
+        terzo. Finché resta entro il raggio, il bersaglio ha svantaggio ai tiri per colpire e non può
+        effettuare reazioni fino all'inizio del tuo prossimo turno. Puoi usare un'azione bonus per
+        muoverti della metà della tua velocità; se sei prono, rialzarti costa metà del movimento.
+        Un personaggio che completa un riposo lungo recupera tutti i punti ferita perduti e metà
+        dei dadi vita spesi. Il master decide se la prova di caratteristica riesce, tenendo conto
+        della classe difficoltà, del bonus di competenza e del modificatore di Forza o Saggezza.
+        Le armi con la proprietà accurata permettono di usare la Destrezza al posto della Forza.
+        Il mago prepara gli incantesimi dal proprio libro dopo un riposo lungo; il chierico prega
+        la sua divinità, il druido attinge alla natura e il guerriero si affida alle armi.
+        Palla di Fuoco, Dardo Incantato, Scudo, Cura Ferite, Armatura Magica, Fulmine, Invisibilità,
+        Parola Guaritrice, Benedizione, Luce Diurna, Muro di Pietra, Porta Dimensionale, Charme su
+        Persone, Tocco Gelido, Spruzzo Velenoso, Raggio di Gelo, Mano Magica, Individuazione del Magico.
+        Drago Rosso Adulto, Ragno Gigante, Lupo Feroce, Scheletro, Orco, Capitano dei Banditi,
+        Sciame di Pipistrelli, Elementale del Fuoco, Gigante delle Colline, Tappeto Volante.
+        Spada Lunga, Arco Corto, Pozione di Guarigione, Anello di Protezione, Mantello Elfico,
+        Stivali della Velocità, Borsa Conservante, Corda di Canapa, Zaino, Torcia, Razioni.
+        Accecato, Affascinato, Assordato, Spaventato, Afferrato, Incapacitato, Paralizzato,
+        Pietrificato, Avvelenato, Prono, Trattenuto, Stordito, Privo di Sensi, Esaurimento.
+    """,
+    'en': """
+        The creature must make a Dexterity saving throw. It takes 8d6 fire damage on a failed save,
+        or half as much damage on a successful one. When you cast this spell using a spell slot of
+        4th level or higher, the damage increases by 1d6 for each slot level above 3rd. While it
+        remains within range, the target has disadvantage on attack rolls and can't take reactions
+        until the start of your next turn. You can use a bonus action to move up to half your speed;
+        if you are prone, standing up costs half of your movement. A character who finishes a long
+        rest regains all lost hit points and up to half of the spent hit dice. The Dungeon Master
+        decides whether the ability check succeeds, taking into account the difficulty class, your
+        proficiency bonus and your Strength or Wisdom modifier. Weapons with the finesse property
+        let you use Dexterity instead of Strength. The wizard prepares spells from their spellbook
+        after a long rest; the cleric prays to a deity, the druid draws on nature and the fighter
+        relies on weapons. Each time the effect ends, roll again with advantage.
+        Fireball, Magic Missile, Shield, Cure Wounds, Mage Armor, Lightning Bolt, Invisibility,
+        Healing Word, Bless, Daylight, Wall of Stone, Dimension Door, Charm Person, Chill Touch,
+        Poison Spray, Ray of Frost, Mage Hand, Detect Magic, Thunderwave, Hold Person.
+        Adult Red Dragon, Giant Spider, Dire Wolf, Skeleton, Ogre, Bandit Captain, Swarm of Bats,
+        Fire Elemental, Hill Giant, Flying Carpet, Animated Armor, Rug of Smothering.
+        Longsword, Shortbow, Potion of Healing, Ring of Protection, Cloak of Elvenkind, Boots of
+        Speed, Bag of Holding, Hempen Rope, Backpack, Torch, Rations, Thieves' Tools.
+        Blinded, Charmed, Deafened, Frightened, Grappled, Incapacitated, Paralyzed, Petrified,
+        Poisoned, Prone, Restrained, Stunned, Unconscious, Exhaustion.
+    """,
+}
+
+def prepare_text(text: str, limit: Optional[int] = MAX_SAMPLE_CHARS) -> str:
+    """Testo pulito per i trigrammi: senza HTML, minuscolo, solo lettere, bordato da spazi"""
+    if not text:
+        return ''
+    sample = text[:limit * 3] if limit else text
+    letters = _NOT_LETTER.sub(' ', _HTML_TAG.sub(' ', sample).lower()).strip()
+    if limit:
+        letters = letters[:limit]
+    return f" {letters} " if letters else ''
+
+def _trigram_ids(prepared: str) -> List[int]:
+    codes = prepared.translate(_TRANSLATE).encode('latin-1')
+    return [(codes[i] * _ALPHABET + codes[i + 1]) * _ALPHABET + codes[i + 2] for i in range(len(codes) - 2)]
+
+def compendium_names(compendium_dir: Path = COMPENDIUM_DIR) -> Dict[str, List[str]]:
+    """
+    Nomi etichettati dal compendio per arricchire i profili: le chiavi dei pack (nomi inglesi
+    originali) e i rispettivi campi name (italiani). Esclusi gli id Foundry e i nomi invariati.
+    """
+    names = {'it': [], 'en': []}
+    for json_file in compendium_files(compendium_dir).values():
+        for key, entry in iter_entries(json_file):
+            if not isinstance(key, str) or not isinstance(entry, dict) or FOUNDRY_ID.match(key):
+                continue
+            italian = entry.get('name')
+            if isinstance(italian, str) and italian.strip().lower() != key.strip().lower():
+                names['en'].append(key)
+                names['it'].append(italian)
+    return names
+
+class LanguageDetector:
+    """Classificatore italiano/inglese a trigrammi di caratteri, thread-safe"""
+
+    def __init__(self, profile_texts: Optional[Dict[str, str]] = None, margin: float = MARGIN,
+                 use_numpy: bool = NUMPY_AVAILABLE, compendium_dir: Optional[Path] = COMPENDIUM_DIR):
+        """
+        Args:
+            profile_texts: testi di esempio {'it', 'en'} (default: PROFILE_TEXTS)
+            compendium_dir: se indicato, i profili includono anche i nomi del compendio
+                (chiave inglese, name italiano); None per usare solo i testi di esempio
+        """
+        self.margin = margin
+        self.use_numpy = use_numpy and NUMPY_AVAILABLE
+        profiles = profile_texts or PROFILE_TEXTS
+        extra = compendium_names(compendium_dir) if compendium_dir and compendium_dir.exists() else {}
+        # Peso di ogni trigramma: log P(trigramma | it) - log P(trigramma | en)
+        size = _ALPHABET ** 3
+        counts = {}
+        for language in ('it', 'en'):
+            counts[language] = Counter(_trigram_ids(prepare_text(profiles[language], limit=None)))
+            for name in extra.get(language, ()):
+                counts[language].update(_trigram_ids(prepare_text(name)))
+        it_total = sum(counts['it'].values()) + SMOOTHING * size
+        en_total = sum(counts['en'].values()) + SMOOTHING * size
+        # I trigrammi mai visti in nessuno dei due profili non indicano una lingua (peso 0)
+        weights = array('d', [0.0]) * size
+        for trigram in set(counts['it']) | set(counts['en']):
+            weights[trigram] = (math.log((counts['it'].get(trigram, 0) + SMOOTHING) / it_total)
+                                - math.log((counts['en'].get(trigram, 0) + SMOOTHING) / en_total))
+        # Il trigramma di soli separatori non dice nulla sulla lingua
+        weights[0] = 0.0
+        self.weights = np.frombuffer(weights, dtype=np.float64) if self.use_numpy else weights
+
+    def scores(self, texts: Sequence[str]) -> List[Tuple[float, int]]:
+        """(log-rapporto medio it/en, numero di trigrammi) per ogni testo"""
+        prepared = [prepare_text(text) for text in texts]
+        if self.use_numpy:
+            return self._scores_numpy(prepared)
+        results = []
+        for text in prepared:
+            trigrams = [trigram for trigram in _trigram_ids(text) if trigram]
+            total = sum(self.weights[trigram] for trigram in trigrams)
+            results.append((total / len(trigrams) if trigrams else 0.0, len(trigrams)))
+        return results
+
+    def _scores_numpy(self, prepared: List[str]) -> List[Tuple[float, int]]:
+        if not prepared:
+            return []
+        # Tutti i testi in un unico buffer; i trigrammi a cavallo tra due testi vengono scartati
+        codes = np.frombuffer(''.join(prepared).translate(_TRANSLATE).encode('latin-1'), dtype=np.uint8)
+        lengths = np.fromiter((len(text) for text in prepared), dtype=np.int64, count=len(prepared))
+        rows = np.repeat(np.arange(len(prepared)), lengths)
+        if len(codes) < 3:
+            return [(0.0, 0)] * len(prepared)
+        codes = codes.astype(np.int64)
+        trigrams = (codes[:-2] * _ALPHABET + codes[1:-1]) * _ALPHABET + codes[2:]
+        valid = (rows[:-2] == rows[2:]) & (trigrams != 0)
+        trigram_rows = rows[:-2][valid]
+        sums = np.bincount(trigram_rows, weights=self.weights[trigrams[valid]], minlength=len(prepared))
+        counts = np.bincount(trigram_rows, minlength=len(prepared))
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        return list(zip(means.tolist(), counts.tolist()))
+
+    def label(self, score: float, trigrams: int) -> str:
+        if trigrams < MIN_TRIGRAMS:
+            return '?'
+        if score > self.margin:
+            return 'it'
+        if score < -self.margin:
+            return 'en'
+        return '?'
+
+    def classify(self, texts: Sequence[str]) -> List[str]:
+        """'it', 'en' o '?' (indeciso o troppo corto) per ogni testo, in una sola passata"""
+        return [self.label(score, trigrams) for score, trigrams in self.scores(texts)]
+
+    def detect(self, text: str) -> str:
+        return self.classify([text])[0]
+
+    def is_italian(self, text: str) -> bool:
+        return self.detect(text) == 'it'
+
+    def is_english(self, text: str) -> bool:
+        return self.detect(text) == 'en'
+
+_detector: Optional[LanguageDetector] = None
+_detector_lock = threading.Lock()
+
+def configure_detector(**kwargs) -> LanguageDetector:
+    """Ricrea il classificatore condiviso con i parametri indicati"""
+    global _detector
+    with _detector_lock:
+        _detector = LanguageDetector(**kwargs)
+    return _detector
+
+def get_detector() -> LanguageDetector:
+    """Restituisce il classificatore condiviso, costruendolo alla prima chiamata"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = LanguageDetector()
+        return _detector
+
+def iter_text_fields(value, path: str = '', fields: Sequence[str] = TEXT_FIELDS) -> Iterable[Tuple[str, str, str]]:
+    """(percorso, campo, testo) dei campi di testo di una voce, anche annidati (pagine, capitoli)"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            child = f"{path}/{key}" if path else str(key)
+            if isinstance(item, str):
+                if key in fields:
+                    yield child, key, item
+            else:
+                yield from iter_text_fields(item, child, fields)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from iter_text_fields(item, f"{path}[{index}]", fields)
+
+def _read_pack_texts(json_file: Path, fields: Sequence[str]) -> List[Tuple[str, str, str, str]]:
+    texts = []
+    for key, entry in iter_entries(json_file):
+        for path, field, text in iter_text_fields(entry, str(key), fields):
+            texts.append((str(key), path, field, text))
+    return texts
+
+def scan_compendium(compendium_dir: Path = COMPENDIUM_DIR, packs: Optional[Sequence[str]] = None,
+                    fields: Sequence[str] = TEXT_FIELDS,
+                    detector: Optional[LanguageDetector] = None) -> List[Dict]:
+    """
+    Classifica tutti i campi di testo del compendio: file letti in parallelo, una sola classificazione
+
+    Returns:
+        [{'pack', 'key', 'path', 'field', 'lang', 'score'}] nell'ordine dei file
+    """
+    files = compendium_files(compendium_dir, packs)
+    with ThreadPoolExecutor(max_workers=min(8, len(files) or 1)) as executor:
+        per_pack = list(executor.map(lambda path: _read_pack_texts(path, fields), files.values()))
+    rows = [(pack, *item) for pack, items in zip(files, per_pack) for item in items]
+    detector = detector or get_detector()
+    scored = detector.scores([row[4] for row in rows])
+    return [{'pack': pack, 'key': key, 'path': path, 'field': field,
+             'lang': detector.label(score, trigrams), 'score': round(score, 3)}
+            for (pack, key, path, field, _), (score, trigrams) in zip(rows, scored)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Lingua dei campi di testo del compendio (italiano/inglese)")
+    parser.add_argument('--packs', help="pack da analizzare separati da virgola (default: tutti)")
+    parser.add_argument('--list', action='store_true', help="elenca i campi riconosciuti come inglesi")
+    parser.add_argument('--no-numpy', action='store_true', help="usa il calcolo senza NumPy")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    detector = configure_detector(use_numpy=not args.no_numpy)
+    built = time.perf_counter()
+    packs = [pack.strip() for pack in args.packs.split(',')] if args.packs else None
+    results = scan_compendium(packs=packs, detector=detector)
+    elapsed = time.perf_counter() - built
+
+    per_pack: Dict[str, Counter] = {}
+    for result in results:
+        per_pack.setdefault(result['pack'], Counter())[result['lang']] += 1
+    print(f"🌐 Lingua dei campi {', '.join(TEXT_FIELDS)} ({'NumPy' if detector.use_numpy else 'Python'})\n")
+    for pack, counts in per_pack.items():
+        flag = '⚠️ ' if counts['en'] else '✅'
+        print(f"   {flag} {pack:16} it {counts['it']:5}  en {counts['en']:5}  ? {counts['?']:5}")
+    if args.list:
+        print("\n🇬🇧 Campi in inglese:")
+        for result in results:
+            if result['lang'] == 'en':
+                print(f"   {result['pack']}: {result['path']} ({result['score']:+.2f})")
+    total = Counter(result['lang'] for result in results)
+    print(f"\n📊 {len(results)} campi: {total['it']} italiani, {total['en']} inglesi, {total['?']} indecisi "
+          f"in {elapsed * 1000:.0f}ms (profili {(built - start) * 1000:.0f}ms)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Indice delle voci originali inglesi (origin/packs/_source)
+Scansiona tutti i pack in un solo passaggio, in parallelo, leggendo di ogni file YAML solo
+le righe necessarie a trovare _id e name. L'indice viene salvato su disco e aggiornato in
+modo incrementale: ai run successivi si rileggono solo i file con mtime cambiato.
+
+Formato: {pack: {id: (name, path relativo al pack, mtime_ns)}}
+"""
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from compendium_io import atomic_write_json
+
+REPO_ROOT = Path(__file__).parent
+ORIGIN_PACKS_DIR = REPO_ROOT / 'origin/packs/_source'
+DEFAULT_INDEX_FILE = REPO_ROOT / '.cache' / 'origin_index.json'
+INDEX_VERSION = 1
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+OriginIndex = Dict[str, Dict[str, Tuple[str, str, int]]]
+
+def read_id_and_name(yml_file: Path) -> Optional[Tuple[str, str]]:
+    """
+    Legge _id e name di primo livello da un file YAML, fermandosi appena li trova
+
+    Returns:
+        (id, nome) oppure None se uno dei due manca
+    """
+    entry_id = None
+    name = None
+    try:
+        with open(yml_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if entry_id is None and line.startswith('_id:'):
+                    entry_id = line[4:].strip() or None
+                elif name is None and line.startswith('name:'):
+                    name = line[5:].strip() or None
+                if entry_id is not None and name is not None:
+                    return entry_id, name
+    except Exception as e:
+        print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+    return None
+
+def _scan_pack_files(pack_dir: Path) -> Iterator[Tuple[str, int]]:
+    """Elenca i file .yml di un pack (ricorsivamente) con il loro mtime"""
+    stack = [pack_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        stack.append(Path(item.path))
+                    elif item.name.endswith('.yml') and not item.name.startswith('_'):
+                        yield os.path.relpath(item.path, pack_dir), item.stat().st_mtime_ns
+        except OSError as e:
+            print(f"   ⚠️  Errore lettura {current}: {e}")
+
+def load_index(index_file: Path = DEFAULT_INDEX_FILE) -> OriginIndex:
+    """Carica l'indice salvato (vuoto se assente o di una versione diversa)"""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if stored.get('version') != INDEX_VERSION:
+        return {}
+    return {
+        pack: {entry_id: tuple(value) for entry_id, value in entries.items()}
+        for pack, entries in stored.get('packs', {}).items()
+    }
+
+def save_index(index: OriginIndex, index_file: Path = DEFAULT_INDEX_FILE):
+    """Salva l'indice su disco (file temporaneo univoco + os.replace, sicuro tra thread)"""
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(index_file, {'version': INDEX_VERSION, 'packs': index}, indent=None)
+
+def build_origin_index(packs: Optional[List[str]] = None, origin_dir: Path = ORIGIN_PACKS_DIR,
+                       index_file: Optional[Path] = DEFAULT_INDEX_FILE, verbose: bool = False) -> OriginIndex:
+    """
+    Costruisce (o aggiorna) l'indice dei pack originali
+
+    Args:
+        packs: pack da indicizzare (None = tutti quelli presenti in origin_dir)
+        origin_dir: directory dei sorgenti originali
+        index_file: file dell'indice persistente (None = nessuna persistenza)
+        verbose: stampa un riepilogo
+
+    Returns:
+        {pack: {id: (nome, path relativo al pack, mtime_ns)}}
+    """
+    previous = load_index(index_file) if index_file else {}
+    if packs is None:
+        packs = sorted(p.name for p in origin_dir.iterdir() if p.is_dir()) if origin_dir.exists() else []
+
+    index: OriginIndex = {}
+    to_read = []  # (pack, path relativo, mtime)
+    reused = 0
+
+    for pack in packs:
+        pack_dir = origin_dir / pack
+        index[pack] = {}
+        if not pack_dir.is_dir():
+            continue
+        # path -> (id, nome, mtime) dell'indice precedente
+        known = {path: (entry_id, name, mtime) for entry_id, (name, path, mtime) in previous.get(pack, {}).items()}
+        for rel_path, mtime in _scan_pack_files(pack_dir):
+            cached = known.get(rel_path)
+            if cached and cached[2] == mtime:
+                entry_id, name, _ = cached
+                index[pack][entry_id] = (name, rel_path, mtime)
+                reused += 1
+            else:
+                to_read.append((pack, rel_path, mtime))
+
+    # Leggi in parallelo solo i file nuovi o modificati
+    if to_read:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(lambda job: read_id_and_name(origin_dir / job[0] / job[1]), to_read)
+            for (pack, rel_path, mtime), result in zip(to_read, results):
+                if result:
+                    entry_id, name = result
+                    index[pack][entry_id] = (name, rel_path, mtime)
+
+    # Ordina per path, come la vecchia scansione sorted(rglob(...))
+    for pack in index:
+        index[pack] = dict(sorted(index[pack].items(), key=lambda item: Path(item[1][1])))
+
+    # Mantieni i pack indicizzati in precedenza ma non richiesti in questo run
+    merged = dict(previous)
+    merged.update(index)
+    if index_file and (to_read or merged != previous):
+        save_index(merged, index_file)
+
+    if verbose:
+        total = sum(len(entries) for entries in index.values())
+        print(f"🗂️  Indice origin: {total} voci in {len(index)} pack "
+              f"({len(to_read)} file letti, {reused} dall'indice)")
+
+    return index
+
+_index: Optional[OriginIndex] = None
+_index_lock = threading.Lock()
+
+def get_origin_index() -> OriginIndex:
+    """Restituisce l'indice di tutti i pack, costruendolo alla prima chiamata del processo"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = build_origin_index(verbose=True)
+        return _index
+
+def configure_origin_index(**kwargs) -> OriginIndex:
+    """Costruisce l'indice condiviso con i parametri indicati (es. un'altra origin_dir)"""
+    global _index
+    with _index_lock:
+        _index = build_origin_index(**kwargs)
+        return _index
+
+def iter_origin_entries(pack: str) -> Iterator[Dict[str, str]]:
+    """Itera le voci originali di un pack come dizionari {'id', 'name', 'file'}, ordinate per path"""
+    for entry_id, (name, rel_path, _) in get_origin_index().get(pack, {}).items():
+        yield {'id': entry_id, 'name': name, 'file': Path(rel_path).name}
+
+def main():
+    """Ricostruisce l'indice e stampa un riepilogo per pack"""
+    if not ORIGIN_PACKS_DIR.exists():
+        print(f"❌ Directory {ORIGIN_PACKS_DIR.relative_to(REPO_ROOT)} non trovata!")
+        sys.exit(1)
+    index_file = None if '--no-save' in sys.argv else DEFAULT_INDEX_FILE
+    index = build_origin_index(index_file=index_file, verbose=True)
+    for pack, entries in index.items():
+        print(f"  📦 {pack}: {len(entries)} voci")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Statistiche di successo dei pattern di URL per endpoint di quintaedizione.online
+
+Per ogni endpoint (incantesimi, mostri, equipaggiamenti, classi) conta tentativi e successi di
+ogni pattern di URL, ordina i pattern dal più al meno efficace ed esclude quelli che non hanno
+mai funzionato dopo abbastanza tentativi (con una piccola quota di esplorazione per accorgersi
+se il sito cambia). Le statistiche vengono salvate tra un run e l'altro.
+"""
+
+import json
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).parent
+DEFAULT_STATS_FILE = REPO_ROOT / '.cache' / 'url_patterns.json'
+
+# Tentativi senza successi oltre i quali un pattern viene escluso
+PRUNE_MIN_ATTEMPTS = 20
+# Probabilità di provare comunque un pattern escluso
+EXPLORE_RATE = 0.05
+
+class PatternStats:
+    """Tentativi e successi per (endpoint, pattern), thread-safe"""
+
+    def __init__(self, path: Optional[Path] = DEFAULT_STATS_FILE, explore_rate: float = EXPLORE_RATE,
+                 prune_min_attempts: int = PRUNE_MIN_ATTEMPTS):
+        self.path = Path(path) if path else None
+        self.explore_rate = explore_rate
+        self.prune_min_attempts = prune_min_attempts
+        self.stats: Dict[str, Dict[str, List[int]]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        if self.path:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError):
+                self.stats = {}
+
+    def _score(self, attempts: int, hits: int) -> float:
+        # Tasso di successo con smoothing di Laplace: i pattern nuovi partono da 0.5
+        return (hits + 1) / (attempts + 2)
+
+    def order(self, endpoint: str, patterns: List[str]) -> List[str]:
+        """
+        Pattern da provare per l'endpoint, dal più promettente
+
+        I pattern con almeno prune_min_attempts tentativi e nessun successo vengono esclusi,
+        purché un altro pattern dell'endpoint abbia avuto successo (salvo esplorazione casuale).
+        """
+        with self._lock:
+            endpoint_stats = self.stats.get(endpoint, {})
+            scored = []
+            any_hits = any(hits for _, hits in endpoint_stats.values())
+            for index, name in enumerate(patterns):
+                attempts, hits = endpoint_stats.get(name, (0, 0))
+                if (any_hits and hits == 0 and attempts >= self.prune_min_attempts
+                        and self._random.random() >= self.explore_rate):
+                    continue
+                # A parità di punteggio mantieni l'ordine originale
+                scored.append((-self._score(attempts, hits), index, name))
+        return [name for _, _, name in sorted(scored)]
+
+    def record(self, endpoint: str, pattern: str, hit: bool):
+        """Registra l'esito di un tentativo"""
+        with self._lock:
+            counts = self.stats.setdefault(endpoint, {}).setdefault(pattern, [0, 0])
+            counts[0] += 1
+            if hit:
+                counts[1] += 1
+
+    def save(self):
+        """Salva le statistiche su disco"""
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.path)
+
+    def summary(self) -> List[str]:
+        """Righe di riepilogo per endpoint e pattern"""
+        lines = []
+        with self._lock:
+            for endpoint, patterns in sorted(self.stats.items()):
+                parts = [f"{name} {hits}/{attempts}" for name, (attempts, hits) in patterns.items()]
+                lines.append(f"{endpoint}: " + ", ".join(parts))
+        return lines
+
+_stats: Optional[PatternStats] = None
+
+def get_pattern_stats() -> PatternStats:
+    """Restituisce le statistiche condivise, caricandole alla prima chiamata"""
+    global _stats
+    if _stats is None:
+        _stats = PatternStats()
+    return _stats
+
+def configure_pattern_stats(**kwargs) -> PatternStats:
+    """Crea (o ricrea) le statistiche condivise con i parametri indicati"""
+    global _stats
+    _stats = PatternStats(**kwargs)
+    return _stats
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Pipeline unica e non interattiva per l'aggiornamento delle traduzioni
+
+Sostituisce le esecuzioni manuali in sequenza di translate_rules.py,
+extract_translations_from_pdf.py e translate_missing_via_api.py. Le fasi sono:
+
+    index     indice delle voci originali (origin_index)
+    rules     completamento delle regole dai YAML originali (translate_rules)
+    pdf       estrazione dal PDF SRD italiano (extract_translations_from_pdf)
+    api       traduzione via quintaedizione.online, un task per pack
+    validate  controllo della struttura dei file del compendio, un task per pack
+    report    report di copertura e qualità dei pack (coverage_report) e coerenza della
+              terminologia (terminology_check), dopo tutti gli altri task
+
+Ogni fase è divisa in task con dipendenze esplicite (grafo aciclico): un task parte appena
+i task da cui dipende sono terminati, così pack indipendenti vengono elaborati in parallelo
+(es. le regole mentre i pack API attendono la rete). Se un task fallisce, i task che ne
+dipendono vengono saltati. L'output di ogni task viene raccolto e stampato a blocchi quando
+il task termina, per non mescolare le righe dei task in parallelo.
+
+Uso:
+    python pipeline.py                                   # tutte le fasi, tutti i pack
+    python pipeline.py --stages api,validate --packs spells24,classes24
+    python pipeline.py --stages rules,pdf --jobs 2
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import translate_missing_via_api as api
+from coverage_report import write_report
+from extract_translations_from_pdf import extract_translations_from_pdf
+from origin_index import configure_origin_index
+from run_metrics import add_metrics_arguments, finish_run, get_metrics, start_run
+from terminology_check import write_terminology_report
+from translate_rules import translate_rules
+from upstream_sync import read_babele_packs
+
+REPO_ROOT = Path(__file__).parent
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+
+STAGES = ('index', 'rules', 'pdf', 'api', 'validate', 'report')
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) + 4)
+
+class Task:
+    """Un nodo del grafo: una fase applicata a un pack (o a tutti, pack=None)"""
+
+    def __init__(self, name: str, stage: str, pack: Optional[str], func: Callable[[], Optional[bool]],
+                 deps: Tuple[str, ...] = ()):
+        self.name = name
+        self.stage = stage
+        self.pack = pack
+        self.func = func
+        self.deps = deps
+        self.status = 'pending'  # pending, running, ok, failed, skipped
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+
+class _ThreadStdout(io.TextIOBase):
+    """sys.stdout che scrive nel buffer del task in esecuzione sul thread corrente"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+class _InlineExecutor:
+    """Esecutore senza thread: con --jobs 1 i task girano sul thread principale (e sotto il suo profiler)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, func: Callable, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+def validate_pack(pack: str, file_name: str, compendium_dir: Path = COMPENDIUM_DIR) -> bool:
+    """
+    Controlla la struttura di un file del compendio registrato in Babele
+
+    Errori: JSON non valido, 'entries' mancante o di tipo errato, voci senza nome, voci a lista
+    senza id. Avvisi (non bloccanti): label mancante, id duplicati (Babele usa il primo).
+
+    Returns:
+        True se non ci sono errori
+    """
+    json_file = compendium_dir / file_name
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ {file_name}: {e}")
+        return False
+
+    errors = []
+    warnings = []
+    entries = data.get('entries') if isinstance(data, dict) else None
+    if isinstance(entries, list):
+        values = entries
+        ids = Counter(entry.get('id') for entry in entries if isinstance(entry, dict))
+        missing_id = sum(1 for entry in entries if not isinstance(entry, dict) or not entry.get('id'))
+        if missing_id:
+            errors.append(f"{missing_id} voci senza id")
+        duplicates = sum(1 for entry_id, count in ids.items() if entry_id and count > 1)
+        if duplicates:
+            warnings.append(f"{duplicates} id duplicati")
+    elif isinstance(entries, dict):
+        values = list(entries.values())
+    else:
+        print(f"❌ {file_name}: 'entries' mancante o non valido")
+        return False
+
+    unnamed = sum(1 for entry in values if not isinstance(entry, dict) or not entry.get('name'))
+    if unnamed:
+        errors.append(f"{unnamed} voci senza nome")
+    if not data.get('label'):
+        warnings.append("label mancante")
+
+    for warning in warnings:
+        print(f"⚠️  {file_name}: {warning}")
+    for error in errors:
+        print(f"❌ {file_name}: {error}")
+    if not errors:
+        print(f"✅ {file_name}: {len(values)} voci")
+    return not errors
+
+def index_origin(packs: List[str]) -> bool:
+    """
+    Aggiorna l'indice condiviso delle voci originali, usato poi da tutti i task API senza
+    ricostruirlo; fallisce se non trova sorgenti per i pack richiesti
+    """
+    index = configure_origin_index(verbose=True)
+    if not any(index.get(pack) for pack in packs):
+        print("❌ Nessuna voce originale trovata (origin/packs/_source mancante?)")
+        return False
+    return True
+
+def build_plan(stages: List[str], packs: Optional[List[str]], resume: bool = False,
+               babele_packs: Optional[Dict[str, str]] = None) -> List[Task]:
+    """
+    Costruisce i task delle fasi richieste, filtrati per pack
+
+    Le dipendenze seguono i dati: pdf dopo rules (stesso file), i pack API dopo l'indice,
+    la validazione di un pack dopo ogni task che lo scrive. Le dipendenze verso fasi non
+    selezionate vengono ignorate (si assume che siano già state eseguite).
+    """
+    if babele_packs is None:
+        babele_packs = read_babele_packs()
+
+    def selected(pack: str) -> bool:
+        return packs is None or pack in packs
+
+    api_packs = [pack for pack in api.API_PACKS if selected(pack)]
+    tasks: List[Task] = []
+
+    if 'index' in stages and api_packs:
+        tasks.append(Task('index', 'index', None, lambda: index_origin(api_packs)))
+    if 'rules' in stages and selected('rules'):
+        tasks.append(Task('rules', 'rules', 'rules', translate_rules))
+    if 'pdf' in stages and selected('rules'):
+        tasks.append(Task('pdf', 'pdf', 'rules', extract_translations_from_pdf, deps=('rules',)))
+    if 'api' in stages:
+        for pack in api_packs:
+            translate = api.API_PACKS[pack]
+            tasks.append(Task(f"api:{pack}", 'api', pack, lambda translate=translate: translate(resume=resume),
+                              deps=('index',)))
+    if 'validate' in stages:
+        for pack, file_name in babele_packs.items():
+            if not selected(pack):
+                continue
+            writers = tuple(task.name for task in tasks if task.pack == pack)
+            tasks.append(Task(f"validate:{pack}", 'validate', pack,
+                              lambda pack=pack, file_name=file_name: validate_pack(pack, file_name),
+                              deps=writers))
+
+    if 'report' in stages:
+        report_packs = [pack for pack in babele_packs if selected(pack)]
+        writers = tuple(task.name for task in tasks)
+        tasks.append(Task('report', 'report', None,
+                          lambda: bool(write_report(None if packs is None else report_packs)),
+                          deps=writers))
+        tasks.append(Task('report:terminology', 'report', None,
+                          lambda: write_terminology_report() is not None, deps=writers))
+
+    names = {task.name for task in tasks}
+    for task in tasks:
+        task.deps = tuple(dep for dep in task.deps if dep in names)
+    return tasks
+
+def _run_task(task: Task, stdout: _ThreadStdout) -> str:
+    """Esegue un task raccogliendone l'output; restituisce l'output raccolto"""
+    stdout.local.buffer = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with get_metrics().stage(task.name, task.pack) as record:
+            result = task.func()
+            task.status = 'failed' if result is False else 'ok'
+            record['status'] = task.status
+    except Exception as e:
+        task.status = 'failed'
+        task.error = f"{type(e).__name__}: {e}"
+        print(f"❌ {task.error}")
+    finally:
+        task.seconds = time.perf_counter() - start
+        output = stdout.local.buffer.getvalue()
+        stdout.local.buffer = None
+    return output
+
+def run_plan(tasks: List[Task], jobs: int = DEFAULT_JOBS, quiet: bool = False) -> bool:
+    """
+    Esegue i task rispettando le dipendenze, fino a jobs task contemporanei
+
+    Returns:
+        True se tutti i task sono terminati senza errori
+    """
+    by_name = {task.name: task for task in tasks}
+    stdout = _ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else _InlineExecutor()
+        with executor:
+            running = {}
+            while True:
+                for task in tasks:
+                    if task.status != 'pending':
+                        continue
+                    dep_status = [by_name[dep].status for dep in task.deps]
+                    if any(status in ('failed', 'skipped') for status in dep_status):
+                        task.status = 'skipped'
+                        stdout.stream.write(f"⏭️  {task.name}: saltato (dipendenza non riuscita)\n")
+                    elif all(status == 'ok' for status in dep_status):
+                        task.status = 'running'
+                        stdout.stream.write(f"▶️  {task.name}\n")
+                        running[executor.submit(_run_task, task, stdout)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    output = future.result()
+                    if output.strip() and (not quiet or task.status == 'failed'):
+                        stdout.stream.write(f"\n----- {task.name} -----\n{output.rstrip()}\n\n")
+                    icon = '✅' if task.status == 'ok' else '❌'
+                    stdout.stream.write(f"{icon} {task.name} ({task.seconds:.1f}s)\n")
+    finally:
+        sys.stdout = stdout.stream
+    return all(task.status == 'ok' for task in tasks)
+
+def parse_list(value: Optional[str]) -> Optional[List[str]]:
+    if not value or value == 'all':
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Esegue la pipeline di traduzione senza interazione")
+    parser.add_argument('--stages', default='all',
+                        help=f"fasi da eseguire, separate da virgola ({', '.join(STAGES)} o all)")
+    parser.add_argument('--packs', default='all',
+                        help="pack da elaborare, separati da virgola (nomi di main.js, es. spells24,rules)")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f"task contemporanei (default: {DEFAULT_JOBS})")
+    parser.add_argument('--quiet', action='store_true', help="mostra solo l'output dei task falliti")
+    parser.add_argument('--dry-run', action='store_true', help="mostra il grafo dei task senza eseguirlo")
+    api.add_network_arguments(parser)
+    add_metrics_arguments(parser, 'pipeline')
+    args = parser.parse_args()
+
+    stages = parse_list(args.stages) or list(STAGES)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"fasi sconosciute: {', '.join(unknown)}")
+    babele_packs = read_babele_packs()
+    packs = parse_list(args.packs)
+    if packs:
+        unknown = [pack for pack in packs if pack not in babele_packs]
+        if unknown:
+            parser.error(f"pack non registrati in main.js: {', '.join(unknown)}")
+    if args.offline and args.no_cache:
+        parser.error("--offline richiede la cache (incompatibile con --no-cache)")
+    if args.profile and args.jobs != 1:
+        # Il profiler del processo segue solo il thread principale: i task devono girare lì
+        print("🔬 --profile: task eseguiti uno alla volta (--jobs 1)")
+        args.jobs = 1
+
+    # translate_rules e extract_translations_from_pdf usano percorsi relativi alla radice
+    os.chdir(REPO_ROOT)
+
+    tasks = build_plan(stages, packs, resume=args.resume, babele_packs=babele_packs)
+    print("=" * 70)
+    print("🛠️  PIPELINE DI TRADUZIONE")
+    print("=" * 70)
+    print(f"📋 {len(tasks)} task, fino a {args.jobs} in parallelo")
+    for task in tasks:
+        print(f"   {task.name}" + (f" ← {', '.join(task.deps)}" if task.deps else ''))
+    print()
+    if args.dry_run or not tasks:
+        return
+
+    uses_api = any(task.stage == 'api' for task in tasks)
+    if uses_api:
+        api.configure_network(args)
+        if not args.offline and not api.REQUESTS_AVAILABLE:
+            print("⚠️  Libreria 'requests' non disponibile: i task API non troveranno traduzioni\n")
+
+    start_run(args)
+    start = time.perf_counter()
+    ok = run_plan(tasks, jobs=args.jobs, quiet=args.quiet)
+    elapsed = time.perf_counter() - start
+
+    if uses_api:
+        api.print_network_summary()
+    finish_run(args)
+
+    counts = Counter(task.status for task in tasks)
+    print("\n" + "=" * 70)
+    print(f"📊 {counts['ok']} completati, {counts['failed']} falliti, {counts['skipped']} saltati "
+          f"in {elapsed:.1f}s")
+    print("=" * 70)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
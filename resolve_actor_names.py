@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Risolutore dei nomi composti degli attori (actors24)
+
+Molti nomi degli attori 2024 sono composti da nomi già tradotti in altri pack ("Azer Sentinel",
+"Animated Rug of Smothering", "Carpet of Flying (3 by 5 ft.)"): la ricerca del nome intero
+fallisce o trova solo una parte ("Azer"). Il risolutore scompone ogni nome in testa,
+modificatori e parentesi, traduce le parti con un glossario e le ricompone in ordine italiano:
+
+- testa per prima, modificatori dopo in ordine inverso ("Adult Green Dragon" -> "Drago Verde Adulto")
+- "X of Y" -> "X di/del/della... Y" ("Swarm of Bats" -> "Sciame di Pipistrelli")
+- aggettivi in -o/-a concordati con la testa ("Animata" -> "Animato" per "Tappeto")
+- parentesi in fondo, con le misure convertite ("(3 by 5 ft.)" -> "(3x5 piedi)")
+
+Il glossario viene costruito una volta da dnd5e.monsters.json, dnd5e.items.json e dalle mappe
+'folders' di tutti i pack; le forme dei modificatori ("Giant" -> "Gigante", dopo la testa) e
+dei complementi ("of the Crab" -> "del Granchio") si ricavano allineando i nomi composti già
+tradotti. Ogni proposta ha una confidenza (prodotto delle confidenze delle parti): i nomi con
+parti sconosciute restano senza proposta e le parole mancanti vengono elencate.
+
+Le proposte vengono scritte in dnd5e.actors24.REVIEW.json e dnd5e.actors24.UNTRANSLATED.json
+accanto alle voci esistenti; le voci di actors24 tradotte in modo diverso dalla proposta (con
+confidenza sufficiente) vengono aggiunte alla revisione. I nomi inglesi vengono dall'indice di
+origin/packs/_source e dai campi name_en dei file di revisione.
+
+Uso: python resolve_actor_names.py [--dry-run] [--min-confidence 0.6] ["Azer Sentinel" ...]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from compendium_io import PACKS_FOLDERS_FILE, atomic_write_json, compendium_files, iter_entries, read_header
+from origin_index import ORIGIN_PACKS_DIR, get_origin_index
+from translation_memory import normalize_term
+
+REPO_ROOT = Path(__file__).parent
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+ACTORS_FILE = COMPENDIUM_DIR / 'dnd5e.actors24.json'
+REVIEW_FILE = COMPENDIUM_DIR / 'dnd5e.actors24.REVIEW.json'
+UNTRANSLATED_FILE = COMPENDIUM_DIR / 'dnd5e.actors24.UNTRANSLATED.json'
+GLOSSARY_PACKS = ('monsters', 'items')
+
+# Confidenza delle singole parti
+CONF_GLOSSARY = 0.95      # nome presente nel glossario
+CONF_LEARNED = 0.85       # forma ricavata allineando nomi composti
+CONF_PROPER = 0.7         # nome proprio lasciato invariato (es. "Azer")
+CONF_APPOSITION = 0.7     # sostantivo usato come modificatore ("Minotaur Skeleton")
+CONF_AGREEMENT = 0.9      # aggettivo concordato con la testa
+CONF_ARTICLE = 0.8        # preposizione articolata scelta dal genere del sostantivo
+CONF_ARTICLE_GUESS = 0.65  # ... con genere incerto (sostantivi in -e)
+CONF_RULE = 0.95          # parentesi convertita con una regola (misure)
+# Confidenza minima per aggiungere alla revisione una voce tradotta diversamente
+MIN_CONFIDENCE = 0.6
+
+_PARENTHETICAL = re.compile(r'^(.*?)\s*\(([^()]*)\)$')
+_SIZE = re.compile(r'^(\d+)\s*by\s*(\d+)\s*(?:ft|feet)\.?$', re.IGNORECASE)
+# "Armatura dell'Invulnerabilità" -> ("Armatura", "dell'", "Invulnerabilità")
+_IT_COMPLEMENT = re.compile(r"^(.+?) ((?:di|del|dello|della|dei|degli|delle) |d['’]|dell['’])(.+)$")
+_ARTICLES = ('the', 'a', 'an')
+_VOWELS = 'aeiouàèéìòù'
+
+def _gender(italian: str) -> Optional[str]:
+    """Genere dalla desinenza della prima parola: 'm' (-o, -i), 'f' (-a), None se incerto"""
+    word = italian.split()[0].lower() if italian.split() else ''
+    if word.endswith(('o', 'i')):
+        return 'm'
+    if word.endswith('a'):
+        return 'f'
+    return None
+
+def _agree(text: str, source: Optional[str], target: Optional[str]) -> Tuple[str, bool]:
+    """Concorda un aggettivo (invariabile se inizia con una preposizione) con il genere della testa"""
+    if not source or not target or source == target or _IT_COMPLEMENT.match('x ' + text):
+        return text, False
+    old, new = ('o', 'a') if source == 'm' else ('a', 'o')
+    words = [word[:-1] + new if word.endswith(old) else word for word in text.split()]
+    result = ' '.join(words)
+    return result, result != text
+
+def _preposition(noun: str) -> Tuple[str, float]:
+    """Preposizione articolata "di + articolo" davanti al sostantivo italiano, con la sua confidenza"""
+    first = noun.split()[0]
+    lower = first.lower()
+    if not first[:1].isupper() or lower[:1] not in 'abcdefghijklmnopqrstuvwxyzàèéìòù':
+        return 'di ', CONF_ARTICLE_GUESS
+    if lower[:1] in _VOWELS:
+        return "dell'", CONF_ARTICLE
+    impure = lower.startswith(('z', 'gn', 'ps', 'x')) or (lower[:1] == 's' and lower[1:2] not in _VOWELS)
+    if lower.endswith('a'):
+        return 'della ', CONF_ARTICLE
+    if lower.endswith('o'):
+        return ('dello ' if impure else 'del '), CONF_ARTICLE
+    if lower.endswith('i'):
+        return ('degli ' if impure else 'dei '), CONF_ARTICLE
+    # Sostantivi in -e: femminili i suffissi più comuni, maschili gli altri
+    if lower.endswith(('ione', 'ice', 'ite', 'ude', 'ie', 'rte', 'de')):
+        return 'della ', CONF_ARTICLE_GUESS
+    return ('dello ' if impure else 'del '), CONF_ARTICLE_GUESS
+
+class Glossary:
+    """Glossario EN -> IT di nomi, modificatori, complementi e parentesi, con le rispettive fonti"""
+
+    def __init__(self):
+        self.phrases: Dict[str, Tuple[str, float]] = {}        # nome normalizzato -> (italiano, confidenza)
+        self.modifiers: Dict[str, Tuple[str, Optional[str]]] = {}  # parola -> (forma dopo la testa, genere)
+        self.complements: Dict[str, Tuple[str, Optional[str]]] = {}  # Y di "X of Y" -> ("della Morte", genere)
+        self.parentheticals: Dict[str, str] = {}               # contenuto delle parentesi
+        self.proper: Set[str] = set()                          # parole non tradotte (nomi propri)
+
+    def add(self, english: str, italian: str, confidence: float = CONF_GLOSSARY):
+        """Registra un nome (il primo registrato vince); nomi identici all'inglese solo se di una parola"""
+        if not english or not italian:
+            return
+        english, italian = english.strip(), italian.strip()
+        match_en = _PARENTHETICAL.match(english)
+        match_it = _PARENTHETICAL.match(italian)
+        if match_en and match_it:
+            self.parentheticals.setdefault(normalize_term(match_en.group(2)), match_it.group(2))
+        norm = normalize_term(english)
+        if not norm:
+            return
+        if normalize_term(italian) == norm:
+            if ' ' not in norm:
+                self.proper.add(norm)
+            return
+        self.phrases.setdefault(norm, (italian, confidence))
+
+    def learn(self, passes: int = 3) -> int:
+        """
+        Ricava modificatori e complementi allineando i nomi composti tradotti; ripete finché
+        impara qualcosa (al massimo passes volte). Restituisce le forme imparate.
+        """
+        learned = 0
+        for _ in range(passes):
+            found = 0
+            for norm, (italian, _) in list(self.phrases.items()):
+                words = norm.split()
+                if len(words) < 2 or _PARENTHETICAL.match(italian):
+                    continue
+                if 'of' in words[1:-1]:
+                    found += self._learn_complement(words, italian)
+                else:
+                    found += self._learn_modifier(words, italian)
+            learned += found
+            if not found:
+                break
+        return learned
+
+    def _learn_complement(self, words: List[str], italian: str) -> int:
+        split = words.index('of')
+        head, tail = ' '.join(words[:split]), words[split + 1:]
+        if tail and tail[0] in _ARTICLES:
+            tail = tail[1:]
+        tail = ' '.join(tail)
+        if not tail:
+            return 0
+        known = self.phrases.get(head)
+        if known and italian.startswith(known[0] + ' '):
+            rest = italian[len(known[0]) + 1:]
+            new_head = None
+        else:
+            match = _IT_COMPLEMENT.match(italian)
+            if not match:
+                return 0
+            new_head, rest = match.group(1), match.group(2) + match.group(3)
+        found = 0
+        if tail not in self.complements:
+            self.complements[tail] = (rest, _gender(known[0] if known else new_head))
+            found += 1
+        if new_head and head not in self.phrases and len(new_head.split()) <= len(head.split()) + 1:
+            self.phrases[head] = (new_head, CONF_LEARNED)
+            found += 1
+        return found
+
+    def _learn_modifier(self, words: List[str], italian: str) -> int:
+        if len(words) != 2:
+            return 0
+        modifier, head = words
+        known = self.phrases.get(head)
+        if known and italian.startswith(known[0] + ' ') and modifier not in self.modifiers:
+            self.modifiers[modifier] = (italian[len(known[0]) + 1:], _gender(known[0]))
+            return 1
+        form = self.modifiers.get(modifier)
+        if form and head not in self.phrases and italian.endswith(' ' + form[0]):
+            self.phrases[head] = (italian[:-len(form[0]) - 1], CONF_LEARNED)
+            return 1
+        return 0
+
+    # --- Risoluzione -------------------------------------------------------------------------
+
+    def resolve(self, english: str) -> Dict:
+        """
+        Traduce un nome composto
+
+        Returns:
+            {'suggestion', 'confidence', 'method', 'unknown'}: suggestion None se restano parole
+            sconosciute (elencate in unknown)
+        """
+        english = english.strip()
+        parenthetical = None
+        confidence = 1.0
+        unknown: List[str] = []
+        match = _PARENTHETICAL.match(english)
+        if match and normalize_term(english) not in self.phrases:
+            english, inner = match.group(1), match.group(2).strip()
+            parenthetical, inner_confidence, inner_unknown = self._resolve_parenthetical(inner)
+            confidence *= inner_confidence
+            unknown.extend(inner_unknown)
+        text, core_confidence, method, core_unknown = self._resolve_words(normalize_term(english).split())
+        confidence *= core_confidence
+        unknown.extend(core_unknown)
+        if unknown:
+            return {'suggestion': None, 'confidence': 0.0, 'method': method, 'unknown': unknown}
+        if parenthetical:
+            text = f"{text} ({parenthetical})"
+            method += ' + parentesi'
+        return {'suggestion': text, 'confidence': round(confidence, 3), 'method': method, 'unknown': []}
+
+    def _resolve_parenthetical(self, inner: str) -> Tuple[Optional[str], float, List[str]]:
+        size = _SIZE.match(inner)
+        if size:
+            return f"{size.group(1)}x{size.group(2)} piedi", CONF_RULE, []
+        norm = normalize_term(inner)
+        if norm in self.parentheticals:
+            return self.parentheticals[norm], CONF_GLOSSARY, []
+        text, confidence, _, unknown = self._resolve_words(norm.split())
+        if text and inner[:1].islower():
+            text = text[:1].lower() + text[1:]
+        return text, confidence, unknown
+
+    def _resolve_words(self, words: List[str]) -> Tuple[Optional[str], float, str, List[str]]:
+        """(italiano, confidenza, metodo, parole sconosciute) di un nome senza parentesi"""
+        if not words:
+            return '', 1.0, 'vuoto', []
+        norm = ' '.join(words)
+        if norm in self.phrases:
+            italian, confidence = self.phrases[norm]
+            return italian, confidence, 'glossario', []
+        if len(words) == 1:
+            if norm in self.proper:
+                return norm.capitalize(), CONF_PROPER, 'nome proprio', []
+            return None, 0.0, 'sconosciuto', [norm]
+        # Testa: il suffisso più lungo già noto ("Animated | Rug of Smothering"), senza "of" nei modificatori
+        last_split = words.index('of') if 'of' in words else len(words) - 1
+        for split in range(1, last_split + 1):
+            if ' '.join(words[split:]) in self.phrases:
+                return self._assemble(words[:split], words[split:])
+        if 'of' in words[1:-1]:
+            return self._resolve_complement(words)
+        return self._assemble(words[:-1], words[-1:])
+
+    def _resolve_complement(self, words: List[str]) -> Tuple[Optional[str], float, str, List[str]]:
+        split = words.index('of')
+        head, head_confidence, _, unknown = self._resolve_words(words[:split])
+        tail = words[split + 1:]
+        if tail and tail[0] in _ARTICLES and len(tail) > 1:
+            tail = tail[1:]
+        tail_norm = ' '.join(tail)
+        if tail_norm in self.complements:
+            form, source = self.complements[tail_norm]
+            form, agreed = _agree(form, source, _gender(head) if head else None)
+            confidence = CONF_LEARNED * (CONF_AGREEMENT if agreed else 1.0)
+        elif tail_norm in self.proper or (len(tail) == 1 and tail_norm not in self.phrases and
+                                          tail_norm.capitalize() in self.proper):
+            form, confidence = f"di {tail_norm.capitalize()}", CONF_PROPER
+        else:
+            noun, confidence, _, tail_unknown = self._resolve_words(tail)
+            unknown = unknown + tail_unknown
+            form = ''
+            if noun:
+                preposition, article_confidence = _preposition(noun)
+                form = preposition + noun
+                confidence *= article_confidence
+        if unknown:
+            return None, 0.0, 'X di Y', unknown
+        return f"{head} {form}", head_confidence * confidence, 'X di Y', []
+
+    def _assemble(self, modifiers: List[str], head_words: List[str]) -> Tuple[Optional[str], float, str, List[str]]:
+        """Testa seguita dai modificatori in ordine inverso, concordati con la testa"""
+        head, confidence, _, unknown = self._resolve_words(head_words)
+        gender = _gender(head) if head else None
+        parts = [head]
+        for modifier in reversed(modifiers):
+            if modifier in self.modifiers:
+                form, source = self.modifiers[modifier]
+                form, agreed = _agree(form, source, gender)
+                confidence *= CONF_LEARNED * (CONF_AGREEMENT if agreed else 1.0)
+            elif modifier in self.phrases:
+                form, part_confidence = self.phrases[modifier]
+                confidence *= part_confidence * CONF_APPOSITION
+            elif modifier in self.proper:
+                form = modifier.capitalize()
+                confidence *= CONF_PROPER
+            else:
+                unknown.append(modifier)
+                continue
+            parts.append(form)
+        if unknown:
+            return None, 0.0, 'composto', unknown
+        return ' '.join(parts), confidence, 'composto', []
+
+def build_glossary(compendium_dir: Path = COMPENDIUM_DIR, verbose: bool = False) -> Glossary:
+    """Glossario da monsters e items (id = nome inglese) e dalle mappe 'folders' di tutti i pack"""
+    start = time.perf_counter()
+    glossary = Glossary()
+    for pack in GLOSSARY_PACKS:
+        for key, entry in iter_entries(compendium_dir / f"dnd5e.{pack}.json"):
+            if isinstance(entry, dict) and isinstance(key, str):
+                glossary.add(key, entry.get('name', ''))
+    folder_files = [compendium_dir / PACKS_FOLDERS_FILE, *compendium_files(compendium_dir).values()]
+    for json_file in folder_files:
+        if not json_file.exists():
+            continue
+        header = read_header(json_file)
+        folders = header.get('folders') or {}
+        if json_file.name == PACKS_FOLDERS_FILE:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                folders = json.load(f).get('entries', {})
+        if isinstance(folders, dict):
+            for english, italian in folders.items():
+                if isinstance(italian, str):
+                    glossary.add(english.replace('-', ' '), italian)
+    learned = glossary.learn()
+    if verbose:
+        print(f"📖 Glossario: {len(glossary.phrases)} nomi, {len(glossary.modifiers)} modificatori, "
+              f"{len(glossary.complements)} complementi, {len(glossary.proper)} nomi propri "
+              f"({learned} forme ricavate) in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return glossary
+
+def _load_list(path: Path, key: str) -> Dict:
+    if not path.exists():
+        return {'note': '', 'total': 0, key: []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def english_names(review: Dict, untranslated: Dict) -> Dict[str, str]:
+    """Nomi inglesi degli attori: indice di origin se presente, poi name_en dei file di revisione"""
+    names = {}
+    if ORIGIN_PACKS_DIR.exists():
+        names.update({entry_id: name for entry_id, (name, _, _) in get_origin_index().get('actors24', {}).items()})
+    for entry in review.get('needs_review', []) + untranslated.get('untranslated', []):
+        if entry.get('id') and entry.get('name_en'):
+            names.setdefault(entry['id'], entry['name_en'])
+    return names
+
+def _status(result: Dict, current: str) -> str:
+    if result['suggestion'] is None:
+        return 'non risolto'
+    return 'confermato' if result['suggestion'].lower() == (current or '').lower() else 'diverso'
+
+def resolve_actors(glossary: Glossary, min_confidence: float = MIN_CONFIDENCE,
+                   dry_run: bool = False) -> Dict[str, int]:
+    """
+    Risolve in un solo passaggio tutti gli attori con nome inglese noto e aggiorna i file di revisione
+
+    Returns:
+        conteggi per esito ('confermato', 'diverso', 'non risolto', 'senza nome inglese', 'aggiunti')
+    """
+    review = _load_list(REVIEW_FILE, 'needs_review')
+    untranslated = _load_list(UNTRANSLATED_FILE, 'untranslated')
+    names = english_names(review, untranslated)
+    counts = {'confermato': 0, 'diverso': 0, 'non risolto': 0, 'senza nome inglese': 0, 'aggiunti': 0}
+
+    results = {}
+    current_names = {}
+    for key, entry in iter_entries(ACTORS_FILE):
+        if not isinstance(entry, dict):
+            continue
+        current_names[key] = entry.get('name', '')
+        if key not in names:
+            counts['senza nome inglese'] += 1
+            continue
+        results[key] = glossary.resolve(names[key])
+        counts[_status(results[key], current_names[key])] += 1
+
+    def annotate(entry: Dict):
+        result = results.get(entry.get('id')) or glossary.resolve(entry.get('name_en', ''))
+        entry['suggestion'] = result['suggestion']
+        entry['confidence'] = result['confidence']
+        entry['method'] = result['method']
+        if result['unknown']:
+            entry['unknown'] = result['unknown']
+        else:
+            entry.pop('unknown', None)
+
+    listed = set()
+    for entry in review.get('needs_review', []):
+        annotate(entry)
+        listed.add(entry.get('id'))
+    for entry in untranslated.get('untranslated', []):
+        annotate(entry)
+        listed.add(entry.get('id'))
+
+    # Voci tradotte in modo diverso dalla proposta, o rimaste in inglese
+    for key, result in results.items():
+        current = current_names[key]
+        if key in listed:
+            continue
+        if normalize_term(current) == normalize_term(names[key]) and result['suggestion'] != current:
+            target = untranslated.setdefault('untranslated', [])
+        elif _status(result, current) == 'diverso' and result['confidence'] >= min_confidence:
+            target = review.setdefault('needs_review', [])
+        else:
+            continue
+        entry = {'id': key, 'name_en': names[key], 'name_it': current}
+        annotate(entry)
+        target.append(entry)
+        counts['aggiunti'] += 1
+
+    review['total'] = len(review.get('needs_review', []))
+    untranslated['total'] = len(untranslated.get('untranslated', []))
+    if not dry_run:
+        atomic_write_json(REVIEW_FILE, review)
+        atomic_write_json(UNTRANSLATED_FILE, untranslated)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Proposte di traduzione per i nomi composti degli attori (actors24)")
+    parser.add_argument('names', nargs='*', help="nomi inglesi da risolvere senza toccare i file di revisione")
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE,
+                        help="confidenza minima per aggiungere alla revisione una voce tradotta diversamente "
+                             "(default: %(default)s)")
+    parser.add_argument('--dry-run', action='store_true', help="mostra le proposte senza scrivere i file")
+    args = parser.parse_args()
+
+    glossary = build_glossary(verbose=True)
+    if args.names:
+        for name in args.names:
+            result = glossary.resolve(name)
+            if result['suggestion'] is None:
+                print(f"   ❌ {name}: parole sconosciute {', '.join(result['unknown'])}")
+            else:
+                print(f"   ✅ {name} → {result['suggestion']} ({result['confidence']:.2f}, {result['method']})")
+        return
+
+    start = time.perf_counter()
+    counts = resolve_actors(glossary, args.min_confidence, args.dry_run)
+    review = _load_list(REVIEW_FILE, 'needs_review') if not args.dry_run else None
+    if review:
+        print(f"\n🔍 Revisione ({review['total']} voci):")
+        for entry in review['needs_review']:
+            if entry.get('suggestion') is None:
+                print(f"   ❌ {entry['name_en']}: {entry['name_it']} (sconosciute: {', '.join(entry.get('unknown', []))})")
+            else:
+                mark = '✅' if entry['suggestion'].lower() == entry['name_it'].lower() else '✏️ '
+                print(f"   {mark} {entry['name_en']}: {entry['name_it']} → {entry['suggestion']} "
+                      f"({entry['confidence']:.2f})")
+    print(f"\n📊 {counts['confermato']} confermati, {counts['diverso']} diversi, {counts['non risolto']} non risolti, "
+          f"{counts['senza nome inglese']} senza nome inglese, {counts['aggiunti']} aggiunti alla revisione "
+          f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+    if counts['senza nome inglese'] and not ORIGIN_PACKS_DIR.exists():
+        print(f"   ℹ️  {ORIGIN_PACKS_DIR.relative_to(REPO_ROOT)} assente: risolti solo i nomi presenti nei file di revisione")
+    if args.dry_run:
+        print("   (dry run: file non modificati)")
+
+if __name__ == '__main__':
+    main()
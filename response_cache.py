@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Cache persistente (SQLite) delle risposte di quintaedizione.online
+Memorizza per ogni URL sia i risultati positivi (nome italiano) sia quelli negativi (404,
+pagina senza titolo), con scadenza (TTL) e limite di dimensione con eviction LRU
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+REPO_ROOT = Path(__file__).parent
+DEFAULT_CACHE_FILE = REPO_ROOT / '.cache' / 'quintaedizione.sqlite'
+
+DEFAULT_TTL = 30 * 24 * 3600           # 30 giorni per i risultati positivi
+DEFAULT_NEGATIVE_TTL = 7 * 24 * 3600   # 7 giorni per i risultati negativi
+DEFAULT_MAX_ENTRIES = 50000
+
+# Valore restituito da get() quando l'URL non è in cache
+MISS = (False, None)
+
+class ResponseCache:
+    """Cache URL -> risultato su file SQLite, thread-safe"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE, ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 offline: bool = False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' value TEXT,'
+            ' found INTEGER NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT)'
+        )
+        # Cache creata da una versione precedente: aggiungi le colonne dei validatori
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(responses)')}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE responses ADD COLUMN {column} TEXT')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)')
+        self._conn.commit()
+
+    def get(self, url: str) -> Tuple[bool, Optional[str]]:
+        """
+        Cerca un URL in cache
+
+        Returns:
+            (True, nome) per un risultato positivo, (True, None) per uno negativo,
+            MISS se l'URL non è in cache o è scaduto (in modalità offline le voci
+            scadute vengono comunque restituite)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, found, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return MISS
+            value, found, fetched_at = row
+            ttl = self.ttl if found else self.negative_ttl
+            if not self.offline and now - fetched_at > ttl:
+                self.misses += 1
+                return MISS
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+            self._conn.commit()
+            self.hits += 1
+            return True, value if found else None
+
+    def validators(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """
+        Validatori HTTP di una voce (anche scaduta) per le richieste condizionali
+
+        Returns:
+            (valore, ETag, Last-Modified) oppure None se l'URL non è in cache o non ha validatori
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, found, etag, last_modified FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None or (row[2] is None and row[3] is None):
+            return None
+        value, found, etag, last_modified = row
+        return (value if found else None), etag, last_modified
+
+    def refresh(self, url: str):
+        """Rinnova la validità di una voce (risposta 304 Not Modified)"""
+        if self.offline:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+            self._conn.commit()
+
+    def set(self, url: str, value: Optional[str], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Salva un risultato (None = risultato negativo) con gli eventuali validatori HTTP"""
+        if self.offline:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, value, found, fetched_at, accessed_at, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, value, 1 if value is not None else 0, now, now, etag, last_modified)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Rimuove le voci usate meno di recente oltre max_entries"""
+        if self.max_entries <= 0:
+            return
+        count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM responses WHERE url IN '
+                '(SELECT url FROM responses ORDER BY accessed_at LIMIT ?)', (excess,)
+            )
+
+    def purge_expired(self) -> int:
+        """Elimina le voci scadute, restituisce quante ne ha rimosse"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM responses WHERE (found = 1 AND fetched_at < ?) OR (found = 0 AND fetched_at < ?)',
+                (now - self.ttl, now - self.negative_ttl)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[ResponseCache] = None
+
+def configure_cache(**kwargs) -> ResponseCache:
+    """Apre (o riapre) la cache condivisa con i parametri indicati"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = ResponseCache(**kwargs)
+    return _cache
+
+def disable_cache():
+    """Disattiva la cache condivisa"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+def get_cache() -> Optional[ResponseCache]:
+    """Restituisce la cache condivisa, None se disattivata"""
+    return _cache
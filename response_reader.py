@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Lettura a flusso delle risposte di quintaedizione.online
+
+Invece di scaricare l'intera pagina e cercare il titolo con una regex, il corpo della risposta
+viene letto a blocchi e analizzato man mano: appena il titolo è noto la lettura si interrompe.
+Se il resto del corpo è piccolo viene scartato e la connessione torna al pool (keep-alive),
+altrimenti la connessione viene chiusa senza scaricare il resto della pagina.
+
+- HTML: primo <h1>, con <meta property="og:title"> e <title> come ripiego (scartato se è il
+  titolo di una pagina di errore o di ricerca)
+- JSON: primo campo nome tra quelli noti, letto con il parser incrementale di compendium_io
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+
+from compendium_io import JsonStreamReader, iter_object_keys
+
+CHUNK_SIZE = 8 * 1024
+# Oltre questa dimensione si smette di cercare il titolo
+MAX_BODY_BYTES = 1024 * 1024
+# Resto del corpo scartato per riusare la connessione; oltre si chiude la connessione
+MAX_DRAIN_BYTES = 64 * 1024
+
+# Campi JSON che possono contenere il nome italiano, in ordine di priorità
+JSON_NAME_FIELDS = ['name', 'nome', 'title', 'titolo', 'italian_name']
+
+# Suffissi tipici del <title> da rimuovere ("Palla di Fuoco - Quinta Edizione")
+TITLE_SEPARATORS = (' | ', ' - ', ' – ', ' — ')
+
+# <title> delle pagine di errore (soft 404) e di ricerca, da non prendere per nomi
+NOT_A_NAME_TITLE = re.compile(
+    r'non trovat|not found|\b404\b|\berrore?\b|\bcerca\b|ricerca|\bsearch\b|risultati',
+    re.IGNORECASE)
+
+class TitleParser(HTMLParser):
+    """Parser HTML incrementale che raccoglie <h1>, og:title e <title>"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.h1: Optional[str] = None
+        self.og_title: Optional[str] = None
+        self.title: Optional[str] = None
+        self.done = False
+        self._capture: Optional[str] = None
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'meta':
+            attrs = dict(attrs)
+            if attrs.get('property') == 'og:title' and attrs.get('content') and self.og_title is None:
+                self.og_title = attrs['content'].strip()
+        elif tag in ('h1', 'title') and self._capture is None:
+            if (tag == 'h1' and self.h1 is None) or (tag == 'title' and self.title is None):
+                self._capture = tag
+                self._parts = []
+
+    def handle_endtag(self, tag):
+        if tag != self._capture:
+            return
+        text = ' '.join(''.join(self._parts).split())
+        self._capture = None
+        if tag == 'title':
+            self.title = text
+        elif len(text) > 2:
+            self.h1 = text
+            # Il primo <h1> valido è il nome cercato: il resto della pagina non serve
+            self.done = True
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._parts.append(data)
+
+    def result(self) -> Optional[str]:
+        """Titolo migliore trovato: <h1>, poi og:title, poi <title> senza il nome del sito"""
+        for candidate in (self.h1, self.og_title):
+            if candidate and len(candidate) > 2:
+                return candidate
+        title = strip_site_name(self.title)
+        if title and len(title) > 2 and not NOT_A_NAME_TITLE.search(title):
+            return title
+        return None
+
+def strip_site_name(title: Optional[str]) -> Optional[str]:
+    """Rimuove il nome del sito in coda al <title>"""
+    if not title:
+        return title
+    for separator in TITLE_SEPARATORS:
+        if separator in title:
+            return title.rsplit(separator, 1)[0].strip()
+    return title
+
+def iter_text(byte_chunks: Iterable[bytes], encoding: str = 'utf-8',
+              max_bytes: int = MAX_BODY_BYTES) -> Iterator[str]:
+    """Decodifica a flusso i blocchi di byte, fermandosi dopo max_bytes"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    read = 0
+    for chunk in byte_chunks:
+        if not chunk:
+            continue
+        read += len(chunk)
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+        if read >= max_bytes:
+            return
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def read_html_title(chunks: Iterable[str]) -> Optional[str]:
+    """Legge l'HTML a blocchi fino al primo <h1> e restituisce il titolo"""
+    parser = TitleParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.result()
+
+def read_json_name(chunks: Iterable[str]) -> Optional[str]:
+    """Legge un oggetto JSON a blocchi fino al campo nome di priorità più alta"""
+    reader = JsonStreamReader(chunks)
+    best = None
+    best_rank = len(JSON_NAME_FIELDS)
+    try:
+        if reader.peek(emit=False) != '{':
+            return None
+        for key in iter_object_keys(reader, emit=False):
+            value, _ = reader.read_value(emit=False)
+            rank = JSON_NAME_FIELDS.index(key) if key in JSON_NAME_FIELDS else None
+            if rank is not None and value and rank < best_rank:
+                best, best_rank = str(value), rank
+                if rank == 0:
+                    break
+    except ValueError:
+        # JSON troncato o non valido: vale quanto letto finora
+        pass
+    return best
+
+def response_encoding(response) -> str:
+    """Codifica del corpo: quella dichiarata negli header, altrimenti UTF-8"""
+    content_type = response.headers.get('content-type', '')
+    if 'charset=' in content_type.lower() and response.encoding:
+        try:
+            codecs.lookup(response.encoding)
+            return response.encoding
+        except LookupError:
+            pass
+    return 'utf-8'
+
+def read_translation_name(response) -> Optional[str]:
+    """
+    Estrae il nome italiano da una risposta HTTP aperta con stream=True
+
+    Legge solo il necessario e rilascia la risposta appena ha il titolo (vedi release_response).
+    """
+    content_type = response.headers.get('content-type', '')
+    try:
+        if 'text/html' in content_type:
+            reader = read_html_title
+        elif 'application/json' in content_type:
+            reader = read_json_name
+        else:
+            return None
+        chunks = iter_text(response.iter_content(CHUNK_SIZE), response_encoding(response))
+        return reader(chunks)
+    finally:
+        release_response(response)
+
+def release_response(response, max_drain: int = MAX_DRAIN_BYTES):
+    """
+    Rilascia una risposta letta in parte: se il resto del corpo è entro max_drain byte viene
+    scartato e la connessione torna al pool, altrimenti la connessione viene chiusa
+    """
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'release_conn'):
+        drained = 0
+        try:
+            while drained <= max_drain:
+                chunk = raw.read(CHUNK_SIZE, decode_content=False)
+                if not chunk:
+                    raw.release_conn()
+                    return
+                drained += len(chunk)
+        except Exception:
+            # Connessione interrotta durante lo scarto: va comunque chiusa
+            pass
+    response.close()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Metriche di esecuzione degli script di traduzione
+
+Per ogni fase (translate_rules, extract_translations_from_pdf, i translate_* via API e le loro
+sottofasi) registra tempo reale, tempo CPU (del processo e dei processi figli), voci elaborate
+e throughput, richieste HTTP fatte dal processo durante la fase e picco di memoria (RSS). A fine run le
+metriche, insieme a statistiche HTTP (istogramma delle latenze) e cache, vengono scritte in un
+file JSON, così da poter confrontare i run e trovare regressioni.
+
+Con --profile un solo cProfile per tutto il processo viene avviato da start_run sul thread
+principale (cProfile non ammette più profiler attivi insieme) insieme a tracemalloc: il file
+.prof e un riepilogo delle funzioni e delle allocazioni più costose finiscono accanto al file
+delle metriche. Il conteggio http_requests_process di una fase è la differenza del contatore
+globale del motore HTTP, quindi include le richieste di fasi eseguite in parallelo.
+
+Uso negli script:
+    @instrumented('rules', pack='rules')
+    def translate_rules(...):
+        ...
+        with get_metrics().stage('rules.read_yaml'):
+            ...
+        get_metrics().add_entries(n)
+"""
+
+import argparse
+import cProfile
+import functools
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from compendium_io import atomic_write_json
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    # Windows: niente getrusage, il picco di RSS non viene riportato
+    RESOURCE_AVAILABLE = False
+
+REPO_ROOT = Path(__file__).parent
+METRICS_DIR = REPO_ROOT / '.cache' / 'metrics'
+PROFILE_TOP = 25  # Funzioni e allocazioni riportate nel riepilogo del profilo
+
+def peak_rss_mb() -> Optional[float]:
+    """Picco di memoria residente del processo in MB (None se non disponibile)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss è in KB su Linux, in byte su macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def children_cpu() -> float:
+    """Tempo CPU (utente + sistema) dei processi figli terminati, in secondi"""
+    if not RESOURCE_AVAILABLE:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def _http_requests() -> int:
+    from fetch_engine import get_engine
+    return get_engine().metrics.requests
+
+class RunMetrics:
+    """Raccoglie le metriche delle fasi di un run, thread-safe (le fasi possono girare in parallelo)"""
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.started = time.time()
+        self.stages: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler: Optional[cProfile.Profile] = cProfile.Profile() if profile else None
+        if profile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start_profiler(self):
+        """Avvia il profiler del processo sul thread chiamante (da fare una volta, nel main)"""
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str, pack: Optional[str] = None):
+        """Misura una fase; le fasi annidate sullo stesso thread sono registrate come sottofasi"""
+        stack = self._stack()
+        record = {'name': name, 'pack': pack, 'parent': stack[-1]['name'] if stack else None,
+                  'status': 'ok', 'entries': 0}
+        requests_before = _http_requests()
+        children_before = children_cpu()
+        cpu_before = time.process_time()
+        thread_cpu_before = time.thread_time()
+        start = time.perf_counter()
+        stack.append(record)
+        try:
+            yield record
+        except BaseException:
+            record['status'] = 'failed'
+            raise
+        finally:
+            stack.pop()
+            record['wall_s'] = time.perf_counter() - start
+            record['cpu_s'] = time.process_time() - cpu_before
+            record['thread_cpu_s'] = time.thread_time() - thread_cpu_before
+            record['children_cpu_s'] = children_cpu() - children_before
+            # Contatore del processo: include le richieste delle fasi parallele
+            record['http_requests_process'] = _http_requests() - requests_before
+            record['entries_per_s'] = record['entries'] / record['wall_s'] if record['wall_s'] else 0.0
+            record['peak_rss_mb'] = peak_rss_mb()
+            with self._lock:
+                self.stages.append(record)
+
+    def add_entries(self, count: int):
+        """Aggiunge voci elaborate alla fase in corso sul thread corrente"""
+        stack = self._stack()
+        if stack:
+            stack[-1]['entries'] += count
+
+    def http_summary(self) -> Dict:
+        """Statistiche del motore HTTP e della cache delle risposte"""
+        from fetch_engine import get_engine
+        from response_cache import get_cache
+        data = {'http': get_engine().metrics.snapshot()}
+        cache = get_cache()
+        if cache is not None:
+            data['cache'] = {'hits': cache.hits, 'misses': cache.misses}
+        return data
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_s': time.time() - self.started,
+            'cpu_s': time.process_time(),
+            'children_cpu_s': children_cpu(),
+            'peak_rss_mb': peak_rss_mb(),
+            'command': sys.argv,
+            'python': sys.version.split()[0],
+            'stages': stages,
+            **self.http_summary(),
+        }
+
+    def write_profile(self, prof_file: Path) -> Optional[Dict]:
+        """Ferma il profiler, scrive il profilo e restituisce il riepilogo (None senza --profile)"""
+        if not self.profile:
+            return None
+        summary: Dict = {}
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.disable()
+            stats = pstats.Stats(profiler, stream=io.StringIO())
+            stats.dump_stats(str(prof_file))
+            summary['prof_file'] = str(prof_file)
+            rows = []
+            for (file_name, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+                rows.append({'function': f"{Path(file_name).name}:{line}({function})", 'calls': calls,
+                             'tottime_s': total, 'cumtime_s': cumulative})
+            rows.sort(key=lambda row: row['cumtime_s'], reverse=True)
+            summary['top_cumulative'] = rows[:PROFILE_TOP]
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            summary['traced_current_mb'] = current / (1024 * 1024)
+            summary['traced_peak_mb'] = peak / (1024 * 1024)
+            snapshot = tracemalloc.take_snapshot()
+            summary['top_allocations'] = [
+                {'location': f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+                 'size_kb': stat.size / 1024, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:PROFILE_TOP]
+            ]
+        return summary
+
+    def summary_lines(self) -> List[str]:
+        """Righe di riepilogo leggibili, una per fase di primo livello"""
+        with self._lock:
+            stages = [stage for stage in self.stages if stage['parent'] is None]
+        lines = []
+        for stage in stages:
+            line = (f"{stage['name']}{' [' + stage['pack'] + ']' if stage['pack'] and stage['pack'] != stage['name'] else ''}: "
+                    f"{stage['wall_s']:.2f}s reali, {stage['cpu_s'] + stage['children_cpu_s']:.2f}s CPU")
+            if stage['entries']:
+                line += f", {stage['entries']} voci ({stage['entries_per_s']:.1f}/s)"
+            if stage['http_requests_process']:
+                line += f", {stage['http_requests_process']} richieste HTTP (processo)"
+            lines.append(line)
+        rss = peak_rss_mb()
+        if rss is not None:
+            lines.append(f"Picco di memoria (RSS): {rss:.0f} MB")
+        return lines
+
+    def write(self, path: Path) -> Dict:
+        """Scrive le metriche (e il profilo, se attivo) in un file JSON"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.to_dict()
+        profile = self.write_profile(path.with_suffix('.prof'))
+        if profile is not None:
+            data['profile'] = profile
+        atomic_write_json(path, data)
+        return data
+
+_metrics: Optional[RunMetrics] = None
+
+def configure_metrics(**kwargs) -> RunMetrics:
+    """Crea (o ricrea) il raccoglitore condiviso con i parametri indicati"""
+    global _metrics
+    _metrics = RunMetrics(**kwargs)
+    return _metrics
+
+def get_metrics() -> RunMetrics:
+    """Restituisce il raccoglitore condiviso, creandolo con i valori predefiniti se serve"""
+    global _metrics
+    if _metrics is None:
+        _metrics = RunMetrics()
+    return _metrics
+
+def instrumented(name: str, pack: Optional[str] = None) -> Callable:
+    """Decoratore: esegue la funzione come fase name del raccoglitore condiviso"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().stage(name, pack):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def add_metrics_arguments(parser: argparse.ArgumentParser, script: str):
+    """Aggiunge --metrics e --profile alle opzioni di uno script"""
+    default = METRICS_DIR / f"{script}.json"
+    parser.add_argument('--metrics', type=Path, default=default,
+                        help=f"file JSON delle metriche del run (default: {default.relative_to(REPO_ROOT)})")
+    parser.add_argument('--profile', action='store_true',
+                        help="esegue il run sotto cProfile e tracemalloc (profilo accanto al file delle metriche)")
+
+def start_run(args: argparse.Namespace) -> RunMetrics:
+    """Prepara il raccoglitore condiviso secondo le opzioni di add_metrics_arguments"""
+    metrics = configure_metrics(profile=args.profile)
+    metrics.start_profiler()
+    return metrics
+
+def finish_run(args: argparse.Namespace):
+    """Stampa il riepilogo delle metriche e le salva nel file indicato da --metrics"""
+    metrics = get_metrics()
+    print("\n⏱️  Metriche:")
+    for line in metrics.summary_lines():
+        print(f"   {line}")
+    data = metrics.write(args.metrics)
+    print(f"   📈 Salvate in {args.metrics}")
+    if 'profile' in data and data['profile'].get('prof_file'):
+        print(f"   🔬 Profilo: {data['profile']['prof_file']} (python -m pstats)")
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Controllo di coerenza della terminologia tra lang/it.json, cartelle e testi del compendio
+
+I termini di gioco (condizioni, tipi di danno e di creatura, sensi, privilegi di classe,
+classi e specie) devono avere la stessa resa italiana ovunque. Il glossario si costruisce da:
+- le chiavi di lang/it.json che definiscono un termine (TERM_KEYS), es. DND5E.ConProne = Prono
+- le mappe folders dei pack (classes24: Barbarian -> Barbaro, actors24: fiend -> Demone, ...)
+- i name delle voci la cui chiave inglese è un termine del glossario
+- le varianti note (VARIANTS): rese della traduzione 2014 o sinonimi da uniformare
+
+Tutti i testi (name, description, text dei pack e i valori di lang/it.json) vengono
+ripuliti dall'HTML e tokenizzati una sola volta in un indice invertito posizionale:
+radice della parola -> [(documento, posizioni)]. Le radici ignorano la vocale finale, così
+"Esausto", "esausta" ed "esausti" coincidono; le rese di più parole si cercano intersecando
+le posizioni consecutive. Un termine è segnalato se ha più rese definite ("Esausto" e
+"Sfinimento") o se una variante nota compare nei testi, con i punti in cui compare.
+
+L'indice è salvato in .cache/terminology_index.json per file: ai run successivi si
+reindicizzano solo i file con mtime o dimensione cambiati e contenuto (blake2b) diverso.
+
+Uso:
+    python terminology_check.py                       # report, aggiorna l'indice
+    python terminology_check.py --terms exhaustion,fiend --locations 20
+    python terminology_check.py --full --strict       # reindicizza tutto, esce con 1 se ci sono problemi
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from compendium_io import FOUNDRY_ID, atomic_write_json, compendium_files, iter_entries, read_header
+from language_detect import TEXT_FIELDS, iter_text_fields
+from translation_memory import normalize_term
+
+REPO_ROOT = Path(__file__).parent
+LANG_FILE = REPO_ROOT / 'lang' / 'it.json'
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+DEFAULT_INDEX_FILE = REPO_ROOT / '.cache' / 'terminology_index.json'
+DEFAULT_REPORT_FILE = REPO_ROOT / '.cache' / 'reports' / 'terminology.json'
+INDEX_VERSION = 1
+
+# Rese più lunghe non sono termini (frasi dell'interfaccia, descrizioni)
+MAX_TERM_WORDS = 5
+# Punti mostrati per ogni resa
+MAX_LOCATIONS = 5
+
+# Chiavi di lang/it.json che definiscono un termine: (espressione, categoria); il gruppo è il
+# nome inglese in CamelCase
+TERM_KEYS = (
+    (re.compile(r'^DND5E\.Con([A-Z][a-z]+)$'), 'condizione'),
+    (re.compile(r'^DND5E\.(Exhaustion)$'), 'condizione'),
+    (re.compile(r'^DND5E\.Damage([A-Z][a-z]+)$'), 'tipo di danno'),
+    (re.compile(r'^DND5E\.Creature([A-Z][a-z]+)$'), 'tipo di creatura'),
+    (re.compile(r'^DND5E\.Sense([A-Z][a-z]+)$'), 'senso'),
+    (re.compile(r'^DND5E\.Feature\.Class\.([A-Z][A-Za-z]+)$'), 'privilegio di classe'),
+)
+# Chiavi che corrispondono alle espressioni ma non sono termini (etichette, tipi generici)
+GENERIC_KEYS = {'All', 'Imm', 'Label', 'Physical', 'Roll', 'Special', 'Tag', 'Threshold', 'Type', 'Types', 'Units'}
+
+# Rese alternative da uniformare, per termine inglese normalizzato
+VARIANTS = {
+    'exhaustion': ('Indebolimento', 'Esaurimento'),
+    'unconscious': ('Incosciente',),
+    'grappled': ('In Lotta',),
+    'restrained': ('Intralciato',),
+    'fiend': ('Immondo',),
+    'fey': ('Folletto',),
+    'radiant': ('Radiante',),
+    'lightning': ('Elettricità',),
+    'truesight': ('Vista Pura',),
+    'tremorsense': ('Percezione Tellurica',),
+}
+
+_MARKUP = re.compile(r'<[^>]*>|@\w+\[[^\]]*\]')  # tag HTML e riferimenti @UUID[...] (l'etichetta resta)
+_WORD = re.compile(r'\w+')
+_CAMEL = re.compile(r'(?<=[a-z])(?=[A-Z])')
+_VOWELS = set('aeiouàèéìòù')
+
+def stem(word: str) -> str:
+    """Radice di una parola minuscola: senza la vocale finale (genere e numero)"""
+    return word[:-1] if len(word) > 3 and word[-1] in _VOWELS else word
+
+def tokenize(text: str) -> List[str]:
+    """Radici delle parole di un testo, senza HTML né riferimenti @UUID"""
+    if not text:
+        return []
+    plain = html.unescape(_MARKUP.sub(' ', text))
+    return [stem(word) for word in _WORD.findall(plain.lower())]
+
+def term_key(text: str) -> str:
+    """Chiave di confronto di una resa: radici separate da spazi"""
+    return ' '.join(tokenize(text))
+
+def _flatten(value, prefix: str = '') -> Iterable[Tuple[str, str]]:
+    """(chiave puntata, valore) delle stringhe di lang/it.json"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, str):
+        yield prefix, value
+
+def _is_term(text: str) -> bool:
+    return bool(text) and '{' not in text and len(text.split()) <= MAX_TERM_WORDS
+
+def _entry_english(path: str) -> Optional[str]:
+    """Nome inglese di una voce dal percorso del suo campo name (chiave o pagina), se non è un id"""
+    parent = path.rsplit('/', 1)[0].rsplit('/', 1)[-1]
+    if not parent or '[' in parent or FOUNDRY_ID.match(parent):
+        return None
+    return parent
+
+def read_sources(rel: str, path: Path) -> Tuple[List[Tuple[str, str]], List[List[str]]]:
+    """
+    Testi e termini candidati di un file
+
+    Returns:
+        ([(posizione, testo)], [[tipo, chiave o nome inglese, resa, posizione]]) con tipo
+        'i18n', 'folder' o 'name'
+    """
+    docs = []
+    names = []
+    if rel == LANG_FILE.relative_to(REPO_ROOT).as_posix():
+        with open(path, 'r', encoding='utf-8') as f:
+            for key, value in _flatten(json.load(f)):
+                docs.append((key, value))
+                if _is_term(value):
+                    names.append(['i18n', key, value, key])
+        return docs, names
+    folders = read_header(path).get('folders')
+    if isinstance(folders, dict):
+        for english, italian in folders.items():
+            if isinstance(italian, str) and _is_term(italian):
+                names.append(['folder', english, italian, f"folders/{english}"])
+    for key, entry in iter_entries(path):
+        for location, field, text in iter_text_fields(entry, str(key), TEXT_FIELDS):
+            docs.append((location, text))
+            if field == 'name' and _is_term(text):
+                english = _entry_english(location)
+                if english:
+                    names.append(['name', english, text, location])
+    return docs, names
+
+def index_file(rel: str, path: Path, digest: str, stat) -> Dict:
+    """Indice posizionale di un file: {token: [[documento, posizione, ...], ...]}"""
+    docs, names = read_sources(rel, path)
+    postings: Dict[str, List[List[int]]] = {}
+    for doc_index, (_, text) in enumerate(docs):
+        for position, token in enumerate(tokenize(text)):
+            entry = postings.setdefault(token, [])
+            if entry and entry[-1][0] == doc_index:
+                entry[-1].append(position)
+            else:
+                entry.append([doc_index, position])
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha': digest,
+            'docs': [location for location, _ in docs], 'postings': postings, 'names': names}
+
+def _digest(path: Path) -> str:
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+class TermIndex:
+    """Indice invertito posizionale dei testi di più file, aggiornato in modo incrementale"""
+
+    def __init__(self, index_file: Path = DEFAULT_INDEX_FILE):
+        self.index_file = index_file
+        self.files: Dict[str, Dict] = {}
+        self.stats = Counter()  # file riusati, con solo mtime cambiato, reindicizzati, rimossi
+
+    def load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('files', {}) if data.get('version') == INDEX_VERSION else {}
+
+    def update(self, sources: Dict[str, Path], full: bool = False) -> 'TermIndex':
+        """Allinea l'indice ai file indicati, reindicizzando solo quelli cambiati (in parallelo)"""
+        previous = {} if full else self.load()
+        self.stats['removed'] = len(set(previous) - set(sources))
+        to_check = []
+        for rel, path in sources.items():
+            stat = path.stat()
+            cached = previous.get(rel)
+            if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                self.files[rel] = cached
+                self.stats['reused'] += 1
+            else:
+                to_check.append((rel, path, stat))
+
+        def check(item):
+            rel, path, stat = item
+            digest = _digest(path)
+            cached = previous.get(rel)
+            if cached and cached['sha'] == digest:
+                # Contenuto invariato (checkout, touch): basta aggiornare mtime
+                return 'touched', {**cached, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            return 'indexed', index_file(rel, path, digest, stat)
+
+        with ThreadPoolExecutor(max_workers=min(8, len(to_check) or 1)) as executor:
+            for (rel, _, _), (outcome, data) in zip(to_check, executor.map(check, to_check)):
+                self.files[rel] = data
+                self.stats[outcome] += 1
+        return self
+
+    def save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.index_file, {'version': INDEX_VERSION, 'files': self.files}, indent=None)
+
+    def names(self) -> Iterable[Tuple[str, str, str, str, str]]:
+        """(file, tipo, chiave o nome inglese, resa, posizione) dei termini candidati"""
+        for rel, data in self.files.items():
+            for kind, english, italian, location in data['names']:
+                yield rel, kind, english, italian, location
+
+    def find(self, phrase: str) -> List[Tuple[str, str]]:
+        """(file, posizione) di ogni occorrenza della frase, per radici consecutive"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return []
+        found = []
+        for rel, data in self.files.items():
+            postings = data['postings']
+            first = postings.get(tokens[0])
+            if not first:
+                continue
+            candidates = {entry[0]: entry[1:] for entry in first}
+            for offset, token in enumerate(tokens[1:], 1):
+                following = {entry[0]: set(entry[1:]) for entry in postings.get(token, ())
+                             if entry[0] in candidates}
+                candidates = {doc: [start for start in starts if start + offset in following.get(doc, ())]
+                              for doc, starts in candidates.items() if doc in following}
+                candidates = {doc: starts for doc, starts in candidates.items() if starts}
+                if not candidates:
+                    break
+            for doc, starts in sorted(candidates.items()):
+                found.extend((rel, data['docs'][doc]) for _ in starts)
+        return found
+
+def index_sources(compendium_dir: Path = COMPENDIUM_DIR, lang_file: Path = LANG_FILE) -> Dict[str, Path]:
+    """{percorso relativo: file} dei file indicizzati: lang/it.json e i pack del compendio"""
+    sources = {}
+    for path in [lang_file, *compendium_files(compendium_dir).values()]:
+        if path.exists():
+            sources[path.resolve().relative_to(REPO_ROOT.resolve()).as_posix()] = path
+    return sources
+
+def _term_english(key: str) -> Optional[Tuple[str, str]]:
+    """(nome inglese, categoria) se la chiave di lang/it.json definisce un termine"""
+    for pattern, category in TERM_KEYS:
+        match = pattern.match(key)
+        if match and match.group(1) not in GENERIC_KEYS:
+            return _CAMEL.sub(' ', match.group(1)), category
+    return None
+
+def build_glossary(index: TermIndex) -> Dict[str, Dict]:
+    """
+    Termini con le loro rese, raggruppate per radici
+
+    Returns:
+        {termine normalizzato: {'english', 'category', 'renderings': {chiave: {'text', 'sources'}}}}
+        dove sources è [(file, posizione)] delle definizioni (vuota per le varianti note)
+    """
+    glossary: Dict[str, Dict] = {}
+    entry_names = []
+
+    def add(concept: Dict, italian: str, source: Optional[Tuple[str, str]]):
+        rendering = concept['renderings'].setdefault(term_key(italian), {'text': italian, 'sources': []})
+        if source:
+            rendering['sources'].append(source)
+
+    for rel, kind, english, italian, location in index.names():
+        if kind == 'name':
+            entry_names.append((rel, english, italian, location))
+            continue
+        if kind == 'i18n':
+            term = _term_english(english)
+            if not term:
+                continue
+            english, category = term
+        else:
+            category = 'cartella'
+        norm = normalize_term(english)
+        concept = glossary.setdefault(norm, {'english': english.title() if english.islower() else english,
+                                             'category': category, 'renderings': {}})
+        add(concept, italian, (rel, location))
+    # Le voci contribuiscono solo ai termini già definiti (es. la pagina "Exhaustion" delle regole);
+    # i nomi ancora in inglese sono voci non tradotte, già segnalate da coverage_report
+    for rel, english, italian, location in entry_names:
+        norm = normalize_term(english)
+        concept = glossary.get(norm)
+        if concept and normalize_term(italian) != norm:
+            add(concept, italian, (rel, location))
+    for norm, variants in VARIANTS.items():
+        if norm in glossary:
+            for italian in variants:
+                add(glossary[norm], italian, None)
+    return glossary
+
+def check_terms(index: TermIndex, glossary: Dict[str, Dict], terms: Optional[Sequence[str]] = None,
+                max_locations: int = MAX_LOCATIONS) -> List[Dict]:
+    """
+    Termini con rese incoerenti
+
+    Returns:
+        [{'term', 'english', 'category', 'status', 'preferred', 'renderings'}] con status
+        'conflict' (più rese definite) o 'variant' (solo varianti note nei testi); ogni resa è
+        {'text', 'sources', 'defined', 'occurrences', 'documents', 'locations'}: defined se la resa
+        viene da lang/it.json o da una cartella, locations i primi documenti in cui compare
+    """
+    wanted = {normalize_term(term) for term in terms} if terms else None
+    issues = []
+    for norm, concept in sorted(glossary.items()):
+        if wanted is not None and norm not in wanted:
+            continue
+        defined = [item for item in concept['renderings'].values() if item['sources']]
+        renderings = []
+        for item in concept['renderings'].values():
+            definitions = set(item['sources'])
+            occurrences = [found for found in index.find(item['text']) if found not in definitions]
+            documents = list(dict.fromkeys(occurrences))
+            renderings.append({'text': item['text'],
+                               'sources': [f"{rel} {location}" for rel, location in item['sources']],
+                               'defined': any(not rel.startswith('compendium/') or location.startswith('folders/')
+                                              for rel, location in item['sources']),
+                               'occurrences': len(occurrences), 'documents': len(documents),
+                               'locations': [f"{rel} {location}" for rel, location in documents[:max_locations]]})
+        variants_used = any(not item['sources'] and item['occurrences'] for item in renderings)
+        if len(defined) > 1:
+            status = 'conflict'
+        elif variants_used:
+            status = 'variant'
+        else:
+            continue
+        renderings = [item for item in renderings if item['sources'] or item['occurrences']]
+        # Preferita: definita in lang/it.json o nelle cartelle, poi con più definizioni e occorrenze
+        renderings.sort(key=lambda item: (not item['defined'], -len(item['sources']),
+                                          -item['occurrences'], item['text']))
+        issues.append({'term': norm, 'english': concept['english'], 'category': concept['category'],
+                       'status': status, 'preferred': renderings[0]['text'], 'renderings': renderings})
+    return issues
+
+def print_report(issues: List[Dict], checked: int):
+    conflicts = sum(1 for issue in issues if issue['status'] == 'conflict')
+    print(f"🔎 {checked} termini controllati: {conflicts} con rese in conflitto, "
+          f"{len(issues) - conflicts} con varianti nei testi")
+    for issue in issues:
+        print(f"\n⚠️  {issue['english']} ({issue['category']})")
+        for item in issue['renderings']:
+            flag = '✅' if item['text'] == issue['preferred'] else '❌'
+            origin = ', '.join(item['sources']) if item['sources'] else 'variante nota'
+            print(f"   {flag} {item['text']}: {origin} · {item['occurrences']} occorrenze in "
+                  f"{item['documents']} testi")
+            for location in item['locations']:
+                print(f"        {location}")
+            hidden = item['documents'] - len(item['locations'])
+            if hidden > 0:
+                print(f"        ... altri {hidden}")
+
+def write_terminology_report(terms: Optional[Sequence[str]] = None, full: bool = False,
+                             index_file: Path = DEFAULT_INDEX_FILE, json_file: Path = DEFAULT_REPORT_FILE,
+                             max_locations: int = MAX_LOCATIONS) -> List[Dict]:
+    """Aggiorna l'indice, stampa i termini incoerenti e salva il report JSON; restituisce i problemi"""
+    start = time.perf_counter()
+    sources = index_sources()
+    index = TermIndex(index_file).update(sources, full=full)
+    if index.stats['indexed'] or index.stats['touched'] or index.stats['removed']:
+        index.save()
+    indexed = time.perf_counter()
+    print(f"📚 Indice terminologia: {len(sources)} file ({index.stats['indexed']} reindicizzati, "
+          f"{index.stats['reused'] + index.stats['touched']} dalla cache) in {(indexed - start) * 1000:.0f}ms")
+
+    glossary = build_glossary(index)
+    issues = check_terms(index, glossary, terms, max_locations)
+    print_report(issues, len(glossary) if terms is None else len(terms))
+    print(f"\n⏱️  Controllo in {(time.perf_counter() - indexed) * 1000:.0f}ms")
+
+    json_file.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(json_file, {'generated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'issues': issues})
+    print(f"💾 Report: {json_file}")
+    return issues
+
+def main():
+    parser = argparse.ArgumentParser(description="Coerenza della terminologia tra lang/it.json, cartelle e testi del compendio")
+    parser.add_argument('--terms', help="termini inglesi da controllare separati da virgola (default: tutti)")
+    parser.add_argument('--locations', type=int, default=MAX_LOCATIONS,
+                        help="punti mostrati per ogni resa (default: %(default)s)")
+    parser.add_argument('--full', action='store_true', help="ignora l'indice salvato e reindicizza tutto")
+    parser.add_argument('--index', type=Path, default=DEFAULT_INDEX_FILE, help="file dell'indice")
+    parser.add_argument('--json', type=Path, default=DEFAULT_REPORT_FILE, help="report JSON")
+    parser.add_argument('--strict', action='store_true', help="esce con codice 1 se ci sono termini incoerenti")
+    args = parser.parse_args()
+
+    terms = [term.strip() for term in args.terms.split(',') if term.strip()] if args.terms else None
+    issues = write_terminology_report(terms, args.full, args.index, args.json, args.locations)
+    if args.strict and issues:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
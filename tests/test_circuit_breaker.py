@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker per host: si apre dopo threshold errori consecutivi, dopo il cooldown lascia
+passare una sola richiesta di prova (semi-aperto) e si richiude o si riapre secondo l'esito
+
+Uso: python -m pytest tests/test_circuit_breaker.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fetch_engine  # noqa: E402
+from fetch_engine import CircuitBreaker, CircuitOpenError, FetchEngine  # noqa: E402
+
+class Clock:
+    """Orologio controllato dal test al posto di time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_engine.time, 'monotonic', clock)
+    return clock
+
+def open_breaker(breaker: CircuitBreaker):
+    opened = [breaker.record_failure() for _ in range(breaker.threshold)]
+    # Solo l'errore che raggiunge la soglia apre il circuito
+    assert opened == [False] * (breaker.threshold - 1) + [True]
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    # Un successo azzera il conteggio degli errori consecutivi
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+def test_half_open_probe_closes_on_success(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    open_breaker(breaker)
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 2
+    # Una sola richiesta di prova alla volta
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    open_breaker(breaker)
+    clock.now += 61
+    assert breaker.allow()
+    # La prova fallita non conta come nuova apertura ma riavvia il cooldown
+    assert breaker.record_failure() is False
+    assert breaker.is_open
+    clock.now += 30
+    assert not breaker.allow()
+    clock.now += 31
+    assert breaker.allow()
+
+class FailingSession:
+    """Sessione che solleva un errore non di rete a ogni richiesta"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        raise RuntimeError("errore inatteso")
+
+@pytest.mark.skipif(not fetch_engine.REQUESTS_AVAILABLE, reason="richiede la libreria requests")
+def test_probe_failing_with_any_exception_reopens(clock):
+    engine = FetchEngine(rate=1000, burst=100, retries=0, breaker_threshold=1, breaker_cooldown=60)
+    session = FailingSession()
+    engine._session = session
+    url = 'https://quintaedizione.online/incantesimi/palla-di-fuoco'
+    with pytest.raises(RuntimeError):
+        engine.get(url)
+    breaker = engine.breaker_for(url)
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        engine.get(url)
+    clock.now += 61
+    with pytest.raises(RuntimeError):
+        engine.get(url)
+    # La prova fallita non lascia il circuito semi-aperto: dopo un altro cooldown si riprova
+    assert not breaker.probing
+    clock.now += 61
+    with pytest.raises(RuntimeError):
+        engine.get(url)
+    assert session.calls == 3
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Lettura a flusso e scrittura parziale dei file del compendio: iter_entries e upsert_entries
+devono dare lo stesso risultato di json.load / json.dump, anche con campi di intestazione
+dopo 'entries', e lasciare intatto il testo delle voci non toccate
+
+Uso: python -m pytest tests/test_compendium_io.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compendium import Compendium  # noqa: E402
+from compendium_io import COMPENDIUM_DIR, iter_entries, read_header, upsert_entries  # noqa: E402
+
+LIST_PACK = {
+    'label': "Incantesimi",
+    'entries': [
+        {'id': 'aaaaaaaaaaaaaaaa', 'name': "Palla di Fuoco", 'description': "<p>Un'esplosione</p>"},
+        {'id': 'bbbbbbbbbbbbbbbb', 'name': "Fulmine"},
+        {'name': "Senza id"},
+    ],
+    'mapping': {'description': 'system.description.value'},
+}
+
+DICT_PACK = {
+    'label': "Regole",
+    'entries': {
+        "Chapter 1": {'name': "Capitolo 1", 'pages': {"Intro": {'name': "Introduzione"}}},
+        "Chapter 2": "Capitolo 2",
+    },
+    'folders': {"Rules": "Regole"},
+}
+
+def write_pack(path: Path, data, indent=2) -> Path:
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=indent) + '\n', encoding='utf-8')
+    return path
+
+@pytest.mark.parametrize('indent', [2, None])
+@pytest.mark.parametrize('data', [LIST_PACK, DICT_PACK], ids=['list', 'dict'])
+def test_iter_entries_matches_json_load(tmp_path, data, indent):
+    path = write_pack(tmp_path / 'pack.json', data, indent)
+    header = {}
+    entries = list(iter_entries(path, header=header))
+
+    loaded = json.load(open(path, encoding='utf-8'))
+    if isinstance(loaded['entries'], list):
+        assert entries == [(entry.get('id'), entry) for entry in loaded['entries']]
+        assert header.pop('_shape') == 'list'
+    else:
+        assert entries == list(loaded['entries'].items())
+        assert header.pop('_shape') == 'dict'
+    # Anche i campi che seguono 'entries' fanno parte dell'intestazione
+    assert header == {key: value for key, value in loaded.items() if key != 'entries'}
+    assert read_header(path) == {**header, '_shape': 'list' if isinstance(data['entries'], list) else 'dict'}
+
+def test_empty_entries(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', {'entries': [], 'label': "Vuoto"})
+    header = {}
+    assert list(iter_entries(path, header=header)) == []
+    assert header == {'_shape': 'list', 'label': "Vuoto"}
+
+@pytest.mark.parametrize('replace', [False, True])
+def test_upsert_list_round_trip(tmp_path, replace):
+    path = write_pack(tmp_path / 'pack.json', LIST_PACK)
+    before = path.read_text(encoding='utf-8')
+    patches = {'bbbbbbbbbbbbbbbb': {'name': "Dardo di Fulmine"}, 'cccccccccccccccc': {'name': "Nuovo"}}
+    assert upsert_entries(path, patches, replace=replace) == (1, 1)
+
+    expected = json.loads(json.dumps(LIST_PACK))
+    if replace:
+        expected['entries'][1] = {'name': "Dardo di Fulmine"}
+    else:
+        expected['entries'][1]['name'] = "Dardo di Fulmine"
+    expected['entries'].append({'id': 'cccccccccccccccc', 'name': "Nuovo"})
+    assert json.load(open(path, encoding='utf-8')) == expected
+    # La voce non toccata è copiata così com'era
+    untouched = json.dumps(LIST_PACK['entries'][0], ensure_ascii=False, indent=2).replace('\n', '\n    ')
+    assert untouched in before and untouched in path.read_text(encoding='utf-8')
+
+def test_upsert_dict_round_trip_keeps_trailing_header(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', DICT_PACK, indent=None)
+    assert upsert_entries(path, {"Chapter 3": {'name': "Capitolo 3"}}) == (0, 1)
+    expected = json.loads(json.dumps(DICT_PACK))
+    expected['entries']["Chapter 3"] = {'name': "Capitolo 3"}
+    assert json.load(open(path, encoding='utf-8')) == expected
+
+def test_upsert_without_entries_fails_and_keeps_file(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', {'label': "x"})
+    with pytest.raises(ValueError):
+        upsert_entries(path, {'a': {'name': "A"}})
+    assert json.load(open(path, encoding='utf-8')) == {'label': "x"}
+    assert [p.name for p in tmp_path.iterdir()] == ['pack.json']
+
+def test_compendium_save_round_trip(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', DICT_PACK)
+    pack = Compendium(path)
+    assert pack.header == {'label': "Regole", 'folders': {"Rules": "Regole"}}
+    pack.upsert("Chapter 2", {'description': "Testo"})
+    assert pack.save() == 1
+    expected = json.loads(json.dumps(DICT_PACK))
+    expected['entries']["Chapter 2"] = {'name': "Capitolo 2", 'description': "Testo"}
+    assert json.load(open(path, encoding='utf-8')) == expected
+
+@pytest.mark.parametrize('path', sorted(COMPENDIUM_DIR.glob('*.json')), ids=lambda path: path.name)
+def test_real_compendium_files(path):
+    loaded = json.load(open(path, encoding='utf-8'))
+    if not isinstance(loaded, dict) or 'entries' not in loaded:
+        pytest.skip("file senza 'entries'")
+    header = {}
+    entries = list(iter_entries(path, header=header))
+    if isinstance(loaded['entries'], list):
+        assert entries == [(entry.get('id') if isinstance(entry, dict) else None, entry)
+                           for entry in loaded['entries']]
+    else:
+        assert entries == list(loaded['entries'].items())
+    header.pop('_shape')
+    assert header == {key: value for key, value in loaded.items() if key != 'entries'}
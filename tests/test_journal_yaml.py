@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Parser a righe dei journal YAML: su capitoli nel layout Foundry delle regole deve estrarre gli
+stessi name, _id e contenuti di PyYAML, per tutti gli stili di scalare usati nei file originali
+
+Uso: python -m pytest tests/test_journal_yaml.py
+"""
+
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from journal_yaml import _journal_from_data, load_journal_yaml, parse_journal_yaml  # noqa: E402
+
+# Capitolo nel formato di origin/packs/_source/rules: pagine con chiavi in ordine diverso,
+# sottoalberi da saltare che contengono a loro volta 'name', collezioni flow e commenti
+CHAPTER = textwrap.dedent('''\
+    name: 'Chapter 1: Playing the Game'
+    _id: phbChapter1000000
+    pages:
+      - sort: 100000
+        name: Rhythm of Play
+        type: text
+        _id: phbRhythmOfPlay0
+        title:
+          show: true
+          level: 1
+        image: {}
+        text:
+          format: 1
+          content: >-
+            <p>The game unfolds according to this basic pattern.</p>
+
+            <p>It's a <em>conversation</em>.</p>
+        flags:
+          core:
+            name: non una pagina
+      - name: 'Actions: Bonus, Reaction'
+        _id: phbActions000000
+        system: []
+        text:
+          content: |-
+            <ul>
+              <li>Bonus Action</li>
+            </ul>
+        # commento tra le chiavi
+        sort: 200000
+      - _id: phbQuoted0000000
+        name: "Escapes \\u00e9 \\x41 \\"quoted\\""
+        text:
+          content: 'First line
+            continues here
+
+            and it''s a new paragraph'
+      - name: Plain Scalar
+        text:
+          content: plain text that
+            spans two lines
+        _id: phbPlain00000000
+      - name: Kept Newlines
+        _id: phbKeep000000000
+        text:
+          content: |+
+            keep
+
+        ownership:
+          default: 0
+    folder: null
+    ''')
+
+EXPECTED = {
+    'name': "Chapter 1: Playing the Game",
+    '_id': 'phbChapter1000000',
+    'pages': [
+        {'name': "Rhythm of Play", '_id': 'phbRhythmOfPlay0',
+         'content': "<p>The game unfolds according to this basic pattern.</p>\n<p>It's a <em>conversation</em>.</p>"},
+        {'name': "Actions: Bonus, Reaction", '_id': 'phbActions000000',
+         'content': "<ul>\n  <li>Bonus Action</li>\n</ul>"},
+        {'name': 'Escapes é A "quoted"', '_id': 'phbQuoted0000000',
+         'content': "First line continues here\nand it's a new paragraph"},
+        {'name': "Plain Scalar", '_id': 'phbPlain00000000', 'content': "plain text that spans two lines"},
+        {'name': "Kept Newlines", '_id': 'phbKeep000000000', 'content': "keep\n\n"},
+    ],
+}
+
+def test_parses_known_chapter():
+    assert parse_journal_yaml(CHAPTER) == EXPECTED
+
+def test_crlf_line_endings():
+    assert parse_journal_yaml(CHAPTER.replace('\n', '\r\n')) == EXPECTED
+
+def test_matches_pyyaml():
+    yaml = pytest.importorskip('yaml')
+    assert parse_journal_yaml(CHAPTER) == _journal_from_data(yaml.safe_load(CHAPTER))
+
+@pytest.mark.parametrize('escape, char', [('\\L', '\u2028'), ('\\P', '\u2029'), ('\\N', '\x85'), ('\\_', '\xa0')])
+def test_double_quoted_escapes(escape, char):
+    text = f'name: "a{escape}b"\npages: []\n'
+    assert parse_journal_yaml(text)['name'] == f"a{char}b"
+
+def test_missing_fields_are_none():
+    journal = parse_journal_yaml("pages:\n  - name: Solo nome\n")
+    assert journal == {'name': None, '_id': None,
+                       'pages': [{'name': "Solo nome", '_id': None, 'content': None}]}
+
+@pytest.mark.parametrize('use_libyaml', [False, True])
+def test_load_journal_yaml(tmp_path, use_libyaml):
+    path = tmp_path / 'chapter-1.yml'
+    path.write_text(CHAPTER, encoding='utf-8')
+    assert load_journal_yaml(path, use_libyaml=use_libyaml) == EXPECTED
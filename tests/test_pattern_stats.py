@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Statistiche dei pattern di URL: ordine per tasso di successo, esclusione dei pattern che non
+funzionano mai (solo se un altro pattern dell'endpoint funziona) e salvataggio tra i run
+
+Uso: python -m pytest tests/test_pattern_stats.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pattern_stats import PatternStats  # noqa: E402
+
+PATTERNS = ['slug', 'slug-2024', 'search']
+
+def record(stats: PatternStats, endpoint: str, pattern: str, attempts: int, hits: int):
+    for index in range(attempts):
+        stats.record(endpoint, pattern, index < hits)
+
+def test_new_endpoint_keeps_original_order():
+    stats = PatternStats(path=None)
+    assert stats.order('incantesimi', PATTERNS) == PATTERNS
+
+def test_orders_by_success_rate():
+    stats = PatternStats(path=None)
+    record(stats, 'incantesimi', 'slug', 10, 2)
+    record(stats, 'incantesimi', 'slug-2024', 10, 9)
+    # 'search' senza tentativi vale 0.5: tra i due pattern misurati
+    assert stats.order('incantesimi', PATTERNS) == ['slug-2024', 'search', 'slug']
+    # Le statistiche di un endpoint non influenzano gli altri
+    assert stats.order('mostri', PATTERNS) == PATTERNS
+
+def test_prunes_patterns_that_never_work():
+    stats = PatternStats(path=None, explore_rate=0.0, prune_min_attempts=5)
+    record(stats, 'mostri', 'slug', 5, 0)
+    record(stats, 'mostri', 'search', 4, 0)
+    # Nessun pattern ha mai funzionato: non si esclude nulla
+    assert stats.order('mostri', PATTERNS) == ['slug-2024', 'search', 'slug']
+    record(stats, 'mostri', 'slug-2024', 1, 1)
+    # 'search' non ha ancora abbastanza tentativi per essere escluso
+    assert stats.order('mostri', PATTERNS) == ['slug-2024', 'search']
+
+def test_exploration_keeps_pruned_patterns():
+    stats = PatternStats(path=None, explore_rate=1.0, prune_min_attempts=5)
+    record(stats, 'mostri', 'slug', 5, 0)
+    record(stats, 'mostri', 'slug-2024', 1, 1)
+    assert stats.order('mostri', PATTERNS) == ['slug-2024', 'search', 'slug']
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / 'patterns.json'
+    stats = PatternStats(path=path)
+    record(stats, 'classi', 'slug', 3, 1)
+    stats.save()
+    reloaded = PatternStats(path=path)
+    assert reloaded.stats == {'classi': {'slug': [3, 1]}}
+    assert reloaded.summary() == ["classi: slug 1/3"]
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / 'patterns.json'
+    path.write_text('{non json', encoding='utf-8')
+    assert PatternStats(path=path).stats == {}
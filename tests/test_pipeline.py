@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Pipeline: dipendenze del grafo dei task, esecuzione che le rispetta (in parallelo e con
+--jobs 1) e propagazione dei fallimenti ai soli task che dipendono da quello fallito
+
+Uso: python -m pytest tests/test_pipeline.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import STAGES, Task, build_plan, run_plan  # noqa: E402
+
+BABELE_PACKS = {
+    'rules': 'dnd5e.rules.json',
+    'spells24': 'dnd5e.spells24.json',
+    'classes24': 'dnd5e.classes24.json',
+    'feats': 'dnd5e.feats.json',
+}
+
+def deps_of(tasks):
+    return {task.name: set(task.deps) for task in tasks}
+
+def test_plan_dependencies_follow_the_data():
+    deps = deps_of(build_plan(list(STAGES), ['rules', 'spells24', 'feats'], babele_packs=BABELE_PACKS))
+    assert deps['index'] == set()
+    assert deps['rules'] == set()
+    assert deps['pdf'] == {'rules'}
+    assert deps['api:spells24'] == {'index'}
+    assert 'api:classes24' not in deps
+    assert deps['validate:rules'] == {'rules', 'pdf'}
+    assert deps['validate:spells24'] == {'api:spells24'}
+    assert deps['validate:feats'] == set()
+    others = set(deps) - {'report', 'report:terminology'}
+    assert deps['report'] == others
+    assert deps['report:terminology'] == others
+
+def test_plan_drops_dependencies_on_unselected_stages():
+    deps = deps_of(build_plan(['api', 'validate'], ['spells24'], babele_packs=BABELE_PACKS))
+    assert deps == {'api:spells24': set(), 'validate:spells24': {'api:spells24'}}
+    # Senza pack API selezionati l'indice non serve
+    assert [task.name for task in build_plan(['index', 'rules'], ['rules'], babele_packs=BABELE_PACKS)] == ['rules']
+
+class Recorder:
+    """Registra inizio e fine dei task, thread-safe"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def task(self, name, deps=(), result=True, delay=0.0):
+        def run():
+            with self.lock:
+                self.events.append(('start', name))
+            print(f"output di {name}")
+            time.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            with self.lock:
+                self.events.append(('end', name))
+            return result
+        return Task(name, 'test', None, run, deps=tuple(deps))
+
+    def started(self):
+        return [name for event, name in self.events if event == 'start']
+
+def graph(recorder):
+    return [
+        recorder.task('a', delay=0.02),
+        recorder.task('b', delay=0.01),
+        recorder.task('c', deps=('a',)),
+        recorder.task('d', deps=('b', 'c')),
+        recorder.task('e', deps=('d',)),
+    ]
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_run_respects_dependencies(jobs):
+    recorder = Recorder()
+    tasks = graph(recorder)
+    assert run_plan(tasks, jobs=jobs, quiet=True)
+    assert all(task.status == 'ok' for task in tasks)
+    for task in tasks:
+        start = recorder.events.index(('start', task.name))
+        for dep in task.deps:
+            assert recorder.events.index(('end', dep)) < start
+    assert sorted(recorder.started()) == ['a', 'b', 'c', 'd', 'e']
+
+@pytest.mark.parametrize('failure', [False, RuntimeError("rotto")], ids=['false', 'exception'])
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_failure_skips_only_dependents(jobs, failure):
+    recorder = Recorder()
+    tasks = [
+        recorder.task('a', result=failure),
+        recorder.task('b'),
+        recorder.task('c', deps=('a',)),
+        recorder.task('d', deps=('b', 'c')),
+        recorder.task('e', deps=('b',)),
+    ]
+    assert not run_plan(tasks, jobs=jobs, quiet=True)
+    status = {task.name: task.status for task in tasks}
+    assert status == {'a': 'failed', 'b': 'ok', 'c': 'skipped', 'd': 'skipped', 'e': 'ok'}
+    assert sorted(recorder.started()) == ['a', 'b', 'e']
+    if isinstance(failure, Exception):
+        assert tasks[0].error == "RuntimeError: rotto"
+
+def test_task_output_is_collected(capsys):
+    recorder = Recorder()
+    assert run_plan([recorder.task('a'), recorder.task('b', deps=('a',))], jobs=2)
+    out = capsys.readouterr().out
+    assert "----- a -----\noutput di a" in out
+    assert "----- b -----\noutput di b" in out
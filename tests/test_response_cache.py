@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Cache delle risposte: scadenza separata per risultati positivi e negativi, modalità offline
+che usa anche le voci scadute senza scrivere, eviction LRU oltre max_entries
+
+Uso: python -m pytest tests/test_response_cache.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import response_cache  # noqa: E402
+from response_cache import MISS, ResponseCache  # noqa: E402
+
+URL = 'https://quintaedizione.online/incantesimi/palla-di-fuoco'
+OTHER_URL = 'https://quintaedizione.online/incantesimi/inesistente'
+
+class Clock:
+    """Orologio controllato dal test al posto di time.time"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock)
+    return clock
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResponseCache(tmp_path / 'cache.sqlite', ttl=100, negative_ttl=10)
+    yield cache
+    cache.close()
+
+def test_positive_and_negative_results(cache):
+    cache.set(URL, "Palla di Fuoco")
+    cache.set(OTHER_URL, None)
+    assert cache.get(URL) == (True, "Palla di Fuoco")
+    assert cache.get(OTHER_URL) == (True, None)
+    assert cache.get('https://quintaedizione.online/altro') == MISS
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_negative_results_expire_first(cache, clock):
+    cache.set(URL, "Palla di Fuoco")
+    cache.set(OTHER_URL, None)
+    clock.now += 50
+    assert cache.get(URL) == (True, "Palla di Fuoco")
+    assert cache.get(OTHER_URL) == MISS
+    clock.now += 51
+    assert cache.get(URL) == MISS
+    assert cache.purge_expired() == 2
+
+def test_refresh_renews_expired_entry(cache, clock):
+    cache.set(URL, "Palla di Fuoco", etag='"abc"')
+    clock.now += 101
+    assert cache.get(URL) == MISS
+    assert cache.validators(URL) == ("Palla di Fuoco", '"abc"', None)
+    cache.refresh(URL)
+    assert cache.get(URL) == (True, "Palla di Fuoco")
+
+def test_offline_serves_expired_and_never_writes(tmp_path, clock):
+    path = tmp_path / 'cache.sqlite'
+    online = ResponseCache(path, ttl=100, negative_ttl=10)
+    online.set(URL, "Palla di Fuoco")
+    online.close()
+    clock.now += 1000
+
+    offline = ResponseCache(path, ttl=100, negative_ttl=10, offline=True)
+    assert offline.get(URL) == (True, "Palla di Fuoco")
+    offline.set(OTHER_URL, "Non Salvato")
+    offline.refresh(URL)
+    offline.close()
+
+    reopened = ResponseCache(path, ttl=100, negative_ttl=10)
+    assert reopened.get(OTHER_URL) == MISS
+    # refresh in offline non ha rinnovato la voce
+    assert reopened.get(URL) == MISS
+    reopened.close()
+
+def test_eviction_drops_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(tmp_path / 'cache.sqlite', max_entries=2)
+    cache.set('a', "A")
+    clock.now += 1
+    cache.set('b', "B")
+    clock.now += 1
+    assert cache.get('a') == (True, "A")
+    clock.now += 1
+    cache.set('c', "C")
+    assert cache.get('b') == MISS
+    assert cache.get('a') == (True, "A")
+    assert cache.get('c') == (True, "C")
+    cache.close()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Memoria di traduzione: solo nomi esatti o con le stesse parole vengono applicati, i candidati
+fuzzy con numeri, bonus o parole diversi non vengono nemmeno proposti
+
+Uso: python -m pytest tests/test_translation_memory.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translation_memory import TranslationMemory, compatible, normalize_term  # noqa: E402
+
+# Voci reali del compendio che i vecchi match fuzzy a Dice >= 0.9 applicavano a nomi diversi
+ENTRIES = [
+    ("Mystic Arcanum (9th-level spell)", "Arcanum Mistico (Incantesimo di 9° livello)", 'classes'),
+    ("Chain Mail +3", "Cotta di Maglia +3", 'equipment24'),
+    ("Plate Armor +3", "Armatura Completa +3", 'equipment24'),
+    ("Improved Brutal Strike (2)", "Migliorato Colpo Brutale (2)", 'classfeatures'),
+    ("Lantern, Bullseye", "Lanterna Schermabile", 'items'),
+    ("Necklace of Adaptation", "Collana dell'Adattamento", 'items'),
+]
+
+@pytest.fixture
+def memory():
+    memory = TranslationMemory()
+    for english, italian, pack in ENTRIES:
+        memory.add(english, italian, pack)
+    return memory
+
+@pytest.mark.parametrize('english', [
+    "Mystic Arcanum (6th-level spell)",
+    "Chain Mail",
+    "Plate Armor",
+    "Improved Brutal Strike",
+    "Chain Mail +1",
+])
+def test_numbers_and_bonuses_never_match(memory, english):
+    assert memory.lookup(english) is None
+    assert memory.suggest(english) is None
+
+def test_exact_and_word_order_are_applied(memory):
+    assert memory.lookup("chain mail +3") == "Cotta di Maglia +3"
+    assert memory.lookup("Bullseye Lantern") == "Lanterna Schermabile"
+    assert memory.hits['exact'] == 1 and memory.hits['words'] == 1
+
+def test_fuzzy_is_only_suggested(memory):
+    assert memory.lookup("Necklace of Adaption") is None
+    suggestion = memory.suggest("Necklace of Adaption")
+    assert suggestion['italian'] == "Collana dell'Adattamento"
+    assert suggestion['match'] == 'fuzzy'
+
+def test_compatible_requires_same_words():
+    assert compatible(normalize_term("Boots of Speed"), normalize_term("Boot of Speed"), "Stivali della Velocità")
+    assert not compatible(normalize_term("Ring of Speed"), normalize_term("Boots of Speed"), "Stivali della Velocità")
+    assert not compatible(normalize_term("Potion of Healing"), normalize_term("Potion of Healing Greater"),
+                          "Pozione di Guarigione Maggiore")
+    # La traduzione non può introdurre numeri assenti dalla ricerca
+    assert not compatible(normalize_term("Mystic Arcanum"), normalize_term("Mystic Arcanum"), "Arcanum Mistico (9°)")
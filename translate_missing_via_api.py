@@ -3,25 +3,33 @@
 Script per tradurre le voci mancanti utilizzando l'API di quintaedizione.online
 """
 
+import argparse
 import json
 import re
-import time
-import urllib.parse
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+from compendium import Compendium
+from compendium_io import atomic_write_json
+from fetch_engine import REQUESTS_AVAILABLE, CircuitOpenError, configure_engine, get_engine
+from language_detect import get_detector
+from origin_index import iter_origin_entries
+from pattern_stats import get_pattern_stats
+from translation_journal import JOURNAL_SUBDIR, TranslationJournal, open_journal
+from response_reader import read_translation_name
+from response_cache import DEFAULT_CACHE_FILE, DEFAULT_TTL, configure_cache, get_cache
+from translation_memory import FUZZY_THRESHOLD, configure_memory, get_memory
+from run_metrics import add_metrics_arguments, finish_run, get_metrics, instrumented, start_run
+
+if not REQUESTS_AVAILABLE:
     print("⚠️  Libreria 'requests' non installata. Installa con: pip install requests")
 
 REPO_ROOT = Path(__file__).parent
 
 # Rate limiting
-REQUEST_DELAY = 0.5  # Secondi tra una richiesta e l'altra
-MAX_RETRIES = 3
+MAX_CONCURRENCY = 8  # Richieste contemporanee
+REQUESTS_PER_SECOND = 4.0  # Richieste al secondo verso quintaedizione.online
+MAX_RETRIES = 3  # Nuovi tentativi dopo un errore temporaneo (con backoff esponenziale)
 
 def normalize_to_slug(name: str) -> str:
     """Converte un nome inglese in uno slug per quintaedizione.online"""
@@ -31,10 +39,108 @@ def normalize_to_slug(name: str) -> str:
     slug = re.sub(r'-+', '-', slug)
     return slug.strip('-')
 
+# Status HTTP che indicano con certezza che la pagina non esiste (risultato negativo da cachare)
+NEGATIVE_STATUS_CODES = {404, 410}
+
+BASE_URL = "https://quintaedizione.online"
+
+# Pattern di URL provati per ogni voce, nell'ordine predefinito
+URL_PATTERNS = {
+    'page': "{base}/{endpoint}/{slug}",
+    'api': "{base}/api/{endpoint}/{slug}",
+    'underscore': "{base}/{endpoint}/{slug_underscore}",
+}
+
+# Pack preferiti nella memoria di traduzione per ogni tipo di voce
+MEMORY_PACKS = {
+    'spell': ('spells', 'spells24'),
+    'monster': ('monsters', 'actors24'),
+    'item': ('items', 'equipment24', 'tradegoods'),
+    'equipment': ('items', 'equipment24', 'tradegoods'),
+    'class': ('classes', 'classes24', 'subclasses'),
+    'class_feature': ('classfeatures', 'classes24', 'subclasses'),
+    'monster_feature': ('monsterfeatures',),
+}
+
+def parse_translation_response(response) -> Optional[str]:
+    """Estrae il nome italiano da una risposta HTTP 200 (HTML o JSON) letta a flusso"""
+    return read_translation_name(response)
+
+def fetch_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Scarica un singolo URL passando dalla cache persistente
+
+    Se la voce in cache è scaduta ma ha ETag/Last-Modified, la richiesta è condizionale:
+    una risposta 304 rinnova la voce senza riscaricare la pagina.
+
+    Returns:
+        (nome italiano o None, origine del risultato): l'origine è 'network' o 'cache' per
+        un esito definitivo, None se non è stato possibile stabilirlo (errore o offline)
+    """
+    cache = get_cache()
+    stale = None
+    if cache is not None:
+        hit, value = cache.get(url)
+        if hit:
+            return value, 'cache'
+        if cache.offline:
+            return None, None
+        stale = cache.validators(url)
+    
+    if not REQUESTS_AVAILABLE:
+        return None, None
+    
+    headers = {}
+    if stale is not None:
+        _, etag, last_modified = stale
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    
+    try:
+        # stream=True: il corpo viene letto solo fino al titolo (vedi response_reader)
+        response = get_engine().get(url, allow_redirects=True, headers=headers, stream=True)
+        if response.status_code != 200:
+            response.close()
+        
+        if response.status_code == 304 and stale is not None:
+            cache.refresh(url)
+            return stale[0], 'network'
+        if response.status_code == 200:
+            italian_name = parse_translation_response(response)
+        elif response.status_code in NEGATIVE_STATUS_CODES:
+            italian_name = None
+        else:
+            # Errore temporaneo del server: non salvare in cache
+            return None, None
+    except CircuitOpenError:
+        # Sito non raggiungibile: si prosegue con la sola cache
+        return None, None
+    except Exception as e:
+        print(f"   ⚠️  Errore richiesta {url}: {e}")
+        return None, None
+    
+    if cache is not None:
+        cache.set(url, italian_name, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return italian_name, 'network'
+
+def build_url(pattern: str, endpoint: str, item_slug: str) -> str:
+    """Costruisce l'URL di un pattern di URL_PATTERNS"""
+    return URL_PATTERNS[pattern].format(
+        base=BASE_URL,
+        endpoint=endpoint,
+        slug=item_slug,
+        slug_underscore=item_slug.replace('-', '_'),
+    )
+
 def fetch_translation_from_api(item_type: str, english_name: str) -> Optional[str]:
     """
     Cerca la traduzione italiana su quintaedizione.online
     
+    I pattern di URL vengono provati nell'ordine suggerito dalle statistiche dei run
+    precedenti (vedi pattern_stats), saltando quelli che per l'endpoint non funzionano mai.
+    
     Args:
         item_type: 'spell', 'monster', 'item', 'class', 'class_feature', 'monster_feature'
         english_name: Nome inglese dell'elemento
@@ -42,9 +148,6 @@ def fetch_translation_from_api(item_type: str, english_name: str) -> Optional[st
     Returns:
         Nome italiano se trovato, None altrimenti
     """
-    if not REQUESTS_AVAILABLE:
-        return None
-    
     # Mappa tipo -> endpoint base
     endpoint_map = {
         'spell': 'incantesimi',
@@ -56,333 +159,322 @@ def fetch_translation_from_api(item_type: str, english_name: str) -> Optional[st
         'monster_feature': 'mostri',
     }
     
+    # Prima la memoria di traduzione: le voci già tradotte in altri pack non richiedono la rete
+    # (solo nomi esatti o con le stesse parole; i candidati fuzzy vanno in revisione)
+    memory = get_memory()
+    if memory is not None:
+        italian_name = memory.lookup(english_name, MEMORY_PACKS.get(item_type, ()))
+        if italian_name:
+            return italian_name
+    
     base_slug = endpoint_map.get(item_type, 'incantesimi')
     item_slug = normalize_to_slug(english_name)
     
-    # Prova diversi pattern di URL
-    url_patterns = [
-        f"https://quintaedizione.online/{base_slug}/{item_slug}",
-        f"https://quintaedizione.online/api/{base_slug}/{item_slug}",
-        f"https://quintaedizione.online/{base_slug}/{item_slug.replace('-', '_')}",
-    ]
-    
-    for url in url_patterns:
-        try:
-            response = requests.get(url, timeout=10, allow_redirects=True)
-            
-            if response.status_code == 200:
-                # Se è HTML, cerca il titolo
-                if 'text/html' in response.headers.get('content-type', ''):
-                    # Cerca pattern tipo <h1> o <title> con il nome italiano
-                    title_pattern = r'<h1[^>]*>([^<]+)</h1>'
-                    match = re.search(title_pattern, response.text, re.IGNORECASE)
-                    if match:
-                        italian_name = match.group(1).strip()
-                        # Rimuovi eventuali tag HTML residui
-                        italian_name = re.sub(r'<[^>]+>', '', italian_name)
-                        if italian_name and len(italian_name) > 2:
-                            return italian_name
-                
-                # Se è JSON
-                elif 'application/json' in response.headers.get('content-type', ''):
-                    data = response.json()
-                    # Prova diversi campi comuni
-                    for field in ['name', 'nome', 'title', 'titolo', 'italian_name']:
-                        if field in data and data[field]:
-                            return str(data[field])
-            
-            time.sleep(REQUEST_DELAY)
-        except Exception as e:
-            print(f"   ⚠️  Errore richiesta {url}: {e}")
-            continue
+    get_engine().metrics.record_entry()
+    stats = get_pattern_stats()
+    for pattern in stats.order(base_slug, list(URL_PATTERNS)):
+        italian_name, source = fetch_url(build_url(pattern, base_slug, item_slug))
+        # Solo le risposte effettive del server contano per le statistiche
+        if source == 'network':
+            stats.record(base_slug, pattern, italian_name is not None)
+        if italian_name:
+            return italian_name
     
     return None
 
-def translate_spells24():
+def fetch_translations(item_type: str, items: List[Dict], journal: TranslationJournal,
+                       key_field: str) -> Iterator[Tuple[Dict, Optional[str]]]:
+    """
+    Cerca in parallelo le traduzioni di una lista di voci
+
+    Ogni traduzione trovata viene scritta nel journal dal thread che l'ha ottenuta, appena arriva,
+    così un'interruzione non perde le risposte già ricevute in attesa di una richiesta più lenta.
+
+    Args:
+        journal: journal del pack
+        key_field: campo della voce usato come chiave nel journal ('id' o 'key')
+
+    Returns:
+        Iteratore di coppie (voce, nome italiano o None) nello stesso ordine di items
+    """
+    def fetch(item: Dict) -> Optional[str]:
+        italian_name = fetch_translation_from_api(item_type, item['name'])
+        if italian_name:
+            journal.append(item[key_field], italian_name)
+        return italian_name
+
+    return get_engine().map(fetch, items)
+
+# Metodo delle proposte della memoria nei file di revisione dnd5e.<pack>.REVIEW.json
+REVIEW_METHOD = 'memoria fuzzy'
+
+def review_memory_suggestions(pack_name: str, item_type: str, unresolved: List[Tuple[str, str]],
+                              processed: List[str], repo_root: Path = REPO_ROOT) -> int:
+    """
+    Scrive in dnd5e.<pack>.REVIEW.json i candidati fuzzy della memoria per le voci non tradotte,
+    invece di applicarli al pack; sostituisce le proposte precedenti per le voci elaborate
+
+    Args:
+        unresolved: (chiave, nome inglese) delle voci senza traduzione
+        processed: chiavi di tutte le voci elaborate in questo run
+
+    Returns:
+        Numero di proposte scritte
+    """
+    memory = get_memory()
+    if memory is None:
+        return 0
+    rows = []
+    for key, english_name in unresolved:
+        candidate = memory.suggest(english_name, MEMORY_PACKS.get(item_type, ()))
+        if candidate:
+            rows.append({'id': key, 'name_en': english_name, 'suggestion': candidate['italian'],
+                         'confidence': round(candidate['score'], 3), 'method': REVIEW_METHOD,
+                         'source': f"{candidate['pack']}: {candidate['english']}"})
+    review_file = repo_root / 'compendium' / f'dnd5e.{pack_name}.REVIEW.json'
+    if review_file.exists():
+        with open(review_file, 'r', encoding='utf-8') as f:
+            review = json.load(f)
+    elif rows:
+        review = {'note': 'Traduzioni che potrebbero richiedere revisione manuale', 'total': 0, 'needs_review': []}
+    else:
+        return 0
+    previous = review.get('needs_review', [])
+    processed_keys = set(processed)
+    kept = [row for row in previous if row.get('method') != REVIEW_METHOD or row.get('id') not in processed_keys]
+    if not rows and len(kept) == len(previous):
+        return 0
+    review['needs_review'] = kept + rows
+    review['total'] = len(review['needs_review'])
+    atomic_write_json(review_file, review)
+    if rows:
+        print(f"🔍 {len(rows)} proposte fuzzy della memoria da rivedere in {review_file.name}")
+    return len(rows)
+
+def apply_resumed(pack: Compendium, resumed: Dict[str, str]) -> int:
+    """Applica al pack le traduzioni recuperate dal journal, restituisce quante sono"""
+    if resumed:
+        print(f"♻️  Riprese {len(resumed)} traduzioni dal journal del run precedente\n")
+    for key, italian_name in resumed.items():
+        pack.upsert(key, {'name': italian_name})
+    return len(resumed)
+
+def merge_journal(journal: TranslationJournal, pack: Compendium, resumed: Optional[Dict[str, str]] = None):
+    """Unisce il journal al pack con un'unica scrittura, poi lo elimina"""
+    if resumed:
+        apply_resumed(pack, resumed)
+    pack.save()
+    journal.clear()
+
+@instrumented('api', pack='spells24')
+def translate_spells24(resume: bool = False, repo_root: Path = REPO_ROOT):
     """Traduce gli incantesimi mancanti in spells24"""
     print("\n=== TRADUZIONE SPELLS24 ===\n")
     
-    json_file = REPO_ROOT / 'compendium/dnd5e.spells24.json'
-    origin_dir = REPO_ROOT / 'origin/packs/_source/spells24'
+    json_file = repo_root / 'compendium/dnd5e.spells24.json'
     
     # Carica JSON esistente
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Trova incantesimi mancanti (quelli senza traduzione italiana)
-    translated_ids = set()
-    if 'entries' in data and isinstance(data['entries'], list):
-        for entry in data['entries']:
-            if isinstance(entry, dict) and 'id' in entry:
-                translated_ids.add(entry['id'])
-                # Controlla se il nome è italiano
-                if 'name' in entry:
-                    name = entry['name']
-                    italian_chars = ['à', 'è', 'é', 'ì', 'ò', 'ù']
-                    if any(c in name for c in italian_chars):
-                        continue  # Già tradotto
-    
-    # Trova incantesimi originali non tradotti
+    pack = Compendium(json_file)
+    
+    # Trova incantesimi originali non tradotti: assenti dal pack o con il nome identico
+    # all'originale inglese
     missing_spells = []
-    if origin_dir.exists():
-        for yml_file in sorted(origin_dir.rglob("*.yml")):
-            if yml_file.name.startswith('_'):
-                continue
-            try:
-                with open(yml_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    id_match = re.search(r'^_id:\s*(.+)$', content, re.MULTILINE)
-                    name_match = re.search(r'^name:\s*(.+)$', content, re.MULTILINE)
-                    if id_match and name_match:
-                        spell_id = id_match.group(1).strip()
-                        spell_name = name_match.group(1).strip()
-                        
-                        # Verifica se manca
-                        if spell_id not in translated_ids:
-                            missing_spells.append({'id': spell_id, 'name': spell_name, 'file': yml_file.name})
-            except Exception as e:
-                print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+    untranslated = []
+    for spell in iter_origin_entries('spells24'):
+        entry = pack.get(spell['id'])
+        if entry is None:
+            missing_spells.append(spell)
+        elif isinstance(entry, dict) and ' '.join(str(entry.get('name', '')).split()).casefold() == \
+                ' '.join(spell['name'].split()).casefold():
+            untranslated.append(spell)
+    # Un nome identico all'originale può essere già italiano ("Clone"): si ricerca solo se il
+    # classificatore non lo riconosce come italiano
+    languages = get_detector().classify([spell['name'] for spell in untranslated])
+    untranslated = [spell for spell, language in zip(untranslated, languages) if language != 'it']
+    if untranslated:
+        print(f"🇬🇧 {len(untranslated)} incantesimi con il nome ancora in inglese")
+    missing_spells.extend(untranslated)
+
+    # Journal dei risultati: con resume salta le voci già tradotte in un run interrotto
+    journal, resumed = open_journal('spells24', resume, repo_root / JOURNAL_SUBDIR)
+    missing_spells = [spell for spell in missing_spells if spell['id'] not in resumed]
     
     if not missing_spells:
         print("✅ Nessun incantesimo mancante!")
+        merge_journal(journal, pack, resumed)
         return
     
     print(f"📋 Trovati {len(missing_spells)} incantesimi da tradurre\n")
+    get_metrics().add_entries(len(missing_spells))
     
     # Traduci
-    translated_count = 0
-    for spell in missing_spells:
+    translated_count = apply_resumed(pack, resumed)
+    unresolved = []
+    for spell, italian_name in fetch_translations('spell', missing_spells, journal, 'id'):
         print(f"🔍 Cercando traduzione per: {spell['name']}")
-        italian_name = fetch_translation_from_api('spell', spell['name'])
         
         if italian_name:
-            # Aggiungi al JSON
-            if 'entries' not in data:
-                data['entries'] = []
-            
-            # Verifica se esiste già entry con questo ID
-            entry_exists = False
-            for entry in data['entries']:
-                if isinstance(entry, dict) and entry.get('id') == spell['id']:
-                    entry['name'] = italian_name
-                    entry_exists = True
-                    break
-            
-            if not entry_exists:
-                data['entries'].append({
-                    'id': spell['id'],
-                    'name': italian_name
-                })
-            
+            # Aggiorna la voce con questo ID o aggiungila in fondo
+            pack.upsert(spell['id'], {'name': italian_name})
             translated_count += 1
             print(f"   ✅ Tradotto: {italian_name}")
         else:
+            unresolved.append((spell['id'], spell['name']))
             print(f"   ❌ Traduzione non trovata")
+    review_memory_suggestions('spells24', 'spell', unresolved, [spell['id'] for spell in missing_spells], repo_root)
     
-    # Salva
+    # Salva (riscrive solo le voci toccate)
     if translated_count > 0:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        merge_journal(journal, pack)
         print(f"\n✅ Salvati {translated_count} incantesimi tradotti in {json_file}")
     else:
         print("\n⚠️  Nessuna traduzione trovata")
 
-def translate_classes24():
+@instrumented('api', pack='classes24')
+def translate_classes24(resume: bool = False, repo_root: Path = REPO_ROOT):
     """Traduce le classi/caratteristiche mancanti in classes24"""
     print("\n=== TRADUZIONE CLASSES24 ===\n")
     
-    json_file = REPO_ROOT / 'compendium/dnd5e.classes24.json'
-    origin_dir = REPO_ROOT / 'origin/packs/_source/classes24'
-    
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    json_file = repo_root / 'compendium/dnd5e.classes24.json'
     
-    if 'entries' not in data:
+    pack = Compendium(json_file)
+    if pack.shape != 'dict':
         print("❌ Struttura JSON non valida")
         return
     
-    translated_keys = set(data['entries'].keys())
-    
     # Trova voci mancanti
     missing_classes = []
-    if origin_dir.exists():
-        for yml_file in sorted(origin_dir.rglob("*.yml")):
-            if yml_file.name.startswith('_'):
-                continue
-            try:
-                with open(yml_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    id_match = re.search(r'^_id:\s*(.+)$', content, re.MULTILINE)
-                    name_match = re.search(r'^name:\s*(.+)$', content, re.MULTILINE)
-                    if id_match and name_match:
-                        class_id = id_match.group(1).strip()
-                        class_name = name_match.group(1).strip()
-                        
-                        # Usa ID o nome come chiave
-                        key = class_id if class_id in translated_keys else class_name
-                        if key not in translated_keys:
-                            missing_classes.append({'id': class_id, 'name': class_name, 'key': key})
-            except Exception as e:
-                print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+    for entry in iter_origin_entries('classes24'):
+        # Usa ID o nome come chiave
+        key = entry['id'] if entry['id'] in pack else entry['name']
+        if key not in pack:
+            missing_classes.append({'id': entry['id'], 'name': entry['name'], 'key': key})
+
+    # Journal dei risultati: con resume salta le voci già tradotte in un run interrotto
+    journal, resumed = open_journal('classes24', resume, repo_root / JOURNAL_SUBDIR)
+    missing_classes = [cls for cls in missing_classes if cls['key'] not in resumed]
     
     if not missing_classes:
         print("✅ Nessuna classe mancante!")
+        merge_journal(journal, pack, resumed)
         return
     
     print(f"📋 Trovate {len(missing_classes)} voci da tradurre\n")
+    get_metrics().add_entries(len(missing_classes))
     
-    translated_count = 0
-    for cls in missing_classes:
+    translated_count = apply_resumed(pack, resumed)
+    unresolved = []
+    for cls, italian_name in fetch_translations('class_feature', missing_classes, journal, 'key'):
         print(f"🔍 Cercando traduzione per: {cls['name']}")
-        italian_name = fetch_translation_from_api('class_feature', cls['name'])
         
         if italian_name:
             # Aggiungi al JSON
-            key = cls['key']
-            data['entries'][key] = {
-                'name': italian_name
-            }
+            pack.upsert(cls['key'], {'name': italian_name})
             translated_count += 1
             print(f"   ✅ Tradotto: {italian_name}")
         else:
+            unresolved.append((cls['key'], cls['name']))
             print(f"   ❌ Traduzione non trovata")
+    review_memory_suggestions('classes24', 'class_feature', unresolved, [cls['key'] for cls in missing_classes], repo_root)
     
     if translated_count > 0:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        merge_journal(journal, pack)
         print(f"\n✅ Salvate {translated_count} traduzioni in {json_file}")
 
-def translate_equipment24():
+@instrumented('api', pack='equipment24')
+def translate_equipment24(resume: bool = False, repo_root: Path = REPO_ROOT):
     """Traduce gli equipaggiamenti mancanti"""
     print("\n=== TRADUZIONE EQUIPMENT24 ===\n")
     
-    json_file = REPO_ROOT / 'compendium/dnd5e.equipment24.json'
-    origin_dir = REPO_ROOT / 'origin/packs/_source/equipment24'
+    json_file = repo_root / 'compendium/dnd5e.equipment24.json'
     
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    if 'entries' not in data:
+    pack = Compendium(json_file)
+    if pack.shape != 'dict':
         print("❌ Struttura JSON non valida")
         return
     
-    translated_keys = set(data['entries'].keys())
-    
     missing_items = []
-    if origin_dir.exists():
-        for yml_file in sorted(origin_dir.rglob("*.yml")):
-            if yml_file.name.startswith('_'):
-                continue
-            try:
-                with open(yml_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    id_match = re.search(r'^_id:\s*(.+)$', content, re.MULTILINE)
-                    name_match = re.search(r'^name:\s*(.+)$', content, re.MULTILINE)
-                    if id_match and name_match:
-                        item_id = id_match.group(1).strip()
-                        item_name = name_match.group(1).strip()
-                        
-                        key = item_id if item_id in translated_keys else item_name
-                        if key not in translated_keys:
-                            missing_items.append({'id': item_id, 'name': item_name, 'key': key})
-            except Exception as e:
-                print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+    for entry in iter_origin_entries('equipment24'):
+        key = entry['id'] if entry['id'] in pack else entry['name']
+        if key not in pack:
+            missing_items.append({'id': entry['id'], 'name': entry['name'], 'key': key})
+
+    # Journal dei risultati: con resume salta le voci già tradotte in un run interrotto
+    journal, resumed = open_journal('equipment24', resume, repo_root / JOURNAL_SUBDIR)
+    missing_items = [item for item in missing_items if item['key'] not in resumed]
     
     if not missing_items:
         print("✅ Nessun equipaggiamento mancante!")
+        merge_journal(journal, pack, resumed)
         return
     
     print(f"📋 Trovati {len(missing_items)} equipaggiamenti da tradurre\n")
+    get_metrics().add_entries(len(missing_items))
     
-    translated_count = 0
-    for item in missing_items:
+    translated_count = apply_resumed(pack, resumed)
+    unresolved = []
+    for item, italian_name in fetch_translations('equipment', missing_items, journal, 'key'):
         print(f"🔍 Cercando traduzione per: {item['name']}")
-        italian_name = fetch_translation_from_api('equipment', item['name'])
         
         if italian_name:
-            key = item['key']
-            data['entries'][key] = {
-                'name': italian_name
-            }
+            pack.upsert(item['key'], {'name': italian_name})
             translated_count += 1
             print(f"   ✅ Tradotto: {italian_name}")
         else:
+            unresolved.append((item['key'], item['name']))
             print(f"   ❌ Traduzione non trovata")
+    review_memory_suggestions('equipment24', 'equipment', unresolved, [item['key'] for item in missing_items], repo_root)
     
     if translated_count > 0:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        merge_journal(journal, pack)
         print(f"\n✅ Salvati {translated_count} equipaggiamenti tradotti")
 
-def translate_monster_features():
+@instrumented('api', pack='monsterfeatures')
+def translate_monster_features(resume: bool = False, repo_root: Path = REPO_ROOT):
     """Traduce le caratteristiche mostri mancanti"""
     print("\n=== TRADUZIONE MONSTER FEATURES ===\n")
     
-    json_file = REPO_ROOT / 'compendium/dnd5e.monsterfeatures.json'
-    origin_dir = REPO_ROOT / 'origin/packs/_source/monsterfeatures'
-    
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    json_file = repo_root / 'compendium/dnd5e.monsterfeatures.json'
     
-    if 'entries' not in data or not isinstance(data['entries'], list):
+    pack = Compendium(json_file)
+    if pack.shape != 'list':
         print("❌ Struttura JSON non valida")
         return
     
-    translated_ids = {entry.get('id') for entry in data['entries'] if isinstance(entry, dict) and 'id' in entry}
-    
     missing_features = []
-    if origin_dir.exists():
-        for yml_file in sorted(origin_dir.rglob("*.yml")):
-            if yml_file.name.startswith('_'):
-                continue
-            try:
-                with open(yml_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    id_match = re.search(r'^_id:\s*(.+)$', content, re.MULTILINE)
-                    name_match = re.search(r'^name:\s*(.+)$', content, re.MULTILINE)
-                    if id_match and name_match:
-                        feat_id = id_match.group(1).strip()
-                        feat_name = name_match.group(1).strip()
-                        
-                        if feat_id not in translated_ids:
-                            missing_features.append({'id': feat_id, 'name': feat_name})
-            except Exception as e:
-                print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+    for entry in iter_origin_entries('monsterfeatures'):
+        if entry['id'] not in pack:
+            missing_features.append({'id': entry['id'], 'name': entry['name']})
+
+    # Journal dei risultati: con resume salta le voci già tradotte in un run interrotto
+    journal, resumed = open_journal('monsterfeatures', resume, repo_root / JOURNAL_SUBDIR)
+    missing_features = [feat for feat in missing_features if feat['id'] not in resumed]
     
     if not missing_features:
         print("✅ Nessuna caratteristica mostro mancante!")
+        merge_journal(journal, pack, resumed)
         return
     
     print(f"📋 Trovate {len(missing_features)} caratteristiche da tradurre\n")
+    get_metrics().add_entries(len(missing_features))
     
-    translated_count = 0
-    for feat in missing_features:
+    translated_count = apply_resumed(pack, resumed)
+    unresolved = []
+    for feat, italian_name in fetch_translations('monster_feature', missing_features, journal, 'id'):
         print(f"🔍 Cercando traduzione per: {feat['name']}")
-        italian_name = fetch_translation_from_api('monster_feature', feat['name'])
         
         if italian_name:
-            # Trova entry esistente o crea nuova
-            entry_found = False
-            for entry in data['entries']:
-                if isinstance(entry, dict) and entry.get('id') == feat['id']:
-                    entry['name'] = italian_name
-                    entry_found = True
-                    break
-            
-            if not entry_found:
-                data['entries'].append({
-                    'id': feat['id'],
-                    'name': italian_name
-                })
-            
+            # Aggiorna la voce esistente o crea una nuova
+            pack.upsert(feat['id'], {'name': italian_name})
             translated_count += 1
             print(f"   ✅ Tradotto: {italian_name}")
         else:
+            unresolved.append((feat['id'], feat['name']))
             print(f"   ❌ Traduzione non trovata")
+    review_memory_suggestions('monsterfeatures', 'monster_feature', unresolved, [feat['id'] for feat in missing_features], repo_root)
     
     if translated_count > 0:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        merge_journal(journal, pack)
         print(f"\n✅ Salvate {translated_count} caratteristiche tradotte")
 
 def test_api_connection(item_type: str, english_name: str):
@@ -399,47 +491,133 @@ def test_api_connection(item_type: str, english_name: str):
         print(f"❌ Traduzione non trovata")
         print(f"\n💡 Suggerimenti:")
         print(f"   1. Verifica che quintaedizione.online sia raggiungibile")
-        print(f"   2. Controlla manualmente: https://quintaedizione.online/incantesimi/{normalize_to_slug(english_name)}")
+        print(f"   2. Controlla manualmente: {build_url('page', 'incantesimi', normalize_to_slug(english_name))}")
         print(f"   3. Potrebbe essere necessario adattare lo script all'API reale")
         return False
 
+# Pack traducibili via API: nome del pack in origin -> funzione di traduzione
+API_PACKS = {
+    'spells24': translate_spells24,
+    'classes24': translate_classes24,
+    'equipment24': translate_equipment24,
+    'monsterfeatures': translate_monster_features,
+}
+
+def add_network_arguments(parser: argparse.ArgumentParser):
+    """Aggiunge le opzioni di rete, cache e memoria di traduzione (condivise con pipeline.py)"""
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help=f"indirizzo del sito da interrogare (default: {BASE_URL})")
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f"richieste contemporanee (default: {MAX_CONCURRENCY})")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND,
+                        help=f"richieste al secondo per host (default: {REQUESTS_PER_SECOND})")
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES,
+                        help=f"nuovi tentativi dopo un errore temporaneo (default: {MAX_RETRIES})")
+    parser.add_argument('--resume', action='store_true',
+                        help="riprende un run interrotto dal journal, saltando le voci già tradotte")
+    parser.add_argument('--offline', action='store_true',
+                        help="usa solo la cache locale, senza richieste di rete")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="disattiva la cache persistente delle risposte")
+    parser.add_argument('--cache-file', type=Path, default=DEFAULT_CACHE_FILE,
+                        help=f"file SQLite della cache (default: {DEFAULT_CACHE_FILE.relative_to(REPO_ROOT)})")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL / 86400,
+                        help="validità delle risposte in cache, in giorni (default: %(default)s)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="non usa la memoria di traduzione costruita dai pack già tradotti")
+    parser.add_argument('--memory-threshold', type=float, default=FUZZY_THRESHOLD,
+                        help="somiglianza minima per proporre in revisione una traduzione fuzzy dalla memoria (default: %(default)s)")
+
+def configure_network(args: argparse.Namespace):
+    """Configura sito, motore di fetch, cache e memoria di traduzione dalle opzioni di add_network_arguments"""
+    global BASE_URL
+    BASE_URL = args.base_url.rstrip('/')
+    configure_engine(concurrency=args.concurrency, rate=args.rate, retries=args.retries)
+    if not args.no_cache:
+        configure_cache(path=args.cache_file, ttl=args.cache_ttl * 86400, offline=args.offline)
+    configure_memory(enabled=not args.no_memory, threshold=args.memory_threshold, verbose=True)
+
+def print_network_summary():
+    """Stampa le statistiche di cache, memoria, rete e pattern e salva le statistiche dei pattern"""
+    cache = get_cache()
+    if cache is not None:
+        print(f"\n💾 Cache: {cache.hits} risposte riutilizzate, {cache.misses} non presenti")
+    
+    memory = get_memory()
+    if memory is not None:
+        print(f"🧠 {memory.summary()}")
+    
+    print("\n📊 Statistiche di rete:")
+    for line in get_engine().metrics.summary_lines():
+        print(f"   {line}")
+    stats = get_pattern_stats()
+    for line in stats.summary():
+        print(f"   Pattern {line}")
+    stats.save()
+
+def parse_args():
+    """Legge le opzioni da riga di comando"""
+    parser = argparse.ArgumentParser(description="Traduce le voci mancanti via quintaedizione.online")
+    add_network_arguments(parser)
+    add_metrics_arguments(parser, 'translate_missing_via_api')
+    parser.add_argument('--packs',
+                        help=f"pack da tradurre senza menu, separati da virgola ({', '.join(API_PACKS)} o all)")
+    args = parser.parse_args()
+    if args.offline and args.no_cache:
+        parser.error("--offline richiede la cache (incompatibile con --no-cache)")
+    if args.packs:
+        args.packs = list(API_PACKS) if args.packs == 'all' else [pack.strip() for pack in args.packs.split(',')]
+        unknown = [pack for pack in args.packs if pack not in API_PACKS]
+        if unknown:
+            parser.error(f"pack sconosciuti: {', '.join(unknown)}")
+    return args
+
 def main():
     """Esegue tutte le traduzioni"""
+    args = parse_args()
+    configure_network(args)
+    start_run(args)
+    
     print("=" * 70)
     print("🌐 TRADUZIONE VOCI MANCANTI VIA API")
     print("=" * 70)
     
-    if not REQUESTS_AVAILABLE:
+    if args.offline:
+        print("\n📴 Modalità offline: uso solo la cache locale")
+    elif not REQUESTS_AVAILABLE:
         print("\n❌ ERRORE: Libreria 'requests' non disponibile!")
         print("   Installa con: pip install requests")
         return
     
-    # Menu interattivo
-    print("\nCosa vuoi fare?")
-    print("0. Test API (verifica connessione con un elemento di esempio)")
-    print("1. Tutto (spells24, classes24, equipment24, monster_features)")
-    print("2. Solo spells24 (10 incantesimi)")
-    print("3. Solo classes24 (54 voci)")
-    print("4. Solo equipment24 (90 voci)")
-    print("5. Solo monster_features (36 voci)")
-    
-    choice = input("\nScelta (0-5): ").strip()
-    
-    if choice == '0':
-        # Test con un incantesimo noto
-        test_api_connection('spell', 'Shining Smite')
-        test_api_connection('equipment', 'Lantern, Bullseye')
-        test_api_connection('class_feature', 'Tactical Master')
-        return
+    if args.packs:
+        packs = args.packs
+    else:
+        # Menu interattivo (per l'esecuzione non interattiva: --packs oppure pipeline.py)
+        print("\nCosa vuoi fare?")
+        print("0. Test API (verifica connessione con un elemento di esempio)")
+        print("1. Tutto (spells24, classes24, equipment24, monster_features)")
+        print("2. Solo spells24 (10 incantesimi)")
+        print("3. Solo classes24 (54 voci)")
+        print("4. Solo equipment24 (90 voci)")
+        print("5. Solo monster_features (36 voci)")
+        
+        choice = input("\nScelta (0-5): ").strip()
+        
+        if choice == '0':
+            # Test con un incantesimo noto
+            test_api_connection('spell', 'Shining Smite')
+            test_api_connection('equipment', 'Lantern, Bullseye')
+            test_api_connection('class_feature', 'Tactical Master')
+            return
+        
+        menu = {'2': 'spells24', '3': 'classes24', '4': 'equipment24', '5': 'monsterfeatures'}
+        packs = list(API_PACKS) if choice == '1' else [menu[choice]] if choice in menu else []
+    
+    for pack in packs:
+        API_PACKS[pack](resume=args.resume)
     
-    if choice == '1' or choice == '2':
-        translate_spells24()
-    if choice == '1' or choice == '3':
-        translate_classes24()
-    if choice == '1' or choice == '4':
-        translate_equipment24()
-    if choice == '1' or choice == '5':
-        translate_monster_features()
+    print_network_summary()
+    finish_run(args)
     
     print("\n" + "=" * 70)
     print("✅ TRADUZIONE COMPLETATA")
@@ -4,73 +4,65 @@ Script per completare le traduzioni delle regole (dnd5e.rules)
 Estrae contenuto dai file YAML originali e lo aggiunge alle pagine mancanti
 """
 
-import re
+import argparse
+import hashlib
 import json
 from pathlib import Path
 from collections import OrderedDict
 
-def read_yaml_file(yml_file):
-    """Legge un file YAML delle regole e estrae le pagine usando regex"""
+from compendium import Compendium
+from journal_yaml import load_journal_yaml
+from language_detect import get_detector
+from run_metrics import add_metrics_arguments, finish_run, get_metrics, instrumented, start_run
+
+def read_yaml_file(yml_file, use_libyaml=False):
+    """
+    Legge un file YAML delle regole ed estrae le pagine con il loro contenuto
+
+    Usa il parser a righe di journal_yaml (o, con use_libyaml, il loader C di PyYAML se installato),
+    che gestisce i blocchi > e |, le stringhe tra apici e le pagine in qualsiasi ordine di chiavi.
+
+    Returns:
+        {'name': nome del journal, 'pages': {nome pagina: {'name', 'text'}}} oppure None
+    """
     try:
-        with open(yml_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        pages = {}
-        
-        # Estrai nome del journal
-        journal_name_match = re.search(r'^name:\s*[\'"]?([^\'"\n]+)[\'"]?$', content, re.MULTILINE)
-        journal_name = journal_name_match.group(1).strip() if journal_name_match else None
-        
-        # Pattern semplificato: trova ogni pagina dividendo per "name:" e poi cercando "content: >-"
-        # Divide il contenuto in sezioni per pagina
-        page_sections = re.split(r'^\s*-\s+name:\s*', content, flags=re.MULTILINE)
-        
-        for section in page_sections[1:]:  # Salta la prima (intestazione)
-            # Estrai nome pagina (prima riga)
-            first_line = section.split('\n')[0].strip()
-            page_name = first_line.strip("'\"")
-            
-            # Cerca "content: >-" in questa sezione
-            content_match = re.search(r'content:\s*>\-\s*\n((?:\s+.*\n?)+?)(?=^\s+name:|^\s+_id:|^[a-zA-Z_]+:|$)', section, re.MULTILINE | re.DOTALL)
-            
-            if content_match:
-                page_text_raw = content_match.group(1)
-                
-                # Rimuovi indentazione comune
-                lines = [line for line in page_text_raw.split('\n') if line.strip()]
-                if lines:
-                    indent_levels = [len(line) - len(line.lstrip()) for line in lines]
-                    if indent_levels:
-                        min_indent = min(indent_levels)
-                        page_text = '\n'.join(line[min_indent:] if len(line) > min_indent else line for line in lines).strip()
-                    else:
-                        page_text = '\n'.join(lines).strip()
-                    
-                    if page_text and page_name:
-                        pages[page_name] = {
-                            'name': page_name,
-                            'text': page_text
-                        }
-        
-        return {
-            'name': journal_name,
-            'pages': pages
-        }
+        journal = load_journal_yaml(yml_file, use_libyaml)
     except Exception as e:
         print(f"Errore lettura {yml_file}: {e}")
-        import traceback
-        traceback.print_exc()
         return None
+    
+    pages = {}
+    for page in journal['pages']:
+        page_name = page['name']
+        page_text = (page['content'] or '').strip()
+        if page_name and page_text:
+            pages[page_name] = {
+                'name': page_name,
+                'text': page_text
+            }
+    
+    return {
+        'name': journal['name'],
+        'pages': pages
+    }
+
+# Caratteri ignorati nel confronto dei nomi di pagina
+_PAGE_NAME_STRIP = str.maketrans('', '', " -',:.")
 
 def normalize_page_name(name):
     """Normalizza il nome della pagina per matching"""
     if not name:
         return ""
     # Rimuovi caratteri speciali e normalizza
-    return name.strip().lower().replace(' ', '').replace('-', '').replace("'", "").replace(',', '').replace(':', '').replace('.', '')
+    return name.strip().lower().translate(_PAGE_NAME_STRIP)
 
 def find_page_match(page_name, existing_pages):
-    """Trova corrispondenza tra nome pagina originale e esistente"""
+    """
+    Trova corrispondenza tra nome pagina originale e esistente
+
+    Versione lineare di riferimento: translate_rules() usa PageMatcher, che restituisce gli
+    stessi risultati (verificato da benchmarks/bench_page_matcher.py)
+    """
     page_norm = normalize_page_name(page_name)
     
     for existing_key, existing_value in existing_pages.items():
@@ -88,6 +80,116 @@ def find_page_match(page_name, existing_pages):
     
     return None
 
+class PageMatcher:
+    """
+    Versione indicizzata di find_page_match per le pagine di un capitolo
+
+    Precalcola i nomi normalizzati delle pagine esistenti, un indice esatto nome -> pagina e un
+    indice invertito a trigrammi per il matching parziale (in entrambe le direzioni: se A contiene
+    B, tutti i trigrammi di B compaiono in A). Restituisce gli stessi risultati di
+    find_page_match: la prima pagina (in ordine) che corrisponde esattamente o parzialmente.
+    """
+
+    def __init__(self, existing_pages):
+        self.keys = []          # chiavi delle pagine, in ordine di inserimento
+        self.norms = []         # nomi normalizzati, paralleli a keys
+        self.gram_counts = []   # numero di trigrammi distinti di ogni nome
+        self.exact = {}         # nome normalizzato -> primo indice
+        self.trigrams = {}      # trigramma -> lista di indici
+        self.short = []         # indici con nome normalizzato più corto di 3 caratteri
+        for existing_key, existing_value in existing_pages.items():
+            self.add(existing_key, existing_value)
+
+    @staticmethod
+    def _grams(norm):
+        return {norm[i:i + 3] for i in range(len(norm) - 2)}
+
+    def add(self, existing_key, existing_value):
+        """Aggiunge una pagina all'indice (da chiamare quando si crea una nuova pagina)"""
+        existing_name = existing_value.get('name', existing_key) if isinstance(existing_value, dict) else existing_key
+        norm = normalize_page_name(existing_name)
+        index = len(self.keys)
+        grams = self._grams(norm)
+        self.keys.append(existing_key)
+        self.norms.append(norm)
+        self.gram_counts.append(len(grams))
+        self.exact.setdefault(norm, index)
+        if len(norm) < 3:
+            self.short.append(index)
+        for gram in grams:
+            self.trigrams.setdefault(gram, []).append(index)
+
+    def _partial(self, page_norm, limit):
+        """Primo indice (< limit) che contiene page_norm o è contenuto in page_norm"""
+        best = limit
+        
+        # Nomi troppo corti per i trigrammi: verifica diretta
+        for index in self.short:
+            if index >= best:
+                break
+            if self.norms[index] in page_norm or page_norm in self.norms[index]:
+                best = index
+                break
+        
+        page_grams = self._grams(page_norm)
+        if not page_grams:
+            # page_norm troppo corto per i trigrammi: scansione lineare (caso raro)
+            for index in range(best):
+                if page_norm in self.norms[index]:
+                    return index
+            return best
+        
+        # Nomi che contengono page_norm: hanno tutti i suoi trigrammi, quindi basta scorrere
+        # la lista del trigramma più raro (ordinata per indice)
+        postings = [self.trigrams.get(gram, ()) for gram in page_grams]
+        rarest = min(postings, key=len)
+        for index in rarest:
+            if index >= best:
+                break
+            if page_norm in self.norms[index]:
+                best = index
+                break
+        
+        # Nomi contenuti in page_norm: hanno solo trigrammi della query. Con liste corte si
+        # contano i trigrammi condivisi; con liste lunghe (trigrammi comuni, molte pagine) si
+        # cerca ogni sottostringa della query nell'indice esatto, con costo indipendente dal
+        # numero di pagine
+        length = len(page_norm)
+        if sum(len(posting) for posting in postings) <= length * (length - 1) // 2:
+            shared = {}
+            for posting in postings:
+                for index in posting:
+                    if index >= best:
+                        break
+                    shared[index] = shared.get(index, 0) + 1
+            for index in sorted(shared):
+                if index >= best:
+                    break
+                if shared[index] == self.gram_counts[index] and self.norms[index] in page_norm:
+                    return index
+        else:
+            exact = self.exact
+            for start in range(length - 2):
+                for end in range(start + 3, length + 1):
+                    index = exact.get(page_norm[start:end])
+                    if index is not None and index < best:
+                        best = index
+        return best
+
+    def match(self, page_name):
+        """Trova corrispondenza tra nome pagina originale e pagine indicizzate"""
+        page_norm = normalize_page_name(page_name)
+        
+        # Matching esatto
+        exact_index = self.exact.get(page_norm)
+        best = exact_index if exact_index is not None else len(self.keys)
+        
+        # Matching parziale (solo se può precedere il match esatto)
+        if len(page_name) > 3 and best > 0:
+            best = self._partial(page_norm, best)
+        
+        return self.keys[best] if best < len(self.keys) else None
+
 # Mapping file YAML -> capitolo in JSON
 FILE_TO_CHAPTER = {
     'chapter-1-beyond-1st-level.yml': 'Chapter 1: Beyond 1st Level',
@@ -108,14 +210,99 @@ FILE_TO_CHAPTER = {
     'appendix-e-rules.yml': 'Appendix E: Rules',
 }
 
-def translate_rules():
-    """Completa le traduzioni delle regole"""
+def build_chapter_index(entries):
+    """
+    Precalcola il capitolo JSON corrispondente a ogni voce di FILE_TO_CHAPTER
+
+    Returns:
+        {nome capitolo: chiave in entries} (solo i capitoli trovati)
+    """
+    normalized_keys = {}
+    for key in entries.keys():
+        normalized_keys.setdefault(normalize_page_name(key), key)
+    
+    chapter_index = {}
+    for chapter_name in FILE_TO_CHAPTER.values():
+        chapter_norm = normalize_page_name(chapter_name)
+        for key in entries.keys():
+            if chapter_name in key:
+                chapter_index[chapter_name] = key
+                break
+            if normalized_keys.get(chapter_norm) == key:
+                chapter_index[chapter_name] = key
+                break
+    return chapter_index
+
+def find_chapter_key(file_name, chapter_index):
+    """Trova la chiave del capitolo JSON per un file YAML"""
+    chapter_name = FILE_TO_CHAPTER.get(file_name)
+    if chapter_name is None:
+        # Nome file non esatto: stessa ricerca per sottostringa di prima
+        for yml_key, name in FILE_TO_CHAPTER.items():
+            if yml_key in file_name:
+                chapter_name = name
+                break
+    return chapter_index.get(chapter_name) if chapter_name else None
+
+# Manifest degli hash per l'esecuzione incrementale
+MANIFEST_FILE = Path(".cache/rules_manifest.json")
+MANIFEST_VERSION = 1
+
+def english_pages(pages):
+    """Chiavi delle pagine il cui testo è riconosciuto come inglese (una sola classificazione)"""
+    keys = [key for key, page in pages.items() if isinstance(page, dict) and isinstance(page.get('text'), str)]
+    languages = get_detector().classify([pages[key]['text'] for key in keys])
+    return {key for key, language in zip(keys, languages) if language == 'en'}
+
+def sha256_text(text):
+    """Hash SHA-256 di una stringa"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def sha256_file(path):
+    """Hash SHA-256 del contenuto di un file"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def chapter_hash(chapter_data):
+    """Hash del contenuto JSON di un capitolo"""
+    return sha256_text(json.dumps(chapter_data, ensure_ascii=False, sort_keys=True))
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Carica il manifest degli hash (vuoto se assente o non valido)"""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'files': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'files': {}}
+    manifest.setdefault('files', {})
+    return manifest
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Salva il manifest degli hash"""
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+@instrumented('rules', pack='rules')
+def translate_rules(force=False, use_libyaml=False, refresh_english=False):
+    """
+    Completa le traduzioni delle regole
+
+    Usa un manifest con gli hash dei file sorgente, dei capitoli e delle pagine: i capitoli il
+    cui sorgente e contenuto JSON non sono cambiati dall'ultimo run non vengono rielaborati, e
+    rules.json viene riscritto solo se il risultato è diverso. Con force=True ignora il manifest;
+    con use_libyaml i YAML vengono letti con il loader C di PyYAML invece del parser a righe.
+
+    Quando il sorgente di una pagina cambia, il testo viene sostituito solo se è ancora la copia
+    inglese del run precedente (stesso hash). Con refresh_english=True vengono sostituiti anche
+    i testi riconosciuti come inglesi da language_detect: può sovrascrivere modifiche manuali
+    sulle pagine brevi o molto formattate classificate male.
+    """
     print("=== TRADUZIONE REGOLE (dnd5e.rules) ===\n")
     
-    # Carica file rules.json esistente
     rules_file = Path("compendium/dnd5e.rules.json")
-    with open(rules_file, 'r', encoding='utf-8') as f:
-        data = json.load(f, object_pairs_hook=OrderedDict)
     
     # Leggi file originali
     origin_dir = Path("origin/packs/_source/rules")
@@ -126,48 +313,80 @@ def translate_rules():
     yml_files = list(origin_dir.glob("*.yml"))
     print(f"✅ Trovati {len(yml_files)} file originali\n")
     
-    entries = data.get('entries', {})
+    # Hash dei sorgenti e del file JSON attuale
+    rules_hash = sha256_file(rules_file)
+    file_hashes = {yml_file.name: sha256_file(yml_file) for yml_file in yml_files}
+    
+    manifest = {'version': MANIFEST_VERSION, 'files': {}} if force else load_manifest()
+    previous_files = manifest['files']
+    
+    # Nessun cambiamento da nessuna parte: niente da fare
+    if (manifest.get('rules_json') == rules_hash
+            and file_hashes == {name: info.get('sha256') for name, info in previous_files.items()}):
+        print("⏭️  Nessun file modificato dall'ultima esecuzione")
+        return
+    
+    # Carica file rules.json esistente
+    entries = Compendium(rules_file)
+    chapter_index = build_chapter_index(entries)
     total_pages_added = 0
+    total_pages_refreshed = 0
     total_pages_skipped = 0
+    chapters_unchanged = 0
+    new_files = {}
     
     # Processa ogni file YAML
     for yml_file in sorted(yml_files):
         file_name = yml_file.name
         
         # Trova il capitolo corrispondente
-        chapter_key = None
-        for yml_key, chapter_name in FILE_TO_CHAPTER.items():
-            if yml_key in file_name:
-                # Cerca il capitolo nel JSON
-                for key in entries.keys():
-                    if chapter_name in key or normalize_page_name(chapter_name) == normalize_page_name(key):
-                        chapter_key = key
-                        break
-                break
+        chapter_key = find_chapter_key(file_name, chapter_index)
         
         if not chapter_key:
             print(f"⚠️  Nessun capitolo corrispondente per: {file_name}")
+            new_files[file_name] = {'sha256': file_hashes[file_name]}
+            continue
+        
+        # Salta i capitoli con sorgente e contenuto invariati
+        previous = previous_files.get(file_name, {})
+        if (previous.get('sha256') == file_hashes[file_name]
+                and previous.get('chapter') == chapter_key
+                and previous.get('chapter_sha') == chapter_hash(entries[chapter_key])):
+            new_files[file_name] = previous
+            chapters_unchanged += 1
             continue
         
         print(f"📖 Processando: {file_name} → {chapter_key}")
         
         # Leggi contenuto YAML
-        yaml_data = read_yaml_file(yml_file)
+        yaml_data = read_yaml_file(yml_file, use_libyaml)
         if not yaml_data or 'pages' not in yaml_data:
             print(f"   ⚠️  Nessuna pagina trovata in {file_name}")
+            new_files[file_name] = {'sha256': file_hashes[file_name]}
             continue
         
+        get_metrics().add_entries(len(yaml_data['pages']))
+        
         # Aggiungi contenuto alle pagine mancanti
         chapter_data = entries[chapter_key]
+        hash_before = chapter_hash(chapter_data)
         if 'pages' not in chapter_data:
             chapter_data['pages'] = OrderedDict()
         
         chapter_pages = chapter_data['pages']
+        matcher = PageMatcher(chapter_pages)
+        english_keys = english_pages(chapter_pages) if refresh_english else set()
+        previous_pages = previous.get('pages', {})
+        page_hashes = {}
         pages_added = 0
+        pages_refreshed = 0
         
         for page_name_orig, page_data_orig in yaml_data['pages'].items():
+            source_text = page_data_orig.get('text', '')
+            page_hashes[page_name_orig] = sha256_text(source_text)
+            
             # Trova corrispondenza nella struttura esistente
-            page_key = find_page_match(page_name_orig, chapter_pages)
+            page_key = matcher.match(page_name_orig)
             
             if not page_key:
                 # Crea nuova pagina
@@ -175,32 +394,74 @@ def translate_rules():
                 chapter_pages[page_key] = OrderedDict({
                     'name': page_name_orig  # Sarà tradotto dopo
                 })
+                matcher.add(page_key, chapter_pages[page_key])
             
             # Aggiungi contenuto se manca
             page_data = chapter_pages[page_key]
             if isinstance(page_data, dict):
                 if 'text' not in page_data and 'description' not in page_data and 'content' not in page_data:
                     # Aggiungi contenuto (testo originale, da tradurre manualmente o via API)
-                    page_data['text'] = page_data_orig.get('text', '')
+                    page_data['text'] = source_text
                     if page_data['text']:
                         pages_added += 1
                         total_pages_added += 1
+                elif (page_name_orig in previous_pages
+                        and previous_pages[page_name_orig] != page_hashes[page_name_orig]
+                        and isinstance(page_data.get('text'), str)
+                        and (sha256_text(page_data['text']) == previous_pages[page_name_orig]
+                             or page_key in english_keys)):
+                    # Il testo è ancora la copia inglese del run precedente (o, con refresh_english,
+                    # è riconosciuto come inglese) ma il sorgente è cambiato
+                    page_data['text'] = source_text
+                    pages_refreshed += 1
+                    total_pages_refreshed += 1
                 else:
                     total_pages_skipped += 1
         
-        if pages_added > 0:
-            print(f"   ✅ Aggiunto contenuto a {pages_added} pagine")
+        hash_after = chapter_hash(chapter_data)
+        if hash_after != hash_before:
+            entries.mark_dirty(chapter_key)
+        new_files[file_name] = {
+            'sha256': file_hashes[file_name],
+            'chapter': chapter_key,
+            'chapter_sha': hash_after,
+            'pages': page_hashes,
+        }
+        
+        if pages_added > 0 or pages_refreshed > 0:
+            print(f"   ✅ Aggiunto contenuto a {pages_added} pagine, aggiornate {pages_refreshed}")
         else:
             print(f"   ⚠️  Nessuna pagina aggiornata (già presente o senza contenuto)")
     
-    # Salva file aggiornato
-    with open(rules_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Salva file aggiornato solo se il risultato è cambiato (solo i capitoli modificati)
+    saved = entries.save() > 0
+    still_english = sum(len(english_pages(chapter_data.get('pages', {}))) for _, chapter_data in entries.items())
+    
+    manifest = {'version': MANIFEST_VERSION, 'rules_json': sha256_file(rules_file), 'files': new_files}
+    save_manifest(manifest)
     
     print(f"\n📊 RIEPILOGO:")
     print(f"  ✅ Pagine con contenuto aggiunto: {total_pages_added}")
+    print(f"  🔄 Pagine aggiornate (sorgente inglese cambiato): {total_pages_refreshed}")
     print(f"  ⏭️  Pagine saltate (già con contenuto): {total_pages_skipped}")
-    print(f"  💾 File salvato: {rules_file}")
+    print(f"  ⏭️  Capitoli invariati non rielaborati: {chapters_unchanged}")
+    print(f"  🇬🇧 Pagine con testo ancora in inglese: {still_english}")
+    if saved:
+        print(f"  💾 File salvato: {rules_file}")
+    else:
+        print(f"  💾 Nessuna modifica, {rules_file} non riscritto")
 
 if __name__ == '__main__':
-    translate_rules()
+    parser = argparse.ArgumentParser(description="Completa le traduzioni delle regole (dnd5e.rules)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignora il manifest e rielabora tutti i capitoli")
+    parser.add_argument('--libyaml', action='store_true',
+                        help="legge i YAML con il loader C di PyYAML (se installato)")
+    parser.add_argument('--refresh-english', action='store_true',
+                        help="se il sorgente cambia aggiorna anche le pagine riconosciute come inglesi "
+                             "(non solo le copie invariate del run precedente)")
+    add_metrics_arguments(parser, 'translate_rules')
+    args = parser.parse_args()
+    start_run(args)
+    translate_rules(force=args.force, use_libyaml=args.libyaml, refresh_english=args.refresh_english)
+    finish_run(args)
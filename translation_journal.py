@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Journal append-only delle traduzioni ottenute via API
+
+Ogni traduzione trovata viene scritta subito su un file JSONL (una riga per voce), così un
+crash o un Ctrl-C a metà run non fa perdere il lavoro di rete già fatto. Con la ripresa
+(--resume) le voci già nel journal vengono saltate e il journal viene unito al pack con
+un'unica scrittura.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+REPO_ROOT = Path(__file__).parent
+JOURNAL_SUBDIR = Path('.cache') / 'journal'
+JOURNAL_DIR = REPO_ROOT / JOURNAL_SUBDIR
+
+class TranslationJournal:
+    """Journal JSONL di un pack: righe {"key": chiave, "name": nome italiano}"""
+
+    def __init__(self, pack: str, journal_dir: Path = JOURNAL_DIR):
+        self.pack = pack
+        self.path = Path(journal_dir) / f"{pack}.jsonl"
+        self._lock = threading.Lock()
+        self._file = None
+
+    def entries(self) -> Dict[str, str]:
+        """Voci registrate finora (l'ultima riga vince); le righe troncate vengono ignorate"""
+        return dict(self._iter_lines())
+
+    def _iter_lines(self) -> Iterator[Tuple[str, str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Riga scritta a metà durante un crash
+                        continue
+                    if isinstance(record, dict) and 'key' in record and 'name' in record:
+                        yield record['key'], record['name']
+        except FileNotFoundError:
+            return
+
+    def append(self, key: str, name: str):
+        """Registra una traduzione e la rende subito persistente"""
+        line = json.dumps({'key': key, 'name': name}, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Elimina il journal (da chiamare dopo averlo unito al pack)"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_journal(pack: str, resume: bool, journal_dir: Path = JOURNAL_DIR) -> Tuple[TranslationJournal, Dict[str, str]]:
+    """
+    Apre il journal di un pack
+
+    Returns:
+        (journal, voci già registrate): con resume=False un journal rimasto da un run
+        interrotto viene azzerato e le voci restituite sono vuote
+    """
+    journal = TranslationJournal(pack, journal_dir)
+    if resume:
+        return journal, journal.entries()
+    leftover = journal.entries()
+    if leftover:
+        # Non perdere il lavoro già fatto: conserva una copia del journal
+        backup = journal.path.with_suffix('.jsonl.bak')
+        os.replace(journal.path, backup)
+        print(f"⚠️  Journal di un run interrotto di {pack} ({len(leftover)} traduzioni) spostato in {backup.name}: "
+              f"usa --resume per riprenderlo invece di ricominciare")
+    journal.clear()
+    return journal, {}
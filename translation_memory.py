@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Memoria di traduzione EN -> IT costruita dalle voci già tradotte di tutti i pack
+
+Molti termini compaiono in più pack (incantesimi in spells e spells24, equipaggiamento in items
+ed equipment24, mostri in monsters e actors24): prima di interrogare quintaedizione.online si
+cerca il nome inglese tra le traduzioni esistenti.
+
+Il nome inglese di una voce è la chiave nei pack a dizionario; nei pack a lista è il nome
+originale dell'id (origin_index) oppure l'id stesso quando è un nome e non un id Foundry.
+Le voci con nome italiano uguale all'inglese non sono considerate tradotte.
+
+Ricerca, in ordine:
+1. nome normalizzato esatto (minuscole, senza punteggiatura, spazi compressi)
+2. stesse parole in ordine diverso ("Lantern, Bullseye" / "Bullseye Lantern")
+3. candidati fuzzy da un indice invertito a trigrammi, ordinati per coefficiente di Dice
+Solo 1 e 2 sono traduzioni applicabili (lookup). Il miglior candidato fuzzy sopra la soglia
+(default 0.9) è solo una proposta da rivedere (suggest), scartata se numeri e bonus ("+3",
+"9th") o le parole del nome sono diversi: "Chain Mail" non deve diventare "Cotta di Maglia +3".
+Se la stessa voce inglese ha più traduzioni vince quella dei pack preferiti, poi la più
+frequente.
+
+Uso: python translation_memory.py "Fire Bolt" "Lantern, Bullseye"
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from compendium_io import FOUNDRY_ID, compendium_files, iter_entries
+from origin_index import ORIGIN_PACKS_DIR, get_origin_index
+
+REPO_ROOT = Path(__file__).parent
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+
+# Soglia del coefficiente di Dice per accettare un candidato fuzzy senza revisione
+FUZZY_THRESHOLD = 0.9
+# Candidati restituiti da candidates()
+MAX_CANDIDATES = 5
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+_NUMBER = re.compile(r'\d+')
+# Dice minimo tra due parole per considerarle la stessa (plurali, grafie: "arrow"/"arrows")
+WORD_SIMILARITY = 0.6
+
+def normalize_term(text: str) -> str:
+    """Normalizza un nome per la ricerca: minuscole, senza punteggiatura, spazi compressi"""
+    if not text:
+        return ""
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+def _trigrams(norm: str) -> set:
+    padded = f" {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _numbers(text: str) -> Counter:
+    return Counter(_NUMBER.findall(text))
+
+def _same_word(word: str, other: str) -> bool:
+    if word == other:
+        return True
+    if _NUMBER.search(word) or _NUMBER.search(other):
+        return False
+    grams, other_grams = _trigrams(word), _trigrams(other)
+    return 2 * len(grams & other_grams) / (len(grams) + len(other_grams)) >= WORD_SIMILARITY
+
+def compatible(query: str, candidate: str, italian: str) -> bool:
+    """
+    Un candidato fuzzy è proponibile solo se ha gli stessi numeri della ricerca (livelli, bonus
+    +N, gradi), la traduzione non ne introduce altri e ogni parola di un nome ha una
+    corrispondente simile nell'altro
+    """
+    query_words, candidate_words = query.split(), candidate.split()
+    if _numbers(query) != _numbers(candidate) or not set(_numbers(italian)) <= set(_numbers(query)):
+        return False
+    return (all(any(_same_word(word, other) for other in candidate_words) for word in query_words)
+            and all(any(_same_word(word, other) for other in query_words) for word in candidate_words))
+
+def _english_name(key, entry, origin_names: Dict[str, str]) -> Optional[str]:
+    if key is None:
+        return None
+    if key in origin_names:
+        return origin_names[key]
+    if isinstance(entry, dict) and 'id' in entry and FOUNDRY_ID.match(str(key)):
+        # Id Foundry senza nome originale noto
+        return None
+    return str(key)
+
+class TranslationMemory:
+    """Indice EN -> IT con ricerca esatta, per parole e fuzzy a trigrammi, thread-safe in lettura"""
+
+    def __init__(self, threshold: float = FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self.terms: List[str] = []                          # termini normalizzati
+        self.translations: List[Counter] = []               # termine -> Counter((italiano, pack))
+        self.gram_counts: List[int] = []
+        self.exact: Dict[str, int] = {}
+        self.by_words: Dict[str, int] = {}
+        self.trigrams: Dict[str, List[int]] = {}
+        self.hits = Counter()                               # esiti delle ricerche
+        self._lock = threading.Lock()
+
+    def add(self, english: str, italian: str, pack: str):
+        """Registra una traduzione (ignorata se vuota o identica all'inglese)"""
+        norm = normalize_term(english)
+        if not norm or not italian or normalize_term(italian) == norm:
+            return
+        index = self.exact.get(norm)
+        if index is None:
+            index = len(self.terms)
+            grams = _trigrams(norm)
+            self.terms.append(norm)
+            self.translations.append(Counter())
+            self.gram_counts.append(len(grams))
+            self.exact[norm] = index
+            self.by_words.setdefault(' '.join(sorted(norm.split())), index)
+            for gram in grams:
+                self.trigrams.setdefault(gram, []).append(index)
+        self.translations[index][(italian, pack)] += 1
+
+    def add_pack(self, pack: str, json_file: Path, origin_names: Optional[Dict[str, str]] = None) -> int:
+        """Aggiunge le voci tradotte di un file del compendio, restituisce quante sono"""
+        return self.add_entries(pack, read_pack_terms(json_file, origin_names or {}))
+
+    def add_entries(self, pack: str, terms: Iterable[Tuple[str, str]]) -> int:
+        count = 0
+        for english, italian in terms:
+            self.add(english, italian, pack)
+            count += 1
+        return count
+
+    def _best(self, index: int, prefer: Tuple[str, ...]) -> Tuple[str, str]:
+        """Traduzione scelta per un termine: pack preferiti, poi la più frequente"""
+        ranked = sorted(self.translations[index].items(),
+                        key=lambda item: (item[0][1] not in prefer, -item[1]))
+        italian, pack = ranked[0][0]
+        return italian, pack
+
+    def candidates(self, english: str, prefer: Tuple[str, ...] = (),
+                   limit: int = MAX_CANDIDATES) -> List[Dict]:
+        """
+        Candidati ordinati per somiglianza
+
+        Returns:
+            [{'english', 'italian', 'pack', 'score', 'match'}] con match 'exact', 'words' o 'fuzzy'
+        """
+        norm = normalize_term(english)
+        if not norm:
+            return []
+        index = self.exact.get(norm)
+        match = 'exact'
+        if index is None:
+            index = self.by_words.get(' '.join(sorted(norm.split())))
+            match = 'words'
+        if index is not None:
+            italian, pack = self._best(index, prefer)
+            return [{'english': self.terms[index], 'italian': italian, 'pack': pack, 'score': 1.0, 'match': match}]
+
+        # Trigrammi condivisi con ogni termine, punteggio di Dice
+        grams = _trigrams(norm)
+        shared = Counter()
+        for gram in grams:
+            for term_index in self.trigrams.get(gram, ()):
+                shared[term_index] += 1
+        scored = []
+        for term_index, count in shared.items():
+            score = 2 * count / (len(grams) + self.gram_counts[term_index])
+            scored.append((score, term_index))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        results = []
+        for score, term_index in scored[:limit]:
+            italian, pack = self._best(term_index, prefer)
+            results.append({'english': self.terms[term_index], 'italian': italian, 'pack': pack,
+                            'score': score, 'match': 'fuzzy'})
+        return results
+
+    def lookup(self, english: str, prefer: Tuple[str, ...] = ()) -> Optional[str]:
+        """Traduzione italiana applicabile (nome esatto o stesse parole), altrimenti None"""
+        found = self.candidates(english, prefer, limit=1)
+        result = found[0] if found and found[0]['match'] != 'fuzzy' else None
+        with self._lock:
+            self.hits[result['match'] if result else 'miss'] += 1
+        return result['italian'] if result else None
+
+    def suggest(self, english: str, prefer: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """
+        Miglior candidato fuzzy da rivedere: sopra la soglia e compatibile (stessi numeri e parole)
+
+        Returns:
+            {'english', 'italian', 'pack', 'score', 'match'} oppure None
+        """
+        norm = normalize_term(english)
+        for candidate in self.candidates(english, prefer):
+            if candidate['match'] != 'fuzzy' or candidate['score'] < self.threshold:
+                break
+            if compatible(norm, candidate['english'], candidate['italian']):
+                with self._lock:
+                    self.hits['fuzzy'] += 1
+                return candidate
+        return None
+
+    def summary(self) -> str:
+        with self._lock:
+            hits = dict(self.hits)
+        found = hits.get('exact', 0) + hits.get('words', 0)
+        return (f"Memoria di traduzione: {found}/{found + hits.get('miss', 0)} trovate "
+                f"(esatte {hits.get('exact', 0)}, per parole {hits.get('words', 0)}), "
+                f"{hits.get('fuzzy', 0)} proposte fuzzy da rivedere su {len(self.terms)} termini")
+
+def read_pack_terms(json_file: Path, origin_names: Dict[str, str]) -> List[Tuple[str, str]]:
+    """Coppie (nome inglese, nome italiano) delle voci di un file del compendio"""
+    terms = []
+    try:
+        for key, entry in iter_entries(json_file):
+            if not isinstance(entry, dict) or not isinstance(entry.get('name'), str):
+                continue
+            english = _english_name(key, entry, origin_names)
+            if english:
+                terms.append((english, entry['name']))
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️  Errore lettura {json_file.name}: {e}")
+    return terms
+
+def build_memory(compendium_dir: Path = COMPENDIUM_DIR, threshold: float = FUZZY_THRESHOLD,
+                 use_origin: bool = True, verbose: bool = False) -> TranslationMemory:
+    """Costruisce la memoria da tutti i pack dnd5e.*.json del compendio, letti in parallelo"""
+    start = time.perf_counter()
+    origin = get_origin_index() if use_origin and ORIGIN_PACKS_DIR.exists() else {}
+    pack_files = compendium_files(compendium_dir)
+    packs, files = list(pack_files), list(pack_files.values())
+    with ThreadPoolExecutor(max_workers=min(8, len(files) or 1)) as executor:
+        results = list(executor.map(
+            lambda item: read_pack_terms(item[1], {entry_id: name for entry_id, (name, _, _) in origin.get(item[0], {}).items()}),
+            zip(packs, files)))
+    memory = TranslationMemory(threshold)
+    total = sum(memory.add_entries(pack, terms) for pack, terms in zip(packs, results))
+    if verbose:
+        print(f"🧠 Memoria di traduzione: {len(memory.terms)} termini da {total} voci di {len(files)} pack "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return memory
+
+_memory: Optional[TranslationMemory] = None
+_memory_enabled = True
+_memory_lock = threading.Lock()
+
+def configure_memory(enabled: bool = True, **kwargs) -> Optional[TranslationMemory]:
+    """Ricostruisce (o disattiva) la memoria condivisa con i parametri di build_memory"""
+    global _memory, _memory_enabled
+    with _memory_lock:
+        _memory_enabled = enabled
+        _memory = build_memory(**kwargs) if enabled else None
+    return _memory
+
+def get_memory() -> Optional[TranslationMemory]:
+    """Restituisce la memoria condivisa (costruita alla prima chiamata), None se disattivata"""
+    global _memory
+    with _memory_lock:
+        if _memory is None and _memory_enabled:
+            _memory = build_memory(verbose=True)
+        return _memory
+
+def main():
+    memory = build_memory(verbose=True)
+    for english in sys.argv[1:]:
+        print(f"\n🔍 {english}")
+        found = memory.candidates(english)
+        if not found:
+            print("   ❌ Nessun candidato")
+        suggested = memory.suggest(english)
+        for candidate in found:
+            if candidate['match'] != 'fuzzy':
+                accepted = '✅'
+            else:
+                accepted = '🔍' if candidate == suggested else '  '
+            print(f"   {accepted} {candidate['score']:.2f} {candidate['match']:6} {candidate['english']} → "
+                  f"{candidate['italian']} ({candidate['pack']})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Sincronizzazione con i sorgenti inglesi del sistema dnd5e (origin/packs/_source)
+
+Per ogni voce tradotta dei pack registrati in Babele (main.js) conserva un'impronta (SHA-256)
+del sorgente YAML, indicizzata per _id. A ogni nuova release del sistema un solo passaggio
+confronta le impronte attuali con quelle salvate e produce una coda di lavoro con le sole voci
+nuove (senza traduzione) o modificate (sorgente cambiato dopo la traduzione).
+
+L'impronta ignora i metadati che cambiano a ogni release senza toccare il contenuto (_stats,
+sort, folder, ownership). I file con mtime invariato non vengono riletti.
+
+Uso:
+    python upstream_sync.py                # genera .cache/work_queue.json
+    python upstream_sync.py --accept       # dopo aver aggiornato le traduzioni: le impronte
+                                           # attuali diventano il nuovo riferimento
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from compendium import Compendium
+from compendium_io import atomic_write_json
+from origin_index import DEFAULT_INDEX_FILE, MAX_WORKERS, ORIGIN_PACKS_DIR, build_origin_index
+
+REPO_ROOT = Path(__file__).parent
+MAIN_JS = REPO_ROOT / 'main.js'
+COMPENDIUM_DIR = REPO_ROOT / 'compendium'
+DEFAULT_STATE_FILE = REPO_ROOT / '.cache' / 'upstream_sync.json'
+DEFAULT_QUEUE_FILE = REPO_ROOT / '.cache' / 'work_queue.json'
+STATE_VERSION = 1
+
+# Chiavi di metadati escluse dall'impronta (a qualsiasi livello)
+VOLATILE_KEYS = {'_stats', 'sort', 'folder', 'ownership'}
+
+_BABELE_BLOCK = re.compile(r'Babele\.get\(\)\.register\(\{.*?entries:\s*\{(.*?)\}', re.DOTALL)
+_BABELE_ENTRY = re.compile(r'"dnd5e\.([\w-]+)"\s*:\s*"([^"]+)"')
+
+def read_babele_packs(main_js: Path = MAIN_JS) -> Dict[str, str]:
+    """
+    Pack registrati in Babele da main.js
+
+    Returns:
+        {nome pack (es. 'spells24'): file del compendio (es. 'dnd5e.spells24.json')}
+    """
+    with open(main_js, 'r', encoding='utf-8') as f:
+        source = f.read()
+    match = _BABELE_BLOCK.search(source)
+    if not match:
+        return {}
+    return dict(_BABELE_ENTRY.findall(match.group(1)))
+
+def source_fingerprint(yml_file: Path) -> Optional[str]:
+    """Impronta SHA-256 di un sorgente YAML, esclusi i blocchi di VOLATILE_KEYS"""
+    digest = hashlib.sha256()
+    skip_indent = None
+    try:
+        with open(yml_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                stripped = line.lstrip(' ')
+                indent = len(line) - len(stripped)
+                if skip_indent is not None:
+                    if not stripped.strip() or indent > skip_indent:
+                        continue
+                    skip_indent = None
+                is_item = stripped.startswith('- ')
+                body = stripped[2:] if is_item else stripped
+                key = body.split(':', 1)[0]
+                if key in VOLATILE_KEYS and body[len(key):len(key) + 1] == ':':
+                    # Salta la chiave e il suo blocco annidato; per "- sort: ..." mantieni l'inizio elemento
+                    skip_indent = indent + 2 if is_item else indent
+                    if is_item:
+                        digest.update(b'-\n')
+                    continue
+                digest.update(line.encode('utf-8'))
+    except OSError as e:
+        print(f"   ⚠️  Errore lettura {yml_file.name}: {e}")
+        return None
+    return digest.hexdigest()
+
+def load_state(state_file: Path = DEFAULT_STATE_FILE) -> Dict:
+    """
+    Stato salvato: {'version', 'baseline': {pack: {id: impronta}},
+    'files': {pack: {path relativo: [mtime_ns, impronta]}}}
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    if state.get('version') != STATE_VERSION:
+        state = {'version': STATE_VERSION, 'baseline': {}, 'files': {}}
+    return state
+
+def save_state(state: Dict, state_file: Path = DEFAULT_STATE_FILE):
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(state_file, state, indent=None)
+
+def fingerprint_pack(pack: str, entries: Dict, known_files: Dict[str, List],
+                     origin_dir: Path = ORIGIN_PACKS_DIR) -> Dict[str, str]:
+    """
+    Impronte delle voci di un pack, rileggendo solo i file con mtime cambiato
+
+    Args:
+        entries: voci dell'indice origin del pack {id: (nome, path relativo, mtime_ns)}
+        known_files: cache {path relativo: [mtime_ns, impronta]}, aggiornata sul posto
+    """
+    fingerprints = {}
+    to_read = []
+    for entry_id, (_, rel_path, mtime) in entries.items():
+        cached = known_files.get(rel_path)
+        if cached and cached[0] == mtime:
+            fingerprints[entry_id] = cached[1]
+        else:
+            to_read.append((entry_id, rel_path, mtime))
+    if to_read:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(lambda job: source_fingerprint(origin_dir / pack / job[1]), to_read)
+            for (entry_id, rel_path, mtime), fingerprint in zip(to_read, results):
+                if fingerprint:
+                    fingerprints[entry_id] = fingerprint
+                    known_files[rel_path] = [mtime, fingerprint]
+    # Dimentica i file non più presenti
+    current = {rel_path for _, rel_path, _ in entries.values()}
+    for rel_path in list(known_files):
+        if rel_path not in current:
+            del known_files[rel_path]
+    return fingerprints
+
+def translated_keys(compendium_file: Path) -> Optional[set]:
+    """Chiavi delle voci tradotte di un pack (id o nome inglese), None se il file manca"""
+    if not compendium_file.exists():
+        return None
+    return set(Compendium(compendium_file).keys())
+
+def sync(packs: Optional[List[str]] = None, accept: bool = False, state_file: Path = DEFAULT_STATE_FILE,
+         queue_file: Optional[Path] = DEFAULT_QUEUE_FILE, origin_dir: Path = ORIGIN_PACKS_DIR,
+         compendium_dir: Path = COMPENDIUM_DIR, main_js: Path = MAIN_JS,
+         index_file: Optional[Path] = DEFAULT_INDEX_FILE) -> Dict:
+    """
+    Confronta i sorgenti attuali con le impronte salvate e scrive la coda di lavoro
+
+    Le voci tradotte senza impronta salvata (primo run o traduzione nuova) prendono come
+    riferimento il sorgente attuale. Con accept=True anche le voci modificate vengono
+    considerate aggiornate e le impronte attuali diventano il riferimento.
+
+    Returns:
+        Coda di lavoro {'generated', 'packs': {pack: [{'id', 'name', 'file', 'status'}]}, 'summary'}
+    """
+    registered = read_babele_packs(main_js)
+    if packs:
+        unknown = [pack for pack in packs if pack not in registered]
+        for pack in unknown:
+            print(f"⚠️  Pack {pack} non registrato in main.js, ignorato")
+        registered = {pack: file_name for pack, file_name in registered.items() if pack in packs}
+
+    state = load_state(state_file)
+    index = build_origin_index(packs=list(registered), origin_dir=origin_dir, index_file=index_file)
+
+    # Chiavi tradotte di tutti i pack, caricati in parallelo
+    with ThreadPoolExecutor(max_workers=min(8, len(registered) or 1)) as executor:
+        translated = dict(zip(registered, executor.map(
+            lambda file_name: translated_keys(compendium_dir / file_name), registered.values())))
+
+    queue = {'generated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'packs': {}, 'summary': {}}
+    for pack in registered:
+        entries = index.get(pack, {})
+        keys = translated[pack]
+        if keys is None or not entries:
+            print(f"⏭️  {pack}: {'file del compendio mancante' if keys is None else 'nessun sorgente in origin'}")
+            continue
+
+        known_files = state['files'].setdefault(pack, {})
+        fingerprints = fingerprint_pack(pack, entries, known_files, origin_dir)
+        baseline = state['baseline'].setdefault(pack, {})
+
+        work = []
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'baselined': 0, 'removed': 0}
+        for entry_id, (name, rel_path, _) in entries.items():
+            fingerprint = fingerprints.get(entry_id)
+            if fingerprint is None:
+                continue
+            if entry_id not in keys and name not in keys:
+                counts['new'] += 1
+                work.append({'id': entry_id, 'name': name, 'file': rel_path, 'status': 'new'})
+                continue
+            previous = baseline.get(entry_id)
+            if previous is None or accept:
+                counts['baselined' if previous is None else 'unchanged'] += 1
+                baseline[entry_id] = fingerprint
+            elif previous != fingerprint:
+                counts['changed'] += 1
+                work.append({'id': entry_id, 'name': name, 'file': rel_path, 'status': 'changed'})
+            else:
+                counts['unchanged'] += 1
+
+        # Voci sparite dai sorgenti
+        for entry_id in [entry_id for entry_id in baseline if entry_id not in entries]:
+            counts['removed'] += 1
+            if accept:
+                del baseline[entry_id]
+
+        queue['packs'][pack] = work
+        queue['summary'][pack] = counts
+        icon = '✅' if not work else '📋'
+        print(f"{icon} {pack}: {counts['new']} nuove, {counts['changed']} modificate, "
+              f"{counts['unchanged']} invariate, {counts['baselined']} registrate, {counts['removed']} rimosse")
+
+    save_state(state, state_file)
+    if queue_file:
+        queue_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(queue_file, queue)
+    return queue
+
+def main():
+    parser = argparse.ArgumentParser(description="Trova le voci nuove o modificate nei sorgenti inglesi")
+    parser.add_argument('--packs', help="pack da controllare, separati da virgola (default: tutti quelli di main.js)")
+    parser.add_argument('--accept', action='store_true',
+                        help="registra le impronte attuali delle voci tradotte come nuovo riferimento")
+    parser.add_argument('--queue', type=Path, default=DEFAULT_QUEUE_FILE,
+                        help=f"file della coda di lavoro (default: {DEFAULT_QUEUE_FILE.relative_to(REPO_ROOT)})")
+    parser.add_argument('--state', type=Path, default=DEFAULT_STATE_FILE,
+                        help=f"file delle impronte (default: {DEFAULT_STATE_FILE.relative_to(REPO_ROOT)})")
+    args = parser.parse_args()
+
+    if not ORIGIN_PACKS_DIR.exists():
+        print(f"❌ Directory {ORIGIN_PACKS_DIR.relative_to(REPO_ROOT)} non trovata!")
+        return
+
+    print("=" * 70)
+    print("🔄 SINCRONIZZAZIONE CON I SORGENTI DND5E")
+    print("=" * 70 + "\n")
+    packs = [pack.strip() for pack in args.packs.split(',')] if args.packs else None
+    start = time.perf_counter()
+    queue = sync(packs=packs, accept=args.accept, state_file=args.state, queue_file=args.queue)
+    total = sum(len(work) for work in queue['packs'].values())
+    print(f"\n📊 {total} voci da lavorare in {time.perf_counter() - start:.2f}s")
+    print(f"💾 Coda di lavoro: {args.queue}")
+
+if __name__ == '__main__':
+    main()